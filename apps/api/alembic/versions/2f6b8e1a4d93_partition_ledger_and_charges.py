@@ -0,0 +1,208 @@
+"""partition_ledger_and_charges
+
+Revision ID: 2f6b8e1a4d93
+Revises: 7c3d0e5b9f14
+Create Date: 2026-10-19 20:11:53.240716
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6b8e1a4d93'
+down_revision: Union[str, None] = '7c3d0e5b9f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# mesmo layout de app.db.partitions (duplicado de propósito: migration não importa código da app)
+MONTHS_AHEAD = 12
+CHARGE_PARTITIONS = 16
+
+LEDGER_COLUMNS = (
+    "id, org_id, type, amount, description, occurred_at, related_member_id, created_by_id, created_at, updated_at"
+)
+CHARGE_COLUMNS = (
+    "id, org_id, org_member_id, game_id, cycle_key, type, status, amount, ledger_entry_id, created_by_id, "
+    "paid_at, voided_at, created_at, updated_at"
+)
+
+LEDGER_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_ledger_entries_org_id ON ledger_entries (org_id)",
+    "CREATE INDEX IF NOT EXISTS ix_ledger_entries_org_type_occurred "
+    "ON ledger_entries (org_id, type, occurred_at) INCLUDE (amount)",
+    "CREATE INDEX IF NOT EXISTS ix_ledger_entries_org_occurred ON ledger_entries (org_id, occurred_at)",
+)
+CHARGE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_org_charges_org_id ON org_charges (org_id)",
+    "CREATE INDEX IF NOT EXISTS ix_org_charges_org_member_id ON org_charges (org_member_id)",
+    "CREATE INDEX IF NOT EXISTS ix_org_charges_cycle_key ON org_charges (cycle_key)",
+    "CREATE INDEX IF NOT EXISTS ix_org_charges_org_cycle ON org_charges (org_id, cycle_key)",
+    "CREATE INDEX IF NOT EXISTS ix_org_charges_org_status ON org_charges (org_id, status)",
+    "CREATE INDEX IF NOT EXISTS ix_org_charges_game_id ON org_charges (game_id)",
+    "CREATE INDEX IF NOT EXISTS ix_org_charges_org_game ON org_charges (org_id, game_id)",
+    "CREATE INDEX IF NOT EXISTS ix_org_charges_org_created ON org_charges (org_id, created_at)",
+)
+
+
+def _relkind(conn, table: str) -> str | None:
+    return conn.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE relname = :t AND relnamespace = 'public'::regnamespace"),
+        {"t": table},
+    ).scalar()
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def _ledger_table_sql(name: str, partitioned: bool) -> str:
+    pk = "PRIMARY KEY (id, occurred_at)" if partitioned else "PRIMARY KEY (id)"
+    tail = " PARTITION BY RANGE (occurred_at)" if partitioned else ""
+    return f"""
+        CREATE TABLE {name} (
+            id UUID NOT NULL,
+            org_id UUID NOT NULL REFERENCES organizations (id),
+            type ledger_type NOT NULL,
+            amount NUMERIC(12, 2) NOT NULL,
+            description TEXT,
+            occurred_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            related_member_id UUID REFERENCES org_members (id),
+            created_by_id UUID REFERENCES users (id),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            {pk}
+        ){tail}
+    """
+
+
+def _charges_table_sql(name: str, partitioned: bool) -> str:
+    pk = "PRIMARY KEY (id, org_id)" if partitioned else "PRIMARY KEY (id)"
+    ledger_fk = "" if partitioned else " REFERENCES ledger_entries (id)"
+    tail = " PARTITION BY HASH (org_id)" if partitioned else ""
+    return f"""
+        CREATE TABLE {name} (
+            id UUID NOT NULL,
+            org_id UUID NOT NULL REFERENCES organizations (id),
+            org_member_id UUID NOT NULL REFERENCES org_members (id),
+            game_id UUID REFERENCES games (id) ON DELETE SET NULL,
+            cycle_key VARCHAR(64) NOT NULL,
+            type charge_type NOT NULL,
+            status charge_status NOT NULL,
+            amount NUMERIC(12, 2) NOT NULL,
+            ledger_entry_id UUID{ledger_fk},
+            created_by_id UUID REFERENCES users (id),
+            paid_at TIMESTAMP WITH TIME ZONE,
+            voided_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            {pk},
+            CONSTRAINT uq_org_charges_org_member_cycle_type UNIQUE (org_id, org_member_id, cycle_key, type)
+        ){tail}
+    """
+
+
+def _create_ledger_partitions(conn) -> None:
+    today = datetime.now(timezone.utc).date()
+    oldest = conn.execute(sa.text("SELECT min(occurred_at) FROM ledger_entries_unpartitioned")).scalar()
+    first = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS ledger_entries_hist PARTITION OF ledger_entries "
+        f"FOR VALUES FROM (MINVALUE) TO ('{first.isoformat()} 00:00:00+00')"
+    )
+    month = first
+    while month <= last:
+        nxt = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS ledger_entries_p{month.year:04d}_{month.month:02d} "
+            f"PARTITION OF ledger_entries "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{nxt.isoformat()} 00:00:00+00')"
+        )
+        month = nxt
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    # ledger_entries -> RANGE (occurred_at) mensal. FK de org_charges.ledger_entry_id sai:
+    # FK para tabela particionada teria que incluir occurred_at.
+    if _relkind(conn, "ledger_entries") == "r":
+        op.execute("ALTER TABLE org_charges DROP CONSTRAINT IF EXISTS org_charges_ledger_entry_id_fkey")
+        op.execute("ALTER TABLE ledger_entries RENAME TO ledger_entries_unpartitioned")
+        op.execute("ALTER INDEX IF EXISTS ledger_entries_pkey RENAME TO ledger_entries_unpartitioned_pkey")
+        for name in ("ix_ledger_entries_org_id", "ix_ledger_entries_org_type_occurred", "ix_ledger_entries_org_occurred"):
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+        op.execute(_ledger_table_sql("ledger_entries", partitioned=True))
+        _create_ledger_partitions(conn)
+        op.execute(
+            f"INSERT INTO ledger_entries ({LEDGER_COLUMNS}) SELECT {LEDGER_COLUMNS} FROM ledger_entries_unpartitioned"
+        )
+        op.execute("DROP TABLE ledger_entries_unpartitioned")
+    for sql in LEDGER_INDEXES:
+        op.execute(sql)
+
+    # org_charges -> HASH (org_id): mantém a unique (org_id, member, cycle_key, type)
+    if _relkind(conn, "org_charges") == "r":
+        op.execute("ALTER TABLE org_charges DROP CONSTRAINT IF EXISTS org_charges_ledger_entry_id_fkey")
+        op.execute("ALTER TABLE org_charges RENAME TO org_charges_unpartitioned")
+        op.execute("ALTER INDEX IF EXISTS org_charges_pkey RENAME TO org_charges_unpartitioned_pkey")
+        op.execute(
+            "ALTER TABLE org_charges_unpartitioned DROP CONSTRAINT IF EXISTS uq_org_charges_org_member_cycle_type"
+        )
+        for sql in CHARGE_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {sql.split(' IF NOT EXISTS ')[1].split(' ')[0]}")
+        op.execute(_charges_table_sql("org_charges", partitioned=True))
+        for i in range(CHARGE_PARTITIONS):
+            op.execute(
+                f"CREATE TABLE IF NOT EXISTS org_charges_h{i:02d} PARTITION OF org_charges "
+                f"FOR VALUES WITH (MODULUS {CHARGE_PARTITIONS}, REMAINDER {i})"
+            )
+        op.execute(f"INSERT INTO org_charges ({CHARGE_COLUMNS}) SELECT {CHARGE_COLUMNS} FROM org_charges_unpartitioned")
+        op.execute("DROP TABLE org_charges_unpartitioned")
+    for sql in CHARGE_INDEXES:
+        op.execute(sql)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+
+    if _relkind(conn, "org_charges") == "p":
+        op.execute("ALTER TABLE org_charges RENAME TO org_charges_partitioned")
+        op.execute("ALTER INDEX IF EXISTS org_charges_pkey RENAME TO org_charges_partitioned_pkey")
+        op.execute(
+            "ALTER TABLE org_charges_partitioned DROP CONSTRAINT IF EXISTS uq_org_charges_org_member_cycle_type"
+        )
+        for sql in CHARGE_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {sql.split(' IF NOT EXISTS ')[1].split(' ')[0]}")
+        # FK para ledger_entries volta depois que o ledger deixar de ser particionado
+        op.execute(_charges_table_sql("org_charges", partitioned=False).replace(" REFERENCES ledger_entries (id)", ""))
+        op.execute(f"INSERT INTO org_charges ({CHARGE_COLUMNS}) SELECT {CHARGE_COLUMNS} FROM org_charges_partitioned")
+        op.execute("DROP TABLE org_charges_partitioned CASCADE")
+        for sql in CHARGE_INDEXES:
+            op.execute(sql)
+
+    if _relkind(conn, "ledger_entries") == "p":
+        op.execute("ALTER TABLE ledger_entries RENAME TO ledger_entries_partitioned")
+        op.execute("ALTER INDEX IF EXISTS ledger_entries_pkey RENAME TO ledger_entries_partitioned_pkey")
+        for name in ("ix_ledger_entries_org_id", "ix_ledger_entries_org_type_occurred", "ix_ledger_entries_org_occurred"):
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+        op.execute(_ledger_table_sql("ledger_entries", partitioned=False))
+        op.execute(
+            f"INSERT INTO ledger_entries ({LEDGER_COLUMNS}) SELECT {LEDGER_COLUMNS} FROM ledger_entries_partitioned"
+        )
+        op.execute("DROP TABLE ledger_entries_partitioned CASCADE")
+        for sql in LEDGER_INDEXES:
+            op.execute(sql)
+
+    op.execute(
+        "DO $$ BEGIN "
+        "IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'org_charges_ledger_entry_id_fkey') THEN "
+        "ALTER TABLE org_charges ADD CONSTRAINT org_charges_ledger_entry_id_fkey "
+        "FOREIGN KEY (ledger_entry_id) REFERENCES ledger_entries (id); "
+        "END IF; END $$"
+    )
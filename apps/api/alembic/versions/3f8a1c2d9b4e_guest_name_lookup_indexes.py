@@ -0,0 +1,81 @@
+"""guest_name_lookup_indexes
+
+Revision ID: 3f8a1c2d9b4e
+Revises: 94300790e65d
+Create Date: 2026-10-19 09:12:41.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a1c2d9b4e'
+down_revision: Union[str, None] = '94300790e65d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# grupos que violariam os índices únicos abaixo. Convidados são referenciados por
+# times, draft e capitães: não dá para apagar/mesclar às cegas, então a migration
+# para e lista as linhas para alguém decidir qual manter.
+_DUPLICATE_CHECKS = (
+    (
+        "uq_org_guests_org_phone",
+        "SELECT org_id, phone, array_agg(id::text ORDER BY created_at, id) AS ids "
+        "FROM org_guests WHERE phone IS NOT NULL "
+        "GROUP BY org_id, phone HAVING count(*) > 1",
+    ),
+    (
+        "uq_game_guests_game_name_phone",
+        "SELECT game_id, lower(btrim(name)) AS name, coalesce(btrim(phone), '') AS phone, "
+        "array_agg(id::text ORDER BY created_at, id) AS ids "
+        "FROM game_guests GROUP BY game_id, lower(btrim(name)), coalesce(btrim(phone), '') "
+        "HAVING count(*) > 1",
+    ),
+)
+_MAX_LISTED = 50
+
+
+def _check_duplicates() -> None:
+    bind = op.get_bind()
+    problems = []
+    for index_name, sql in _DUPLICATE_CHECKS:
+        rows = bind.execute(sa.text(f"{sql} LIMIT {_MAX_LISTED + 1}")).mappings().all()
+        if not rows:
+            continue
+        problems.append(f"{index_name}: {len(rows) if len(rows) <= _MAX_LISTED else f'>{_MAX_LISTED}'} groups")
+        for row in rows[:_MAX_LISTED]:
+            key = ", ".join(f"{k}={v}" for k, v in row.items() if k != "ids")
+            problems.append(f"  {key} -> ids {', '.join(row['ids'])}")
+    if problems:
+        raise RuntimeError(
+            "duplicate guests block the unique indexes; merge or delete them and rerun:\n" + "\n".join(problems)
+        )
+
+
+def upgrade() -> None:
+    # idempotente: bancos criados via create_all() já podem ter alguns destes índices
+    _check_duplicates()
+    op.execute("CREATE INDEX IF NOT EXISTS ix_game_guests_org_guest_id ON game_guests (org_guest_id)")
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_org_guests_org_phone "
+        "ON org_guests (org_id, phone) WHERE phone IS NOT NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_org_guests_org_name_norm "
+        "ON org_guests (org_id, lower(btrim(name)) text_pattern_ops)"
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_game_guests_game_name_phone "
+        "ON game_guests (game_id, lower(btrim(name)), coalesce(btrim(phone), ''))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_game_guests_game_name_phone")
+    op.execute("DROP INDEX IF EXISTS ix_org_guests_org_name_norm")
+    op.execute("DROP INDEX IF EXISTS uq_org_guests_org_phone")
+    # ix_game_guests_org_guest_id fica: também é declarado no model (index=True)
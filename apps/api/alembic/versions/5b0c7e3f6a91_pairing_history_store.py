@@ -0,0 +1,83 @@
+"""pairing_history_store
+
+Revision ID: 5b0c7e3f6a91
+Revises: c2e95b7a1d08
+Create Date: 2026-10-19 13:48:52.660127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0c7e3f6a91'
+down_revision: Union[str, None] = 'c2e95b7a1d08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # idempotente: banco criado via create_all (app.scripts.create_schema) já tem tudo
+    op.execute("ALTER TABLE games ADD COLUMN IF NOT EXISTS teams_snapshot JSONB")
+    op.execute("ALTER TABLE games ADD COLUMN IF NOT EXISTS teams_recorded_at TIMESTAMP WITH TIME ZONE")
+
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("org_pair_history"):
+        _create_pair_history()
+    if not inspector.has_table("org_captain_history"):
+        _create_captain_history()
+
+
+def _create_pair_history() -> None:
+    op.create_table(
+        "org_pair_history",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("org_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("organizations.id"), nullable=False),
+        sa.Column(
+            "member_a_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("org_members.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "member_b_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("org_members.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("together_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_played_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("org_id", "member_a_id", "member_b_id", name="uq_org_pair_history_org_pair"),
+        sa.CheckConstraint("member_a_id < member_b_id", name="ck_org_pair_history_ordered_pair"),
+    )
+
+
+def _create_captain_history() -> None:
+    op.create_table(
+        "org_captain_history",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("org_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("organizations.id"), nullable=False),
+        sa.Column(
+            "org_member_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("org_members.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("captain_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_captain_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("org_id", "org_member_id", name="uq_org_captain_history_org_member"),
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS org_captain_history")
+    op.execute("DROP TABLE IF EXISTS org_pair_history")
+    op.execute("ALTER TABLE games DROP COLUMN IF EXISTS teams_recorded_at")
+    op.execute("ALTER TABLE games DROP COLUMN IF EXISTS teams_snapshot")
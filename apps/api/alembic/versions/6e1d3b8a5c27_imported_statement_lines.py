@@ -0,0 +1,44 @@
+"""imported_statement_lines
+
+Revision ID: 6e1d3b8a5c27
+Revises: 9a4e6c2f1b75
+Create Date: 2026-10-19 23:41:07.284116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1d3b8a5c27'
+down_revision: Union[str, None] = '9a4e6c2f1b75'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # idempotente: banco criado via create_all (app.scripts.create_schema) já tem a tabela
+    if sa.inspect(op.get_bind()).has_table("imported_statement_lines"):
+        return
+    op.create_table(
+        "imported_statement_lines",
+        sa.Column(
+            "org_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("fitid", sa.String(255), primary_key=True),
+        sa.Column("charge_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("posted_on", sa.Date(), nullable=False),
+        sa.Column("amount", sa.Numeric(12, 2), nullable=False),
+        sa.Column("imported_by_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS imported_statement_lines")
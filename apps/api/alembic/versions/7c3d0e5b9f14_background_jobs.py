@@ -0,0 +1,88 @@
+"""background_jobs
+
+Revision ID: 7c3d0e5b9f14
+Revises: e4b19c7d2a60
+Create Date: 2026-10-19 19:05:27.903118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3d0e5b9f14'
+down_revision: Union[str, None] = 'e4b19c7d2a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+job_status = postgresql.ENUM("PENDING", "RUNNING", "DONE", "FAILED", name="job_status", create_type=False)
+
+
+def upgrade() -> None:
+    # idempotente: banco criado via create_all (app.scripts.create_schema) já tem tipo, tabela e índices
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'job_status') THEN
+                CREATE TYPE job_status AS ENUM ('PENDING', 'RUNNING', 'DONE', 'FAILED');
+            END IF;
+        END $$;
+        """
+    )
+    if not sa.inspect(op.get_bind()).has_table("background_jobs"):
+        _create_table()
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_background_jobs_due ON background_jobs (run_after) WHERE status = 'PENDING'"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_background_jobs_running ON background_jobs (locked_at) "
+        "WHERE status = 'RUNNING'"
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_background_jobs_pending_dedupe ON background_jobs (dedupe_key) "
+        "WHERE status = 'PENDING'"
+    )
+
+
+def _create_table() -> None:
+    op.create_table(
+        "background_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "org_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("kind", sa.String(64), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("dedupe_key", sa.String(255), nullable=True),
+        sa.Column(
+            "status",
+            job_status,
+            nullable=False,
+            server_default="PENDING",
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer(), nullable=False, server_default="5"),
+        sa.Column("run_after", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("locked_by", sa.String(128), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("result", postgresql.JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_background_jobs_pending_dedupe")
+    op.execute("DROP INDEX IF EXISTS ix_background_jobs_running")
+    op.execute("DROP INDEX IF EXISTS ix_background_jobs_due")
+    op.execute("DROP TABLE IF EXISTS background_jobs")
+    op.execute("DROP TYPE IF EXISTS job_status")
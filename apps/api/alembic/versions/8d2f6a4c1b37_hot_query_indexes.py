@@ -0,0 +1,42 @@
+"""hot_query_indexes
+
+Revision ID: 8d2f6a4c1b37
+Revises: 5b0c7e3f6a91
+Create Date: 2026-10-19 16:02:11.384201
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6a4c1b37'
+down_revision: Union[str, None] = '5b0c7e3f6a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # apontados por app.scripts.check_query_plans (Seq Scan / sort em tabela grande)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_game_draft_picks_game_member ON game_draft_picks (game_id, org_member_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_game_draft_picks_game_guest ON game_draft_picks (game_id, game_guest_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_ledger_entries_org_type_occurred "
+        "ON ledger_entries (org_id, type, occurred_at) INCLUDE (amount)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_ledger_entries_org_occurred ON ledger_entries (org_id, occurred_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_org_charges_org_created ON org_charges (org_id, created_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_org_charges_org_created")
+    op.execute("DROP INDEX IF EXISTS ix_ledger_entries_org_occurred")
+    op.execute("DROP INDEX IF EXISTS ix_ledger_entries_org_type_occurred")
+    op.execute("DROP INDEX IF EXISTS ix_game_draft_picks_game_guest")
+    op.execute("DROP INDEX IF EXISTS ix_game_draft_picks_game_member")
@@ -0,0 +1,133 @@
+"""archive_tables
+
+Revision ID: 9a4e6c2f1b75
+Revises: 2f6b8e1a4d93
+Create Date: 2026-10-19 21:02:41.518304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e6c2f1b75'
+down_revision: Union[str, None] = '2f6b8e1a4d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tipos já existem (ledger_entries / org_charges)
+ledger_type = postgresql.ENUM("INCOME", "EXPENSE", name="ledger_type", create_type=False)
+charge_type = postgresql.ENUM("MEMBERSHIP", "PER_SESSION", name="charge_type", create_type=False)
+charge_status = postgresql.ENUM("PENDING", "PAID", "VOID", name="charge_status", create_type=False)
+
+
+def upgrade() -> None:
+    # idempotente: banco criado via create_all (app.scripts.create_schema) já tem tabelas e índices
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("ledger_entries_archive"):
+        _create_ledger_archive()
+    if not inspector.has_table("org_charges_archive"):
+        _create_charges_archive()
+    if not inspector.has_table("org_archive_totals"):
+        _create_archive_totals()
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_ledger_entries_archive_org_occurred "
+        "ON ledger_entries_archive (org_id, occurred_at) INCLUDE (type, amount)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_org_charges_archive_org_created ON org_charges_archive (org_id, created_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_org_charges_archive_org_cycle ON org_charges_archive (org_id, cycle_key)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_org_charges_archive_org_game ON org_charges_archive (org_id, game_id)")
+
+
+def _create_ledger_archive() -> None:
+    op.create_table(
+        "ledger_entries_archive",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("org_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("type", ledger_type, nullable=False),
+        sa.Column("amount", sa.Numeric(12, 2), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("related_member_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("created_by_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def _create_charges_archive() -> None:
+    op.create_table(
+        "org_charges_archive",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("org_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("org_member_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("game_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("cycle_key", sa.String(64), nullable=False),
+        sa.Column("type", charge_type, nullable=False),
+        sa.Column("status", charge_status, nullable=False),
+        sa.Column("amount", sa.Numeric(12, 2), nullable=False),
+        sa.Column("ledger_entry_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("created_by_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("paid_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("voided_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def _create_archive_totals() -> None:
+    op.create_table(
+        "org_archive_totals",
+        sa.Column(
+            "org_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("ledger_income_total", sa.Numeric(14, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("ledger_expense_total", sa.Numeric(14, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("ledger_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("charges_paid_total", sa.Numeric(14, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("charges_paid_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("charges_void_total", sa.Numeric(14, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("charges_void_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("ledger_archived_before", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("charges_archived_before", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    # linhas arquivadas voltam para as tabelas quentes antes de sumir
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("ledger_entries_archive"):
+        op.execute(
+            "INSERT INTO ledger_entries (id, org_id, type, amount, description, occurred_at, related_member_id, "
+            "created_by_id, created_at, updated_at) "
+            "SELECT id, org_id, type, amount, description, occurred_at, related_member_id, created_by_id, "
+            "created_at, updated_at FROM ledger_entries_archive"
+        )
+    if inspector.has_table("org_charges_archive"):
+        op.execute(
+            "INSERT INTO org_charges (id, org_id, org_member_id, game_id, cycle_key, type, status, amount, "
+            "ledger_entry_id, created_by_id, paid_at, voided_at, created_at, updated_at) "
+            "SELECT id, org_id, org_member_id, game_id, cycle_key, type, status, amount, ledger_entry_id, "
+            "created_by_id, paid_at, voided_at, created_at, updated_at FROM org_charges_archive"
+        )
+    op.execute("DROP TABLE IF EXISTS org_archive_totals")
+    op.execute("DROP INDEX IF EXISTS ix_org_charges_archive_org_game")
+    op.execute("DROP INDEX IF EXISTS ix_org_charges_archive_org_cycle")
+    op.execute("DROP INDEX IF EXISTS ix_org_charges_archive_org_created")
+    op.execute("DROP TABLE IF EXISTS org_charges_archive")
+    op.execute("DROP INDEX IF EXISTS ix_ledger_entries_archive_org_occurred")
+    op.execute("DROP TABLE IF EXISTS ledger_entries_archive")
@@ -0,0 +1,37 @@
+"""people_search_trgm_indexes
+
+Revision ID: a71d4e09c3f2
+Revises: 3f8a1c2d9b4e
+Create Date: 2026-10-19 10:03:17.502981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a71d4e09c3f2'
+down_revision: Union[str, None] = '3f8a1c2d9b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_org_members_nickname_trgm "
+        "ON org_members USING gin (nickname gin_trgm_ops)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_full_name_trgm ON users USING gin (full_name gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (email gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_org_guests_name_trgm ON org_guests USING gin (name gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_org_guests_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_users_email_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_users_full_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_org_members_nickname_trgm")
+    # pg_trgm fica instalada (pode estar em uso por outros objetos)
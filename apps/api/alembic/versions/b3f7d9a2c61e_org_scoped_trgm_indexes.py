@@ -0,0 +1,46 @@
+"""org_scoped_trgm_indexes
+
+Revision ID: b3f7d9a2c61e
+Revises: 6e1d3b8a5c27
+Create Date: 2026-10-19 23:58:12.640391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f7d9a2c61e'
+down_revision: Union[str, None] = '6e1d3b8a5c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GIN global de trigramas devolve candidatos de todas as orgs e o filtro por org vem
+    # depois (recheck no heap). Com btree_gin o org_id entra na mesma GIN e o bitmap já
+    # sai restrito à org. users fica com os índices globais: não tem org_id.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_org_members_org_nickname_trgm "
+        "ON org_members USING gin (org_id, nickname gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_org_guests_org_name_trgm "
+        "ON org_guests USING gin (org_id, name gin_trgm_ops)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_org_members_nickname_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_org_guests_name_trgm")
+
+
+def downgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_org_members_nickname_trgm "
+        "ON org_members USING gin (nickname gin_trgm_ops)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_org_guests_name_trgm ON org_guests USING gin (name gin_trgm_ops)")
+    op.execute("DROP INDEX IF EXISTS ix_org_guests_org_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_org_members_org_nickname_trgm")
+    # btree_gin fica instalada (pode estar em uso por outros objetos)
@@ -0,0 +1,41 @@
+"""org_member_skill_rating
+
+Revision ID: c2e95b7a1d08
+Revises: a71d4e09c3f2
+Create Date: 2026-10-19 11:26:05.114392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e95b7a1d08'
+down_revision: Union[str, None] = 'a71d4e09c3f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE org_members ADD COLUMN IF NOT EXISTS skill_rating INTEGER")
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'ck_org_members_skill_rating_range'
+            ) THEN
+                ALTER TABLE org_members
+                    ADD CONSTRAINT ck_org_members_skill_rating_range
+                    CHECK (skill_rating IS NULL OR (skill_rating BETWEEN 1 AND 10));
+            END IF;
+        END $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE org_members DROP CONSTRAINT IF EXISTS ck_org_members_skill_rating_range")
+    op.execute("ALTER TABLE org_members DROP COLUMN IF EXISTS skill_rating")
@@ -0,0 +1,48 @@
+"""idempotency_keys
+
+Revision ID: e4b19c7d2a60
+Revises: 8d2f6a4c1b37
+Create Date: 2026-10-19 18:12:40.517903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b19c7d2a60'
+down_revision: Union[str, None] = '8d2f6a4c1b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # idempotente: banco criado via create_all (app.scripts.create_schema) já tem a tabela
+    if sa.inspect(op.get_bind()).has_table("idempotency_keys"):
+        op.execute("CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at)")
+        return
+    op.create_table(
+        "idempotency_keys",
+        sa.Column(
+            "org_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("organizations.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("key", sa.String(255), primary_key=True),
+        sa.Column("request_hash", sa.LargeBinary(32), nullable=False),
+        sa.Column("status_code", sa.SmallInteger(), nullable=True),
+        sa.Column("response_body", sa.LargeBinary(), nullable=True),
+        sa.Column("response_hash", sa.LargeBinary(32), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_idempotency_keys_expires_at")
+    op.execute("DROP TABLE IF EXISTS idempotency_keys")
@@ -12,6 +12,31 @@ class Settings(BaseSettings):
     COOKIE_SECURE: bool = False
     COOKIE_SAMESITE: str = "lax"  # "lax" (dev) or "none"/"strict" (prod)
     COOKIE_DOMAIN: Optional[str] = None  # optional, defaults to host
+    # testes/CI: endpoints acima do @query_budget respondem 500
+    QUERY_BUDGET_ENFORCE: bool = False
+    # top-N de statements (app.db.slow_queries) despejado no log a cada N segundos; 0 desliga
+    SLOW_QUERY_LOG_INTERVAL_SECONDS: int = 300
+    SLOW_QUERY_LOG_TOP_N: int = 20
+    # profiler por amostragem (app.core.profiler); ajustável em runtime via /internal/profiler
+    PROFILER_ENABLED: bool = False
+    PROFILER_SAMPLE_RATE: float = 0.0
+    # cache do breakdown financeiro (app.services.finance_cache): limite de atraso para escritas de outro processo
+    FINANCE_CACHE_TTL_SECONDS: int = 60
+    # Idempotency-Key (app.core.idempotency): validade da resposta guardada e da reserva em andamento
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_LEASE_SECONDS: int = 60
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = 3600
+    # fila de jobs (app.services.jobs): o consumidor é app.scripts.job_worker. Worker embutido
+    # na API é opt-in para dev com um processo só (senão cada worker/réplica abre suas threads)
+    JOB_WORKER_EMBEDDED: bool = False
+    JOB_WORKER_CONCURRENCY: int = 2
+    # scheduler de cobrança (app.services.billing_scheduler): gera cada org na virada do próprio ciclo.
+    # Desligado por padrão: com vários workers/réplicas, ligar em um processo só
+    BILLING_SCHEDULER_ENABLED: bool = False
+    BILLING_SCHEDULER_SPREAD_SECONDS: int = 900
+    BILLING_SCHEDULER_REFRESH_SECONDS: int = 300
+    # partições mensais de ledger_entries (app.db.partitions): cria os meses futuros; 0 desliga
+    LEDGER_PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = 24 * 3600
     CORS_ORIGINS: list[str] = [
         "http://localhost:3000",
         "http://127.0.0.1:3000",
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from jose import JWTError, jwt
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger("app.core.idempotency")
+
+# Idempotency-Key para endpoints de escrita marcados com @idempotent.
+#
+# Cliente manda o header num POST/PUT/PATCH; o middleware:
+#   1. reserva (org_id, key) com INSERT ... ON CONFLICT (lease curto, status NULL);
+#   2. se já existe resposta guardada do MESMO request (hash de método, path,
+#      usuário e corpo), devolve ela sem rodar o handler;
+#   3. se a chave está em andamento (retry concorrente), 409 + Retry-After;
+#   4. se a chave veio com outro request, 422;
+#   5. senão roda o handler e grava status + corpo + sha256 do corpo, com TTL.
+# 5xx, 403 e 429 não são guardados (a reserva é apagada): o retry roda de novo.
+# Reserva órfã (processo morreu no meio) vence junto com o lease e pode ser retomada.
+# org_id que não existe (FK de idempotency_keys): segue sem idempotência e o
+# handler responde o 403/404 normal.
+
+HEADER = b"idempotency-key"
+_METHODS = {"POST", "PUT", "PATCH"}
+_MAX_KEY_LEN = 255
+_REPLAY_EXCLUDED = {403, 429}
+_FOREIGN_KEY_VIOLATION = "23503"
+# _claim: org inexistente, não dá para reservar
+_UNKNOWN_ORG = IdempotencyKey()
+
+
+def idempotent(fn):
+    """Marca o endpoint para o IdempotencyMiddleware (usar abaixo do decorator do router)."""
+    fn.__idempotent__ = True
+    return fn
+
+
+def _actor(scope) -> str | None:
+    # mesmo token do deps.get_current_user (bearer ou cookie); sub = email
+    token = None
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            raw = value.decode("latin-1")
+            if raw.lower().startswith("bearer "):
+                token = raw.split(" ", 1)[1].strip()
+        elif name == b"cookie" and token is None:
+            for part in value.decode("latin-1").split(";"):
+                k, _, v = part.strip().partition("=")
+                if k == "access_token" and v:
+                    token = v.strip()
+    if not token:
+        return None
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+def _request_hash(method: str, path: str, actor: str, body: bytes) -> bytes:
+    h = hashlib.sha256()
+    for part in (method.encode(), path.encode(), actor.encode()):
+        h.update(part)
+        h.update(b"\0")
+    h.update(body)
+    return h.digest()
+
+
+def _claim(org_id: UUID, key: str, request_hash: bytes) -> IdempotencyKey | None:
+    """None = reservado para este request; _UNKNOWN_ORG = org não existe; senão a linha existente."""
+    now = datetime.now(timezone.utc)
+    lease = now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+    stmt = pg_insert(IdempotencyKey).values(org_id=org_id, key=key, request_hash=request_hash, expires_at=lease)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.org_id, IdempotencyKey.key],
+        set_={
+            "request_hash": stmt.excluded.request_hash,
+            "status_code": None,
+            "response_body": None,
+            "response_hash": None,
+            "created_at": func.now(),
+            "expires_at": stmt.excluded.expires_at,
+        },
+        # só retoma chave vencida (TTL da resposta ou lease de reserva órfã)
+        where=IdempotencyKey.expires_at < func.now(),
+    ).returning(IdempotencyKey.key)
+
+    db = SessionLocal()
+    try:
+        try:
+            claimed = db.execute(stmt).first() is not None
+        except IntegrityError as exc:
+            db.rollback()
+            if getattr(exc.orig, "pgcode", None) == _FOREIGN_KEY_VIOLATION:
+                return _UNKNOWN_ORG
+            raise
+        existing = None
+        if not claimed:
+            existing = db.execute(
+                select(IdempotencyKey).where(IdempotencyKey.org_id == org_id, IdempotencyKey.key == key)
+            ).scalar_one_or_none()
+            if existing is not None:
+                db.expunge(existing)
+        db.commit()
+        if not claimed and existing is None:
+            # apagada entre o INSERT e o SELECT (o outro request falhou): trata como em andamento
+            return IdempotencyKey(org_id=org_id, key=key, request_hash=request_hash, status_code=None)
+        return existing
+    finally:
+        db.close()
+
+
+def _store(org_id: UUID, key: str, status_code: int, body: bytes) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.org_id == org_id, IdempotencyKey.key == key)
+            .values(
+                status_code=status_code,
+                response_body=body,
+                response_hash=hashlib.sha256(body).digest(),
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _release(org_id: UUID, key: str) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.org_id == org_id, IdempotencyKey.key == key))
+        db.commit()
+    finally:
+        db.close()
+
+
+_PURGE_SQL = text(
+    "DELETE FROM idempotency_keys WHERE ctid IN "
+    "(SELECT ctid FROM idempotency_keys WHERE expires_at < now() LIMIT :limit)"
+)
+
+
+def purge_expired(batch_size: int = 5000) -> int:
+    """Apaga chaves vencidas em lotes curtos (cada lote é uma transação)."""
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            deleted = db.execute(_PURGE_SQL, {"limit": batch_size}).rowcount
+            db.commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+    finally:
+        db.close()
+
+
+async def purge_periodically(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            deleted = await run_in_threadpool(purge_expired)
+            if deleted:
+                logger.info(json.dumps({"idempotency_keys_purged": deleted}))
+        except Exception:
+            logger.exception("idempotency key purge failed")
+
+
+def _json_response(status: int, detail: str, extra_headers: list | None = None) -> tuple[dict, dict]:
+    body = json.dumps({"detail": detail}).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    return (
+        {"type": "http.response.start", "status": status, "headers": headers + (extra_headers or [])},
+        {"type": "http.response.body", "body": body},
+    )
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    def _route(self, scope):
+        app = scope.get("app")
+        for route in getattr(getattr(app, "router", None), "routes", ()):
+            match, child = route.matches(scope)
+            if match == Match.FULL:
+                return route, child
+        return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in _METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        key = None
+        for name, value in scope.get("headers", ()):
+            if name == HEADER:
+                key = value.decode("latin-1").strip()
+                break
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        route, child = self._route(scope)
+        org_id = (child or {}).get("path_params", {}).get("org_id")
+        actor = _actor(scope)
+        if not getattr(getattr(route, "endpoint", None), "__idempotent__", False) or not org_id or not actor:
+            # endpoint não marcado / sem org / sem login: segue normal (handler responde 401/403)
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > _MAX_KEY_LEN:
+            for message in _json_response(400, f"Idempotency-Key must have 1..{_MAX_KEY_LEN} characters"):
+                await send(message)
+            return
+        try:
+            org_id = UUID(str(org_id))
+        except ValueError:
+            await self.app(scope, receive, send)
+            return
+
+        # corpo inteiro em memória (endpoints marcados recebem JSON pequeno)
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        request_hash = _request_hash(scope["method"], scope["path"], actor, body)
+
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        existing = await run_in_threadpool(_claim, org_id, key, request_hash)
+        if existing is _UNKNOWN_ORG:
+            await self.app(scope, replay_receive, send)
+            return
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                messages = _json_response(422, "Idempotency-Key was already used with a different request")
+            elif existing.status_code is None:
+                messages = _json_response(
+                    409, "A request with this Idempotency-Key is in progress", [(b"retry-after", b"1")]
+                )
+            else:
+                stored = existing.response_body or b""
+                messages = (
+                    {
+                        "type": "http.response.start",
+                        "status": existing.status_code,
+                        "headers": [
+                            (b"content-type", b"application/json"),
+                            (b"content-length", str(len(stored)).encode()),
+                            (b"idempotent-replayed", b"true"),
+                        ],
+                    },
+                    {"type": "http.response.body", "body": stored},
+                )
+            for message in messages:
+                await send(message)
+            return
+
+        state = {"status": None, "body": []}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+        except BaseException:
+            await run_in_threadpool(_release, org_id, key)
+            raise
+
+        status = state["status"]
+        if status is None or status >= 500 or status in _REPLAY_EXCLUDED:
+            await run_in_threadpool(_release, org_id, key)
+        else:
+            await run_in_threadpool(_store, org_id, key, status, b"".join(state["body"]))
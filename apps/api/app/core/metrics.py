@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Métricas em formato texto do Prometheus, sem dependência externa.
+#
+# Hot path sem lock: cada thread incrementa o seu próprio "shard" (lista de
+# floats) e o scrape soma os shards. Lock só na criação de shard/série, que
+# acontece no boot (séries pré-registradas por rota) ou na 1ª vez de cada thread.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Sharded:
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: list[list[float]] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> list[float]:
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = [0.0] * self._size
+            self._local.values = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def add(self, index: int, amount: float) -> None:
+        self._shard()[index] += amount
+
+    def snapshot(self) -> list[float]:
+        with self._lock:
+            shards = list(self._shards)
+        return [sum(col) for col in zip(*shards)] if shards else [0.0] * self._size
+
+
+class _CounterChild:
+    def __init__(self):
+        self._v = _Sharded(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._v.add(0, amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._v.add(0, -amount)
+
+    def value(self) -> float:
+        return self._v.snapshot()[0]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]):
+        self._buckets = buckets
+        # [bucket_0 .. bucket_n-1, +Inf, sum]
+        self._v = _Sharded(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        shard = self._v._shard()
+        shard[bisect_left(self._buckets, value)] += 1
+        shard[-1] += value
+
+    def values(self) -> tuple[list[float], float, float]:
+        snap = self._v.snapshot()
+        counts = snap[:-1]
+        cumulative = []
+        running = 0.0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, snap[-1], running
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    if len(values) != len(self.labelnames):
+                        raise ValueError(f"{self.name}: expected labels {self.labelnames}")
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _label_str(self, values: tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{self._label_str(values)} {_fmt(child.value())}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class CallbackGauge(_Metric):
+    """Gauge lido no momento do scrape (ex.: estado do pool de conexões)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str, callback: Callable[[], float]):
+        super().__init__(name, doc)
+        self._callback = callback
+
+    def render(self) -> Iterable[str]:
+        try:
+            value = float(self._callback())
+        except Exception:
+            return
+        yield from super().render()
+        yield f"{self.name} {_fmt(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        for values, child in list(self._children.items()):
+            cumulative, total, count = child.values()
+            for le, c in zip(self.buckets, cumulative):
+                le_label = 'le="%s"' % _fmt(le)
+                yield f"{self.name}_bucket{self._label_str(values, le_label)} {_fmt(c)}"
+            inf_label = 'le="+Inf"'
+            yield f"{self.name}_bucket{self._label_str(values, inf_label)} {_fmt(count)}"
+            yield f"{self.name}_sum{self._label_str(values)} {_fmt(total)}"
+            yield f"{self.name}_count{self._label_str(values)} {_fmt(count)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if not metric.labelnames and not isinstance(metric, CallbackGauge):
+            metric.labels()  # série sem labels aparece zerada desde o boot
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(v: float) -> str:
+    if v == int(v):
+        return str(int(v))
+    return repr(v)
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter("http_requests_total", "HTTP requests by route and status class", ("method", "route", "status"))
+)
+HTTP_LATENCY = REGISTRY.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+)
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge("http_requests_in_flight", "HTTP requests currently being served"))
+
+BILLING_RUN_DURATION = REGISTRY.register(
+    Histogram(
+        "billing_run_duration_seconds",
+        "Duration of /internal/billing/run",
+        buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+    )
+)
+BILLING_ORG_DURATION = REGISTRY.register(
+    Histogram("billing_org_generate_duration_seconds", "Charge generation time per org during billing runs")
+)
+BILLING_CHARGES_CREATED = REGISTRY.register(
+    Counter("billing_charges_created_total", "Charges created by billing runs")
+)
+
+_STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+_UNMATCHED = "__unmatched__"
+
+
+def register_db_pool(engine) -> None:
+    pool = engine.pool
+    for name, doc, attr in (
+        ("db_pool_size", "Configured connection pool size", "size"),
+        ("db_pool_checked_out", "Connections currently checked out", "checkedout"),
+        ("db_pool_checked_in", "Idle connections in the pool", "checkedin"),
+        ("db_pool_overflow", "Connections above pool_size", "overflow"),
+    ):
+        if hasattr(pool, attr):
+            REGISTRY.register(CallbackGauge(name, doc, getattr(pool, attr)))
+
+
+def register_routes(routes) -> None:
+    """Pré-registra as séries por rota (sem lock/alocação no hot path)."""
+    paths = [(m, r.path) for r in routes for m in (getattr(r, "methods", None) or ())]
+    paths.append(("*", _UNMATCHED))
+    for method, path in paths:
+        HTTP_LATENCY.labels(method, path)
+        for sc in _STATUS_CLASSES:
+            HTTP_REQUESTS.labels(method, path, sc)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            if route is not None:
+                method, path = scope.get("method", "GET"), route.path
+            else:
+                method, path = "*", _UNMATCHED
+            HTTP_LATENCY.labels(method, path).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, path, f"{status['code'] // 100}xx").inc()
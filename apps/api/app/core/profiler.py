@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+
+# Profiler por amostragem, opt-in, para produção.
+#
+# Um request é perfilado se cair na fração sample_rate ou vier com o header
+# X-Profile igual ao INTERNAL_KEY. Enquanto houver request perfilado em curso,
+# uma thread lê sys._current_frames() a cada interval_ms e atribui a pilha à rota:
+#   - thread do event loop: se a pilha contém o frame do middleware daquele request
+#     (serialização/validação do response rodam ali);
+#   - threads do threadpool: se a pilha contém o código do endpoint da rota.
+# Saída em "collapsed stacks" (flamegraph.pl / speedscope) por rota.
+#
+# Overhead limitado: a thread só acorda com sessão ativa, no máximo max_concurrent
+# requests perfilados ao mesmo tempo, profundidade e nº de pilhas distintas por rota
+# limitados. Config é por processo (cada worker do uvicorn tem a sua).
+
+_TRUNCATED = "[truncated]"
+
+
+@dataclass
+class ProfilerConfig:
+    enabled: bool = False
+    sample_rate: float = 0.0
+    interval_ms: float = 10.0
+    max_concurrent: int = 4
+    max_depth: int = 64
+    max_stacks_per_route: int = 5000
+
+
+class _Session:
+    __slots__ = ("scope", "frame")
+
+    def __init__(self, scope: dict, frame):
+        self.scope = scope
+        self.frame = frame
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "-")
+
+    @property
+    def endpoint_code(self):
+        endpoint = self.scope.get("endpoint")
+        return getattr(endpoint, "__code__", None)
+
+
+def _label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, config: ProfilerConfig | None = None):
+        self.config = config or ProfilerConfig()
+        self._sessions: set[_Session] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stacks: dict[str, Counter] = {}
+        self._samples: Counter = Counter()
+        self._requests: Counter = Counter()
+
+    # --- ciclo de vida de um request ---
+
+    def should_profile(self, profile_header: str | None, internal_key: str | None) -> bool:
+        cfg = self.config
+        if not cfg.enabled:
+            return False
+        if profile_header and internal_key and profile_header == internal_key:
+            return True
+        return cfg.sample_rate > 0 and random.random() < cfg.sample_rate
+
+    def begin(self, scope: dict, frame) -> _Session | None:
+        with self._lock:
+            if len(self._sessions) >= self.config.max_concurrent:
+                return None
+            session = _Session(scope, frame)
+            self._sessions.add(session)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return session
+
+    def end(self, session: _Session | None) -> None:
+        if session is None:
+            return
+        with self._lock:
+            self._sessions.discard(session)
+            self._requests[session.route] += 1
+            if not self._sessions:
+                self._wakeup.clear()
+
+    # --- amostragem ---
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.config.interval_ms / 1000.0)
+            with self._lock:
+                sessions = list(self._sessions)
+            if sessions:
+                self._sample(sessions, me)
+
+    def _sample(self, sessions: list[_Session], me: int) -> None:
+        by_frame = {id(s.frame): s for s in sessions}
+        by_code = {}
+        for s in sessions:
+            code = s.endpoint_code
+            if code is not None:
+                by_code[code] = s
+        max_depth = self.config.max_depth
+
+        for ident, top in sys._current_frames().items():
+            if ident == me:
+                continue
+            chain = []
+            owner = None
+            frame = top
+            while frame is not None:
+                if id(frame) in by_frame:
+                    owner = by_frame[id(frame)]  # pilha do event loop: corta acima do middleware
+                    break
+                chain.append(frame.f_code)
+                if frame.f_code in by_code:
+                    owner = by_code[frame.f_code]  # thread do threadpool: começa no endpoint
+                    break
+                frame = frame.f_back
+            if owner is None or not chain:
+                continue
+            # chain vai da folha para a raiz: corte preserva os frames onde o tempo é gasto
+            labels = [_label(c) for c in reversed(chain[:max_depth])]
+            if len(chain) > max_depth:
+                labels.insert(0, _TRUNCATED)
+            self._add(owner.route, ";".join(labels))
+
+    def _add(self, route: str, stack: str) -> None:
+        with self._lock:
+            counts = self._stacks.setdefault(route, Counter())
+            if stack not in counts and len(counts) >= self.config.max_stacks_per_route:
+                stack = _TRUNCATED
+            counts[stack] += 1
+            self._samples[route] += 1
+
+    # --- leitura/controle ---
+
+    def update(self, **changes) -> ProfilerConfig:
+        for key, value in changes.items():
+            if value is not None and hasattr(self.config, key):
+                setattr(self.config, key, value)
+        return self.config
+
+    def status(self) -> dict:
+        with self._lock:
+            routes = {
+                route: {"requests": self._requests[route], "samples": self._samples[route]}
+                for route in set(self._requests) | set(self._samples)
+            }
+            active = len(self._sessions)
+        return {"config": asdict(self.config), "active_sessions": active, "routes": routes}
+
+    def collapsed(self, route: str | None = None) -> str:
+        """Uma linha por pilha: "frame;frame;...;frame N" (prefixada pela rota se route=None)."""
+        with self._lock:
+            items = [(r, dict(c)) for r, c in self._stacks.items() if route is None or r == route]
+        lines = []
+        for r, counts in items:
+            for stack, n in sorted(counts.items(), key=lambda kv: -kv[1]):
+                lines.append(f"{stack} {n}" if route is not None else f"{r};{stack} {n}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self._samples.clear()
+            self._requests.clear()
+
+
+PROFILER = SamplingProfiler()
+
+
+class ProfilerMiddleware:
+    def __init__(self, app, internal_key: str | None = None):
+        self.app = app
+        self.internal_key = internal_key
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILER.config.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        header = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile":
+                header = value.decode("latin-1")
+                break
+        if not PROFILER.should_profile(header, self.internal_key):
+            await self.app(scope, receive, send)
+            return
+
+        session = PROFILER.begin(scope, sys._getframe())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            PROFILER.end(session)
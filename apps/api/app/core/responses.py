@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+# Response padrão da app (orjson).
+#
+# Endpoints com response_model continuam validando/serializando via pydantic e só
+# o encode final fica mais barato. Os endpoints de payload grande montam dicts
+# de tipos primitivos a partir das linhas e retornam FastJSONResponse direto:
+# sem validação pydantic nem jsonable_encoder no caminho (o response_model fica
+# só para o OpenAPI). UUID/datetime/Enum o orjson serializa nativamente;
+# datetimes UTC saem com "Z", igual ao pydantic.
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
@@ -11,3 +11,8 @@ from app.models.ledger import LedgerEntry
 from app.models.plan import Plan, OrgSubscription
 from app.models.org_billing_settings import OrgBillingSettings
 from app.models.org_charge import OrgCharge
+from app.models.pairing_history import OrgPairHistory, OrgCaptainHistory
+from app.models.idempotency_key import IdempotencyKey
+from app.models.background_job import BackgroundJob
+from app.models.archive import LedgerEntryArchive, OrgChargeArchive, OrgArchiveTotals
+from app.models.statement_import import ImportedStatementLine
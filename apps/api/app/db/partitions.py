@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger("app.db.partitions")
+
+# Particionamento declarativo de ledger_entries e org_charges.
+#
+# ledger_entries: RANGE (occurred_at) por mês, ledger_entries_pYYYY_MM, mais
+#   ledger_entries_hist (MINVALUE até o primeiro mês) para lançamento retroativo.
+#   Sem partição DEFAULT: assim DETACH ... CONCURRENTLY funciona e criar mês novo
+#   não varre nada. Meses futuros são criados com folga (MONTHS_AHEAD) por uma
+#   task diária; um occurred_at além da folga cria o mês na hora.
+# org_charges: HASH (org_id), CHARGE_PARTITIONS partições fixas. Toda query de
+#   cobrança filtra org_id, e a unique (org_id, member, cycle_key, type) continua
+#   valendo (a chave de partição está nela), o que por data não daria.
+#
+# PK física vira (id, occurred_at) / (id, org_id), exigência do Postgres; o
+# mapper continua identificando por id.
+
+LEDGER_TABLE = "ledger_entries"
+CHARGES_TABLE = "org_charges"
+MONTHS_AHEAD = 12
+MAX_MONTHS_AHEAD = 120  # teto para occurred_at futuro (evita criar milhares de partições)
+CHARGE_PARTITIONS = 16
+
+_horizon_lock = threading.Lock()
+_ledger_horizon: date | None = None  # primeiro mês SEM partição (cache por processo)
+
+
+def _month(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def ledger_partition_name(month: date) -> str:
+    return f"{LEDGER_TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def _bound(d: date) -> str:
+    return f"{d.isoformat()} 00:00:00+00"
+
+
+def existing_partitions(conn: Connection, parent: str) -> list[str]:
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent ORDER BY c.relname"
+        ),
+        {"parent": parent},
+    ).scalars()
+    return list(rows)
+
+
+def ensure_ledger_partitions(
+    conn: Connection, start: date | None = None, until: date | None = None, months_ahead: int = MONTHS_AHEAD
+) -> list[str]:
+    """Cria (IF NOT EXISTS) os meses de start até until/hoje+months_ahead. Devolve os criados."""
+    global _ledger_horizon
+    today = datetime.now(timezone.utc).date()
+    first = _month(start or today)
+    last = _month(until) if until else _add_months(_month(today), months_ahead)
+    existing = set(existing_partitions(conn, LEDGER_TABLE))
+
+    if f"{LEDGER_TABLE}_hist" not in existing:
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {LEDGER_TABLE}_hist PARTITION OF {LEDGER_TABLE} "
+                f"FOR VALUES FROM (MINVALUE) TO ('{_bound(first)}')"
+            )
+        )
+        existing.add(f"{LEDGER_TABLE}_hist")
+
+    created = []
+    month = first
+    while month <= last:
+        name = ledger_partition_name(month)
+        if name not in existing:
+            conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {LEDGER_TABLE} "
+                    f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(_add_months(month, 1))}')"
+                )
+            )
+            created.append(name)
+        month = _add_months(month, 1)
+
+    with _horizon_lock:
+        horizon = _add_months(last, 1)
+        if _ledger_horizon is None or horizon > _ledger_horizon:
+            _ledger_horizon = horizon
+    return created
+
+
+def ensure_ledger_partition_for(engine: Engine, occurred_at: datetime) -> None:
+    """occurred_at além da folga (data futura distante): cria o mês antes do INSERT.
+
+    Transação própria e curta: o lock de DDL no parent não fica preso ao request.
+    """
+    month = _month(occurred_at.astimezone(timezone.utc).date() if occurred_at.tzinfo else occurred_at.date())
+    with _horizon_lock:
+        horizon = _ledger_horizon
+    if horizon is None:
+        # manutenção ainda não rodou neste processo: a folga garantida é hoje + MONTHS_AHEAD
+        horizon = _add_months(_month(datetime.now(timezone.utc).date()), MONTHS_AHEAD)
+    if month < horizon:
+        return
+    today = _month(datetime.now(timezone.utc).date())
+    if month > _add_months(today, MAX_MONTHS_AHEAD):
+        raise ValueError(f"occurred_at more than {MAX_MONTHS_AHEAD} months ahead")
+    with engine.begin() as conn:
+        # do mês atual até o pedido: não deixa buraco entre a folga e o mês novo
+        ensure_ledger_partitions(conn, start=today, until=month)
+
+
+def ensure_charge_partitions(conn: Connection, partitions: int = CHARGE_PARTITIONS) -> list[str]:
+    existing = set(existing_partitions(conn, CHARGES_TABLE))
+    created = []
+    for i in range(partitions):
+        name = f"{CHARGES_TABLE}_h{i:02d}"
+        if name not in existing:
+            conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {CHARGES_TABLE} "
+                    f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+                )
+            )
+            created.append(name)
+    return created
+
+
+def detach_ledger_partitions(engine: Engine, before: date, drop: bool = False) -> list[str]:
+    """DETACH ... CONCURRENTLY dos meses inteiros antes de `before` (fora de transação).
+
+    Não trava as partições quentes: o parent só pega SHARE UPDATE EXCLUSIVE.
+    A tabela desanexada fica como tabela comum (dump/arquivo) a menos que drop=True.
+    """
+    cutoff = _month(before)
+    done = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name in existing_partitions(conn, LEDGER_TABLE):
+            suffix = name.removeprefix(f"{LEDGER_TABLE}_p")
+            if suffix == name:
+                continue  # _hist fica: é o destino dos retroativos
+            y, m = suffix.split("_")
+            if _add_months(date(int(y), int(m), 1), 1) > cutoff:
+                continue
+            conn.execute(text(f"ALTER TABLE {LEDGER_TABLE} DETACH PARTITION {name} CONCURRENTLY"))
+            if drop:
+                conn.execute(text(f"DROP TABLE {name}"))
+            done.append(name)
+    return done
+
+
+def maintain_partitions(engine: Engine) -> list[str]:
+    with engine.begin() as conn:
+        return ensure_ledger_partitions(conn)
+
+
+async def maintain_periodically(engine: Engine, interval_seconds: float) -> None:
+    """Task do startup: garante os meses futuros agora e a cada intervalo."""
+    while True:
+        try:
+            created = await asyncio.to_thread(maintain_partitions, engine)
+            if created:
+                logger.info(json.dumps({"ledger_partitions_created": created}))
+        except Exception:
+            logger.exception("ledger partition maintenance failed")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.db.slow_queries import STATEMENTS
+
+logger = logging.getLogger("app.db.query_stats")
+
+# Contagem/tempo de SQL por request.
+#
+# Os hooks before/after_cursor_execute do engine acumulam no objeto do request
+# corrente (ContextVar). Endpoints sync rodam no threadpool com o contexto
+# copiado, então enxergam o mesmo objeto criado pelo middleware.
+# Todo statement (request ou não) também alimenta o agregado por fingerprint
+# de app.db.slow_queries.
+
+
+@dataclass
+class RequestQueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_statement: str | None = None
+    # scope ASGI do request; scope["route"] só existe depois do roteamento
+    scope: dict | None = field(default=None, repr=False)
+
+    @property
+    def route(self) -> str | None:
+        route = self.scope.get("route") if self.scope else None
+        return getattr(route, "path", None)
+
+
+_current: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+_STATEMENT_PREVIEW = 300
+
+
+def current_query_stats() -> RequestQueryStats | None:
+    return _current.get()
+
+
+def query_budget(max_queries: int):
+    """Declara o máximo de statements SQL esperado para um endpoint.
+
+    Usar abaixo do decorator do router:
+
+        @router.get(...)
+        @query_budget(12)
+        def handler(...): ...
+
+    O número vem de uma execução medida (header Server-Timing / campo db_queries
+    do log com dados realistas, vários jogadores/linhas), nunca de estimativa;
+    registrar no comentário do endpoint como foi medido.
+    """
+
+    def decorator(fn):
+        fn.__query_budget__ = max_queries
+        return fn
+
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000.0
+    stats = _current.get()
+    STATEMENTS.record(statement, elapsed_ms, stats.route if stats is not None else None)
+    if stats is None:
+        return
+    stats.count += 1
+    stats.total_ms += elapsed_ms
+    if elapsed_ms > stats.slowest_ms:
+        stats.slowest_ms = elapsed_ms
+        stats.slowest_statement = statement[:_STATEMENT_PREVIEW]
+
+
+def install_query_stats(engine: Engine) -> None:
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _handle_error(exception_context):
+    # statement que falhou não passa pelo after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None:
+        starts = conn.info.get("query_start")
+        if starts:
+            starts.pop()
+
+
+class QueryStatsMiddleware:
+    """ASGI: Server-Timing + log estruturado com as stats de SQL de cada request.
+
+    Com enforce_budget=True (testes/CI), um endpoint que passar do @query_budget
+    responde 500 em vez do payload normal.
+    """
+
+    def __init__(self, app, enforce_budget: bool = False):
+        self.app = app
+        self.enforce_budget = enforce_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope=scope)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        state = {"status": None, "over_budget": None}
+
+        def budget_exceeded() -> int | None:
+            endpoint = scope.get("endpoint")
+            budget = getattr(endpoint, "__query_budget__", None)
+            if budget is not None and stats.count > budget:
+                return budget
+            return None
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["over_budget"] = budget_exceeded()
+
+                if state["over_budget"] is not None and self.enforce_budget:
+                    state["status"] = 500
+                    body = json.dumps(
+                        {
+                            "detail": "Query budget exceeded",
+                            "queries": stats.count,
+                            "budget": state["over_budget"],
+                        }
+                    ).encode()
+                    await send(
+                        {
+                            "type": "http.response.start",
+                            "status": 500,
+                            "headers": [
+                                (b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode()),
+                            ],
+                        }
+                    )
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (
+                        b"server-timing",
+                        f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", '
+                        f"db-slowest;dur={stats.slowest_ms:.1f}".encode(),
+                    )
+                )
+                message = {**message, "headers": headers}
+            elif state["over_budget"] is not None and self.enforce_budget:
+                # corpo original descartado (já respondemos 500)
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            record = {
+                "method": scope.get("method"),
+                "path": getattr(route, "path", scope.get("path")),
+                "status": state["status"],
+                "duration_ms": round((time.perf_counter() - started) * 1000.0, 1),
+                "db_queries": stats.count,
+                "db_ms": round(stats.total_ms, 1),
+                "db_slowest_ms": round(stats.slowest_ms, 1),
+                "db_slowest_statement": stats.slowest_statement,
+            }
+            if state["over_budget"] is not None:
+                record["db_query_budget"] = state["over_budget"]
+                logger.warning(json.dumps(record, default=str))
+            else:
+                logger.info(json.dumps(record, default=str))
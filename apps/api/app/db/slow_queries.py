@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+logger = logging.getLogger("app.db.slow_queries")
+
+# Visão estilo pg_stat_statements de dentro da app.
+#
+# Cada statement executado é normalizado (literais/placeholders -> ?, listas IN
+# colapsadas) e agregado por fingerprint: count/total/max e as rotas que o
+# emitiram. O mapa é limitado: passando de 2x max_entries, mantém só o top
+# max_entries por tempo total.
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\([^)]+\)s|%s|\$\d+|(?<!:):\w+")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,)+\s*\?\s*\)", re.IGNORECASE)
+_VALUES = re.compile(r"\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+_MAX_ROUTES = 10
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    s = _STRING.sub("?", statement)
+    s = _PARAM.sub("?", s)
+    s = _NUMBER.sub("?", s)
+    s = _SPACES.sub(" ", s).strip()
+    s = _IN_LIST.sub("IN (...)", s)
+    s = _VALUES.sub(r"VALUES \1, ...", s)
+    return s
+
+
+@dataclass
+class StatementStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    routes: dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self, fp: str) -> dict:
+        return {
+            "fingerprint": fp,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 2),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "routes": dict(sorted(self.routes.items(), key=lambda kv: -kv[1])),
+        }
+
+
+class StatementRecorder:
+    def __init__(self, max_entries: int = 500):
+        self.max_entries = max_entries
+        self._stats: dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed_ms: float, route: str | None) -> None:
+        fp = fingerprint(statement)
+        route = route or "-"
+        with self._lock:
+            st = self._stats.get(fp)
+            if st is None:
+                st = self._stats[fp] = StatementStats()
+                if len(self._stats) > self.max_entries * 2:
+                    self._prune()
+            st.count += 1
+            st.total_ms += elapsed_ms
+            if elapsed_ms > st.max_ms:
+                st.max_ms = elapsed_ms
+            if route in st.routes or len(st.routes) < _MAX_ROUTES:
+                st.routes[route] = st.routes.get(route, 0) + 1
+
+    def _prune(self) -> None:
+        keep = sorted(self._stats.items(), key=lambda kv: kv[1].total_ms, reverse=True)[: self.max_entries]
+        self._stats = dict(keep)
+
+    def top(self, limit: int = 50, order_by: str = "total_ms") -> list[dict]:
+        if order_by not in ("total_ms", "max_ms", "count"):
+            raise ValueError(f"invalid order_by: {order_by}")
+        with self._lock:
+            items = [(fp, StatementStats(st.count, st.total_ms, st.max_ms, dict(st.routes))) for fp, st in self._stats.items()]
+        items.sort(key=lambda kv: getattr(kv[1], order_by), reverse=True)
+        return [st.as_dict(fp) for fp, st in items[:limit]]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+
+STATEMENTS = StatementRecorder()
+
+
+async def dump_periodically(interval_seconds: float, top_n: int) -> None:
+    """Loga o top-N (por tempo total) a cada intervalo; roda como task no startup."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        for row in STATEMENTS.top(top_n):
+            logger.info(json.dumps(row, default=str))
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Index, Numeric, String, Text, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+from app.models.ledger import LedgerType
+from app.models.org_charge import ChargeStatus, ChargeType
+
+# Arquivo frio (app.services.archive): cobranças PAID/VOID e lançamentos com mais
+# de um ano saem das tabelas quentes para cá, linha a linha igual à origem.
+# Sem FKs: o arquivo só recebe INSERT em lote e nunca é atualizado.
+
+
+class LedgerEntryArchive(Base):
+    __tablename__ = "ledger_entries_archive"
+    __table_args__ = (
+        # somas por período e "recentes" do arquivo (index-only com INCLUDE)
+        Index(
+            "ix_ledger_entries_archive_org_occurred",
+            "org_id",
+            "occurred_at",
+            postgresql_include=["type", "amount"],
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    org_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    type: Mapped[LedgerType] = mapped_column(Enum(LedgerType, name="ledger_type"), nullable=False)
+    amount: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    related_member_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    created_by_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class OrgChargeArchive(Base):
+    __tablename__ = "org_charges_archive"
+    __table_args__ = (
+        Index("ix_org_charges_archive_org_created", "org_id", "created_at"),
+        # probe do _generate_for_cycles e breakdown MEMBERSHIP
+        Index("ix_org_charges_archive_org_cycle", "org_id", "cycle_key"),
+        # breakdown PER_SESSION
+        Index("ix_org_charges_archive_org_game", "org_id", "game_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    org_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    org_member_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    game_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    cycle_key: Mapped[str] = mapped_column(String(64), nullable=False)
+    type: Mapped[ChargeType] = mapped_column(Enum(ChargeType, name="charge_type"), nullable=False)
+    status: Mapped[ChargeStatus] = mapped_column(Enum(ChargeStatus, name="charge_status"), nullable=False)
+    amount: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
+    ledger_entry_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    created_by_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    paid_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    voided_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class OrgArchiveTotals(Base):
+    # uma linha por org: somas do que já foi arquivado (totais "desde sempre" sem ler o arquivo)
+    __tablename__ = "org_archive_totals"
+
+    org_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    ledger_income_total: Mapped[float] = mapped_column(Numeric(14, 2), server_default=text("0"), nullable=False)
+    ledger_expense_total: Mapped[float] = mapped_column(Numeric(14, 2), server_default=text("0"), nullable=False)
+    ledger_count: Mapped[int] = mapped_column(BigInteger, server_default=text("0"), nullable=False)
+    charges_paid_total: Mapped[float] = mapped_column(Numeric(14, 2), server_default=text("0"), nullable=False)
+    charges_paid_count: Mapped[int] = mapped_column(BigInteger, server_default=text("0"), nullable=False)
+    charges_void_total: Mapped[float] = mapped_column(Numeric(14, 2), server_default=text("0"), nullable=False)
+    charges_void_count: Mapped[int] = mapped_column(BigInteger, server_default=text("0"), nullable=False)
+
+    # horizonte: o arquivo só tem linhas anteriores a isso (occurred_at / created_at).
+    # Leitura com período que começa depois não precisa olhar o arquivo.
+    ledger_archived_before: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    charges_archived_before: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
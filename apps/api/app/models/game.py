@@ -5,7 +5,7 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import String, DateTime, func, ForeignKey, Enum, Text, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -40,6 +40,11 @@ class Game(Base):
     captain_a_guest_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True, index=True)
     captain_b_guest_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True, index=True)
 
+    # último estado de times/capitães já contabilizado em org_pair_history / org_captain_history
+    # ({"A": [...], "B": [...], "captains": [...]}, só org_member_ids)
+    teams_snapshot: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    teams_recorded_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -49,6 +49,9 @@ class GameDraftPick(Base):
         Index("ix_game_draft_picks_org_id", "org_id"),
         Index("ix_game_draft_picks_game_id", "game_id"),
         Index("ix_game_draft_picks_draft_id", "draft_id"),
+        # "já escolhido?" do draft_pick
+        Index("ix_game_draft_picks_game_member", "game_id", "org_member_id"),
+        Index("ix_game_draft_picks_game_guest", "game_id", "game_guest_id"),
         UniqueConstraint("draft_id", "pick_number", name="uq_game_draft_picks_draft_pick_number"),
         CheckConstraint(
             "(org_member_id IS NOT NULL AND game_guest_id IS NULL) OR (org_member_id IS NULL AND game_guest_id IS NOT NULL)",
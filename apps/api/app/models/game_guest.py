@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Index, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, String, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -14,6 +14,14 @@ class GameGuest(Base):
     __tablename__ = "game_guests"
     __table_args__ = (
         Index("ix_game_guests_org_game", "org_id", "game_id"),
+        # mesmo nome (normalizado) + telefone não pode entrar duas vezes no mesmo jogo
+        Index(
+            "uq_game_guests_game_name_phone",
+            "game_id",
+            text("lower(btrim(name))"),
+            text("coalesce(btrim(phone), '')"),
+            unique=True,
+        ),
     )
 
 
@@ -4,7 +4,7 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Enum, Numeric, Text, func
+from sqlalchemy import DateTime, ForeignKey, Enum, Index, Numeric, Text, event, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -18,6 +18,20 @@ class LedgerType(str, enum.Enum):
 
 class LedgerEntry(Base):
     __tablename__ = "ledger_entries"
+    __table_args__ = (
+        # somas por tipo/período do finance (index-only com INCLUDE amount)
+        Index(
+            "ix_ledger_entries_org_type_occurred",
+            "org_id",
+            "type",
+            "occurred_at",
+            postgresql_include=["amount"],
+        ),
+        # "recentes" (ORDER BY occurred_at DESC LIMIT n)
+        Index("ix_ledger_entries_org_occurred", "org_id", "occurred_at"),
+        # partição por mês (app.db.partitions); PK física (id, occurred_at)
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -39,7 +53,7 @@ class LedgerEntry(Base):
     amount: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, nullable=False)
 
     related_member_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True),
@@ -69,3 +83,14 @@ class LedgerEntry(Base):
     organization = relationship("Organization", back_populates="ledger_entries")
     related_member = relationship("OrgMember")
     creator = relationship("User", foreign_keys=[created_by_id])
+
+    # identidade no ORM continua sendo só o id (uuid4)
+    __mapper_args__ = {"primary_key": [id]}
+
+
+@event.listens_for(LedgerEntry.__table__, "after_create")
+def _create_ledger_partitions(target, connection, **kw):
+    # create_all (banco novo): parent particionado sem partição não aceita INSERT
+    from app.db.partitions import ensure_ledger_partitions
+
+    ensure_ledger_partitions(connection)
@@ -4,7 +4,7 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Index, Numeric, String, UniqueConstraint, func
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Numeric, String, UniqueConstraint, event, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -38,12 +38,16 @@ class OrgCharge(Base):
         # ✅ você criou esses índices na migration 2c1, então faz sentido refletir aqui também
         Index("ix_org_charges_game_id", "game_id"),
         Index("ix_org_charges_org_game", "org_id", "game_id"),
+        # "recentes" do finance (ORDER BY created_at DESC LIMIT n)
+        Index("ix_org_charges_org_created", "org_id", "created_at"),
+        # partição por HASH(org_id) (app.db.partitions); PK física (id, org_id)
+        {"postgresql_partition_by": "HASH (org_id)"},
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     org_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False, index=True
+        UUID(as_uuid=True), ForeignKey("organizations.id"), primary_key=True, nullable=False, index=True
     )
     org_member_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("org_members.id"), nullable=False, index=True
@@ -71,9 +75,9 @@ class OrgCharge(Base):
 
     amount: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
 
-    ledger_entry_id: Mapped[uuid.UUID | None] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("ledger_entries.id"), nullable=True
-    )
+    # sem FK: ledger_entries é particionada e a PK dela é (id, occurred_at).
+    # Cobrança e lançamento são gravados na mesma transação (billing_service).
+    ledger_entry_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
 
     created_by_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=True
@@ -90,8 +94,19 @@ class OrgCharge(Base):
     # relationships
     organization = relationship("Organization")
     org_member = relationship("OrgMember")
-    ledger_entry = relationship("LedgerEntry")
+    ledger_entry = relationship(
+        "LedgerEntry", primaryjoin="foreign(OrgCharge.ledger_entry_id) == LedgerEntry.id", viewonly=True
+    )
     created_by = relationship("User", foreign_keys=[created_by_id])
 
     # ✅ opcional, mas recomendado
     game = relationship("Game")
+
+    __mapper_args__ = {"primary_key": [id]}
+
+
+@event.listens_for(OrgCharge.__table__, "after_create")
+def _create_charge_partitions(target, connection, **kw):
+    from app.db.partitions import ensure_charge_partitions
+
+    ensure_charge_partitions(connection)
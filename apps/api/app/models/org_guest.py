@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Index, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, String, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -13,6 +13,26 @@ from app.db.base_class import Base
 class OrgGuest(Base):
     __tablename__ = "org_guests"
     # __table_args__ = (Index("ix_org_guests_org_id", "org_id"),)  # REMOVIDO
+    __table_args__ = (
+        # dedup de telefone por org garantido pelo banco (sem read-then-write no router)
+        Index(
+            "uq_org_guests_org_phone",
+            "org_id",
+            "phone",
+            unique=True,
+            postgresql_where=text("phone IS NOT NULL"),
+        ),
+        # lookup/typeahead por nome normalizado (lower(btrim(name))) com prefixo LIKE
+        Index("ix_org_guests_org_name_norm", "org_id", text("lower(btrim(name)) text_pattern_ops")),
+        # busca/typeahead (pg_trgm + btree_gin): org_id na mesma GIN, o match já sai restrito à org
+        Index(
+            "ix_org_guests_org_name_trgm",
+            "org_id",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -4,7 +4,7 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, String, UniqueConstraint, func
+from sqlalchemy import Boolean, CheckConstraint, DateTime, Enum, ForeignKey, Index, Integer, String, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -24,7 +24,21 @@ class MemberType(str, enum.Enum):
 
 class OrgMember(Base):
     __tablename__ = "org_members"
-    __table_args__ = (UniqueConstraint("user_id", "org_id", name="uq_org_members_user_org"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "org_id", name="uq_org_members_user_org"),
+        # busca/typeahead (pg_trgm + btree_gin): org_id na mesma GIN, o match já sai restrito à org
+        Index(
+            "ix_org_members_org_nickname_trgm",
+            "org_id",
+            "nickname",
+            postgresql_using="gin",
+            postgresql_ops={"nickname": "gin_trgm_ops"},
+        ),
+        CheckConstraint(
+            "skill_rating IS NULL OR (skill_rating BETWEEN 1 AND 10)",
+            name="ck_org_members_skill_rating_range",
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -39,6 +53,8 @@ class OrgMember(Base):
     )
     nickname: Mapped[str | None] = mapped_column(String(255), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # 1..10, usado pelo auto-balance de times (NULL = sem avaliação)
+    skill_rating: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
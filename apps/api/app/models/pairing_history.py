@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Integer, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class OrgPairHistory(Base):
+    # quantas vezes cada dupla de membros jogou no MESMO time (mantido ao finalizar times)
+    __tablename__ = "org_pair_history"
+    __table_args__ = (
+        UniqueConstraint("org_id", "member_a_id", "member_b_id", name="uq_org_pair_history_org_pair"),
+        CheckConstraint("member_a_id < member_b_id", name="ck_org_pair_history_ordered_pair"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    org_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False)
+    member_a_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("org_members.id", ondelete="CASCADE"), nullable=False
+    )
+    member_b_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("org_members.id", ondelete="CASCADE"), nullable=False
+    )
+
+    together_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_played_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class OrgCaptainHistory(Base):
+    __tablename__ = "org_captain_history"
+    __table_args__ = (UniqueConstraint("org_id", "org_member_id", name="uq_org_captain_history_org_member"),)
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    org_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False)
+    org_member_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("org_members.id", ondelete="CASCADE"), nullable=False
+    )
+
+    captain_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_captain_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
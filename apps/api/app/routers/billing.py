@@ -1,18 +1,22 @@
 from __future__ import annotations
 
-from datetime import date, datetime, time, timedelta, timezone
+import io
+from datetime import datetime, timezone
+from itertools import islice
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 
+from app.core.idempotency import idempotent
+from app.core.responses import FastJSONResponse
 from app.db.session import get_db
-from app.models.game import AttendanceStatus, Game, GameAttendance
+from app.models.background_job import JobStatus
 from app.models.ledger import LedgerEntry, LedgerType
-from app.models.org_billing_settings import BillingCycle, BillingMode, OrgBillingSettings
-from app.models.org_charge import ChargeStatus, ChargeType, OrgCharge
-from app.models.org_member import MemberType, OrgMember, OrgRole
+from app.models.org_billing_settings import BillingCycle
+from app.models.org_charge import ChargeStatus, OrgCharge
+from app.models.org_member import OrgMember, OrgRole
 from app.models.user import User
 from app.routers.deps import get_current_user, require_org_member
 from app.schemas.billing import (
@@ -20,7 +24,35 @@ from app.schemas.billing import (
     OrgBillingSettingsPut,
     OrgBillingSettingsResponse,
 )
-from app.schemas.charge import OrgChargeResponse, UpdateChargeStatusRequest
+from app.schemas.charge import (
+    BulkChargeStatusRequest,
+    BulkChargeStatusResponse,
+    OrgChargeResponse,
+    StatementReconcileResponse,
+    UpdateChargeStatusRequest,
+)
+from app.services.archive import archive_totals, charge_source, needs_archive
+from app.services.billing_service import (
+    bulk_transition_charges,
+    compute_cycle,
+    generate_charges_for_org,
+    generate_charges_for_range,
+    get_or_create_settings,
+)
+from app.services.job_handlers import BILLING_GENERATE
+from app.services.jobs import enqueue
+from app.services.statement_import import (
+    MAX_STATEMENT_LINES,
+    ChargeMatcher,
+    StatementLine,
+    load_imported_fitids,
+    load_pending_charges,
+    paid_at_by_charge,
+    parse_csv,
+    parse_ofx,
+    reconcile,
+    record_imported_fitids,
+)
 
 router = APIRouter()
 
@@ -42,96 +74,31 @@ def _require_billing_manager(db: Session, org_id: UUID, current_user: User) -> O
     return membership
 
 
-def _get_or_create_settings(db: Session, org_id: UUID) -> OrgBillingSettings:
-    settings = db.query(OrgBillingSettings).filter(OrgBillingSettings.org_id == org_id).first()
-    if settings:
-        return settings
-    settings = OrgBillingSettings(
-        org_id=org_id,
-        billing_mode=BillingMode.HYBRID,
-        cycle=BillingCycle.MONTHLY,
-        cycle_weeks=None,
-        anchor_date=date.today(),
-        due_day=1,
-        membership_amount=0,
-        session_amount=0,
-    )
-    db.add(settings)
-    db.commit()
-    db.refresh(settings)
-    return settings
-
-
-def _month_range_utc(start: date) -> tuple[datetime, datetime]:
-    start_dt = datetime.combine(start.replace(day=1), time.min, tzinfo=timezone.utc)
-    if start.month == 12:
-        end_month = date(start.year + 1, 1, 1)
-    else:
-        end_month = date(start.year, start.month + 1, 1)
-    end_dt = datetime.combine(end_month, time.min, tzinfo=timezone.utc)
-    return start_dt, end_dt
-
-
-def _week_range_utc(iso_year: int, iso_week: int) -> tuple[datetime, datetime]:
-    start_dt = datetime.fromisocalendar(iso_year, iso_week, 1).replace(tzinfo=timezone.utc)
-    end_dt = start_dt + timedelta(days=7)
-    return start_dt, end_dt
-
-
-def _compute_cycle(settings: OrgBillingSettings, cycle_key: str | None) -> tuple[str, datetime, datetime]:
-    now = datetime.now(timezone.utc)
-
-    if settings.cycle == BillingCycle.MONTHLY:
-        if cycle_key:
-            try:
-                y, m = cycle_key.split("-")
-                y_i = int(y)
-                m_i = int(m)
-                start_date = date(y_i, m_i, 1)
-            except Exception:
-                raise HTTPException(status_code=400, detail="Invalid cycle_key for MONTHLY (expected YYYY-MM)")
-        else:
-            start_date = date(now.year, now.month, 1)
-            cycle_key = f"{now.year:04d}-{now.month:02d}"
-        start_dt, end_dt = _month_range_utc(start_date)
-        return cycle_key, start_dt, end_dt
-
-    if settings.cycle == BillingCycle.WEEKLY:
-        if cycle_key:
-            try:
-                y, w = cycle_key.split("-W")
-                iso_year = int(y)
-                iso_week = int(w)
-            except Exception:
-                raise HTTPException(status_code=400, detail="Invalid cycle_key for WEEKLY (expected YYYY-Www)")
-        else:
-            iso = now.isocalendar()
-            iso_year = iso.year
-            iso_week = iso.week
-            cycle_key = f"{iso_year:04d}-W{iso_week:02d}"
-        start_dt, end_dt = _week_range_utc(iso_year, iso_week)
-        return cycle_key, start_dt, end_dt
-
-    if settings.cycle == BillingCycle.CUSTOM_WEEKS:
-        if not settings.cycle_weeks or settings.cycle_weeks <= 0:
-            raise HTTPException(status_code=400, detail="cycle_weeks is required for CUSTOM_WEEKS")
-        period_days = settings.cycle_weeks * 7
-        anchor = settings.anchor_date
-        if cycle_key:
-            try:
-                start_date = date.fromisoformat(cycle_key)
-            except Exception:
-                raise HTTPException(status_code=400, detail="Invalid cycle_key for CUSTOM_WEEKS (expected YYYY-MM-DD)")
-        else:
-            delta_days = (date.today() - anchor).days
-            n = max(0, delta_days // period_days)
-            start_date = anchor + timedelta(days=n * period_days)
-            cycle_key = start_date.isoformat()
-        start_dt = datetime.combine(start_date, time.min, tzinfo=timezone.utc)
-        end_dt = start_dt + timedelta(days=period_days)
-        return cycle_key, start_dt, end_dt
-
-    raise HTTPException(status_code=400, detail="Unsupported billing cycle")
+def _charge_row_payload(r) -> dict:
+    # mesmo formato de OrgChargeResponse
+    return {
+        "org_member_id": r.org_member_id,
+        "cycle_key": r.cycle_key,
+        "type": r.type,
+        "status": r.status,
+        "amount": float(r.amount),
+        "game_id": r.game_id,
+        "id": r.id,
+        "org_id": r.org_id,
+        "ledger_entry_id": r.ledger_entry_id,
+        "created_by_id": r.created_by_id,
+        "paid_at": r.paid_at,
+        "voided_at": r.voided_at,
+        "created_at": r.created_at,
+        "updated_at": r.updated_at,
+        "org_member": {
+            "id": r.org_member_id,
+            "user_id": r.user_id,
+            "org_id": r.member_org_id,
+            "role": r.role,
+            "user": {"id": r.user_id, "email": r.email, "full_name": r.full_name},
+        },
+    }
 
 
 @router.get("/orgs/{org_id}/billing-settings", response_model=OrgBillingSettingsResponse)
@@ -142,7 +109,7 @@ def get_billing_settings(
 ):
     require_org_member(org_id=org_id, db=db, current_user=current_user)
     _require_billing_manager(db=db, org_id=org_id, current_user=current_user)
-    return _get_or_create_settings(db=db, org_id=org_id)
+    return get_or_create_settings(db=db, org_id=org_id)
 
 
 @router.put("/orgs/{org_id}/billing-settings", response_model=OrgBillingSettingsResponse)
@@ -161,7 +128,7 @@ def put_billing_settings(
     if payload.due_day < 1 or payload.due_day > 31:
         raise HTTPException(status_code=400, detail="due_day must be between 1 and 31")
 
-    settings = _get_or_create_settings(db=db, org_id=org_id)
+    settings = get_or_create_settings(db=db, org_id=org_id)
     settings.billing_mode = payload.billing_mode
     settings.cycle = payload.cycle
     settings.cycle_weeks = payload.cycle_weeks
@@ -187,7 +154,48 @@ def generate_charges(
     require_org_member(org_id=org_id, db=db, current_user=current_user)
     _require_billing_manager(db=db, org_id=org_id, current_user=current_user)
 
-    return _generate_charges_core(
+    if payload.start_date or payload.end_date:
+        if not (payload.start_date and payload.end_date):
+            raise HTTPException(status_code=400, detail="start_date and end_date are required together")
+        if payload.cycle_key:
+            raise HTTPException(status_code=400, detail="cycle_key cannot be combined with start_date/end_date")
+        if payload.end_date < payload.start_date:
+            raise HTTPException(status_code=400, detail="end_date must be >= start_date")
+
+    if payload.defer:
+        if payload.cycle_key:
+            # valida agora (400 no request) em vez de falhar N vezes no worker
+            compute_cycle(settings=get_or_create_settings(db=db, org_id=org_id), cycle_key=payload.cycle_key)
+        job_payload = {
+            "org_id": str(org_id),
+            "cycle_key": payload.cycle_key,
+            "start_date": payload.start_date.isoformat() if payload.start_date else None,
+            "end_date": payload.end_date.isoformat() if payload.end_date else None,
+            "force": payload.force,
+            "created_by_id": str(current_user.id),
+        }
+        scope = f"{job_payload['start_date']}:{job_payload['end_date']}" if payload.start_date else payload.cycle_key
+        job_id = enqueue(
+            db,
+            BILLING_GENERATE,
+            job_payload,
+            org_id=org_id,
+            dedupe_key=f"billing:{org_id}:{scope or 'current'}:{int(payload.force)}",
+        )
+        db.commit()
+        return FastJSONResponse({"job_id": job_id, "status": JobStatus.PENDING}, status_code=202)
+
+    if payload.start_date:
+        return generate_charges_for_range(
+            db=db,
+            org_id=org_id,
+            start_date=payload.start_date,
+            end_date=payload.end_date,
+            force=payload.force,
+            created_by_id=current_user.id,
+        )
+
+    return generate_charges_for_org(
         db=db,
         org_id=org_id,
         force=payload.force,
@@ -204,28 +212,142 @@ def list_charges(
     cycle_key: str | None = None,
     member_id: UUID | None = None,
     status: ChargeStatus | None = None,
+    start: datetime | None = Query(default=None, description="created_at >= start"),
+    end: datetime | None = Query(default=None, description="created_at <= end"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     require_org_member(org_id=org_id, db=db, current_user=current_user)
     _require_billing_manager(db=db, org_id=org_id, current_user=current_user)
 
+    # arquivo só tem PAID/VOID anteriores ao horizonte: PENDING ou período recente lê só a tabela quente
+    include_archive = False
+    if status != ChargeStatus.PENDING:
+        totals = archive_totals(db, org_id)
+        include_archive = totals is not None and needs_archive(totals.charges_archived_before, start)
+    charges = charge_source(org_id, include_archive)
+
+    # tuplas em vez de OrgCharge + joinedload: sem identity map nem validação pydantic por linha
     q = (
-        db.query(OrgCharge)
-        .options(joinedload(OrgCharge.org_member).joinedload(OrgMember.user))
-        .filter(OrgCharge.org_id == org_id)
-        .order_by(OrgCharge.created_at.desc())
+        db.query(
+            charges.c.id,
+            charges.c.org_id,
+            charges.c.org_member_id,
+            charges.c.cycle_key,
+            charges.c.type,
+            charges.c.status,
+            charges.c.amount,
+            charges.c.game_id,
+            charges.c.ledger_entry_id,
+            charges.c.created_by_id,
+            charges.c.paid_at,
+            charges.c.voided_at,
+            charges.c.created_at,
+            charges.c.updated_at,
+            OrgMember.user_id,
+            OrgMember.org_id.label("member_org_id"),
+            OrgMember.role,
+            User.email,
+            User.full_name,
+        )
+        .join(OrgMember, OrgMember.id == charges.c.org_member_id)
+        .join(User, User.id == OrgMember.user_id)
+        .filter(charges.c.org_id == org_id)
+        .order_by(charges.c.created_at.desc())
     )
     if cycle_key:
-        q = q.filter(OrgCharge.cycle_key == cycle_key)
+        q = q.filter(charges.c.cycle_key == cycle_key)
     if member_id:
-        q = q.filter(OrgCharge.org_member_id == member_id)
+        q = q.filter(charges.c.org_member_id == member_id)
     if status:
-        q = q.filter(OrgCharge.status == status)
-    return q.all()
+        q = q.filter(charges.c.status == status)
+    if start:
+        q = q.filter(charges.c.created_at >= start)
+    if end:
+        q = q.filter(charges.c.created_at <= end)
+    return FastJSONResponse([_charge_row_payload(r) for r in q.all()])
+
+
+@router.post("/orgs/{org_id}/charges/bulk-status", response_model=BulkChargeStatusResponse)
+@idempotent
+def bulk_update_charge_status(
+    org_id: UUID,
+    payload: BulkChargeStatusRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    require_org_member(org_id=org_id, db=db, current_user=current_user)
+    _require_billing_manager(db=db, org_id=org_id, current_user=current_user)
+
+    return bulk_transition_charges(
+        db=db,
+        org_id=org_id,
+        status=payload.status,
+        actor_id=current_user.id,
+        charge_ids=payload.charge_ids,
+        cycle_key=payload.cycle_key,
+        current_status=payload.current_status,
+    )
+
+
+@router.post("/orgs/{org_id}/charges/reconcile", response_model=StatementReconcileResponse)
+def reconcile_statement(
+    org_id: UUID,
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    window_days: int = Query(45, ge=1, le=366),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    require_org_member(org_id=org_id, db=db, current_user=current_user)
+    _require_billing_manager(db=db, org_id=org_id, current_user=current_user)
+
+    # lê o upload em streaming (spool do starlette), sem carregar o arquivo inteiro
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    head = stream.read(512)
+    stream.seek(0)
+    is_ofx = (file.filename or "").lower().endswith(".ofx") or "<OFX>" in head.upper() or "OFXHEADER" in head.upper()
+
+    imported: set[str] = set()
+    if is_ofx:
+        # 1ª passada só pelos FITIDs: os já baixados saem antes do match
+        head_lines = islice(parse_ofx(stream), MAX_STATEMENT_LINES + 1)
+        imported = load_imported_fitids(
+            db, org_id, (t.fitid for t in head_lines if isinstance(t, StatementLine) and t.fitid)
+        )
+        stream.seek(0)
+
+    matcher = ChargeMatcher(load_pending_charges(db, org_id), window_days=window_days)
+    report = reconcile(parse_ofx(stream) if is_ofx else parse_csv(stream), matcher, imported_fitids=imported)
+
+    applied = None
+    if report.matched and not dry_run:
+        # mesma transação da baixa (bulk_transition_charges comita)
+        record_imported_fitids(db, org_id, report, current_user.id)
+        paid_at = paid_at_by_charge(report)
+        applied = bulk_transition_charges(
+            db=db,
+            org_id=org_id,
+            status=ChargeStatus.PAID,
+            actor_id=current_user.id,
+            charge_ids=list(paid_at),
+            paid_at_by_charge=paid_at,
+        )
+
+    return FastJSONResponse(
+        {
+            "lines": report.lines,
+            "credits": report.credits,
+            "dry_run": dry_run,
+            "matched": report.matched,
+            "unmatched": report.unmatched,
+            "applied": applied,
+        }
+    )
 
 
 @router.patch("/orgs/{org_id}/charges/{charge_id}", response_model=OrgChargeResponse)
+@idempotent
 def update_charge_status(
     org_id: UUID,
     charge_id: UUID,
@@ -287,121 +409,3 @@ def update_charge_status(
         return charge
 
     raise HTTPException(status_code=400, detail="Unsupported status transition")
-
-def _generate_charges_core(
-    *,
-    db: Session,
-    org_id: UUID,
-    force: bool,
-    cycle_key_override: str | None,
-    created_by_id: UUID | None,
-) -> dict:
-    settings = _get_or_create_settings(db=db, org_id=org_id)
-    cycle_key, start_dt, end_dt = _compute_cycle(settings=settings, cycle_key=cycle_key_override)
-
-    members: list[OrgMember] = db.query(OrgMember).filter(OrgMember.org_id == org_id).all()
-
-    created = 0
-    skipped = 0
-
-    def ensure_charge(
-        member: OrgMember,
-        charge_type: ChargeType,
-        amount: float,
-        cycle_key_value: str,
-        game_id: UUID | None = None,
-    ) -> None:
-        nonlocal created, skipped
-
-        existing = (
-            db.query(OrgCharge)
-            .filter(
-                OrgCharge.org_id == org_id,
-                OrgCharge.org_member_id == member.id,
-                OrgCharge.cycle_key == cycle_key_value,
-                OrgCharge.type == charge_type,
-            )
-            .first()
-        )
-
-        if existing:
-            if existing.status == ChargeStatus.PAID:
-                skipped += 1
-                return
-            if not force:
-                skipped += 1
-                return
-
-            existing.amount = amount
-            existing.game_id = game_id
-
-            if existing.status == ChargeStatus.VOID:
-                existing.status = ChargeStatus.PENDING
-                existing.voided_at = None
-
-            skipped += 1
-            return
-
-        charge = OrgCharge(
-            org_id=org_id,
-            org_member_id=member.id,
-            cycle_key=cycle_key_value,
-            type=charge_type,
-            status=ChargeStatus.PENDING,
-            amount=amount,
-            created_by_id=created_by_id,
-            game_id=game_id,
-        )
-        db.add(charge)
-        created += 1
-
-    # MEMBERSHIP (MONTHLY)
-    if settings.billing_mode in (BillingMode.MEMBERSHIP, BillingMode.HYBRID):
-        for m in members:
-            if m.member_type == MemberType.MONTHLY:
-                ensure_charge(
-                    m,
-                    ChargeType.MEMBERSHIP,
-                    float(settings.membership_amount),
-                    cycle_key_value=cycle_key,
-                )
-
-    # PER_SESSION (por jogo)
-    if settings.billing_mode in (BillingMode.PER_SESSION, BillingMode.HYBRID):
-        rows = (
-            db.query(Game.id.label("game_id"), OrgMember.id.label("org_member_id"))
-            .join(GameAttendance, GameAttendance.game_id == Game.id)
-            .join(
-                OrgMember,
-                (OrgMember.org_id == Game.org_id) & (OrgMember.user_id == GameAttendance.user_id),
-            )
-            .filter(
-                Game.org_id == org_id,
-                Game.start_at >= start_dt,
-                Game.start_at < end_dt,
-                GameAttendance.status == AttendanceStatus.GOING,
-                OrgMember.member_type == MemberType.GUEST,
-            )
-            .distinct()
-            .all()
-        )
-
-        # map rápido pra evitar next(...) N vezes
-        members_by_id = {m.id: m for m in members}
-
-        for r in rows:
-            member = members_by_id.get(r.org_member_id)
-            if not member:
-                continue
-
-            game_cycle_key = f"GAME:{r.game_id}"
-            ensure_charge(
-                member,
-                ChargeType.PER_SESSION,
-                float(settings.session_amount),
-                cycle_key_value=game_cycle_key,
-                game_id=r.game_id,
-            )
-
-    db.commit()
-    return {"cycle_key": cycle_key, "created": created, "skipped": skipped}
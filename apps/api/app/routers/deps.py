@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, Header, HTTPException, status, Request
 from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
@@ -93,3 +93,11 @@ def require_org_owner(
     if membership.role != OrgRole.OWNER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="insufficient role")
     return membership
+
+
+def require_internal_key(x_internal_key: str | None = Header(default=None)) -> None:
+    expected = getattr(settings, "INTERNAL_KEY", None)
+    if not expected:
+        raise HTTPException(status_code=500, detail="INTERNAL_KEY não configurado")
+    if not x_internal_key or x_internal_key != expected:
+        raise HTTPException(status_code=401, detail="Unauthorized")
@@ -2,25 +2,90 @@
 from __future__ import annotations
 
 from uuid import UUID
-from datetime import datetime
-from fastapi import APIRouter, Depends, Query
+from datetime import date, datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func, case
 from sqlalchemy.orm import Session
 
+from app.core.responses import FastJSONResponse
 from app.db.session import get_db
 from app.routers.deps import get_current_user, require_org_member
 from app.models.user import User
 from app.models.ledger import LedgerEntry, LedgerType
 from app.models.org_charge import OrgCharge, ChargeStatus
+from app.models.archive import LedgerEntryArchive, OrgArchiveTotals, OrgChargeArchive
 from app.schemas.finance import (
+    FinanceBreakdownResponse,
     FinanceSummaryResponse,
     FinanceRecentResponse,
     FinanceDashboardResponse,
 )
+from app.services.archive import (
+    archive_totals,
+    archived_sum,
+    charge_source,
+    ledger_source,
+    needs_archive,
+    top_up_recent,
+)
+from app.services.billing_service import get_or_create_settings
+from app.services.finance_breakdown import finance_breakdown
 
 router = APIRouter(tags=["finance"])
 
 
+# colunas de LedgerEntryOut / ChargeOutMini: o recent lê tuplas, não entidades
+_RECENT_LEDGER_COLUMNS = (
+    LedgerEntry.id,
+    LedgerEntry.type,
+    LedgerEntry.amount,
+    LedgerEntry.description,
+    LedgerEntry.occurred_at,
+    LedgerEntry.related_member_id,
+    LedgerEntry.created_by_id,
+)
+_RECENT_CHARGE_COLUMNS = (
+    OrgCharge.id,
+    OrgCharge.org_member_id,
+    OrgCharge.cycle_key,
+    OrgCharge.type,
+    OrgCharge.status,
+    OrgCharge.amount,
+    OrgCharge.game_id,
+    OrgCharge.ledger_entry_id,
+    OrgCharge.created_at,
+)
+_ARCHIVED_LEDGER_COLUMNS = tuple(getattr(LedgerEntryArchive, c.key) for c in _RECENT_LEDGER_COLUMNS)
+_ARCHIVED_CHARGE_COLUMNS = tuple(getattr(OrgChargeArchive, c.key) for c in _RECENT_CHARGE_COLUMNS)
+
+
+# UUID/Enum/datetime vão direto pro orjson
+def _recent_ledger_payload(x) -> dict:
+    return {
+        "id": x.id,
+        "type": x.type,
+        "amount": float(x.amount),
+        "description": x.description,
+        "occurred_at": x.occurred_at,
+        "related_member_id": x.related_member_id,
+        "created_by_id": x.created_by_id,
+    }
+
+
+def _recent_charge_payload(c) -> dict:
+    return {
+        "id": c.id,
+        "org_member_id": c.org_member_id,
+        "cycle_key": c.cycle_key,
+        "type": c.type,
+        "status": c.status,
+        "amount": float(c.amount),
+        "game_id": c.game_id,
+        "ledger_entry_id": c.ledger_entry_id,
+        "created_at": c.created_at,
+    }
+
+
 @router.get("/orgs/{org_id}/finance/summary", response_model=FinanceSummaryResponse)
 def finance_summary(
     org_id: UUID,
@@ -29,14 +94,21 @@ def finance_summary(
 ):
     require_org_member(org_id=org_id, db=db, current_user=current_user)
 
+    # totais desde sempre = tabela quente + somas arquivadas (mesmo statement: mesmo snapshot)
     income_total = (
-        db.query(func.coalesce(func.sum(LedgerEntry.amount), 0))
+        db.query(
+            func.coalesce(func.sum(LedgerEntry.amount), 0)
+            + archived_sum(OrgArchiveTotals.ledger_income_total, org_id)
+        )
         .filter(LedgerEntry.org_id == org_id, LedgerEntry.type == LedgerType.INCOME)
         .scalar()
         or 0
     )
     expense_total = (
-        db.query(func.coalesce(func.sum(LedgerEntry.amount), 0))
+        db.query(
+            func.coalesce(func.sum(LedgerEntry.amount), 0)
+            + archived_sum(OrgArchiveTotals.ledger_expense_total, org_id)
+        )
         .filter(LedgerEntry.org_id == org_id, LedgerEntry.type == LedgerType.EXPENSE)
         .scalar()
         or 0
@@ -56,6 +128,8 @@ def finance_summary(
                 "pending_count"
             ),
             func.coalesce(func.sum(case((OrgCharge.status == ChargeStatus.PAID, 1), else_=0)), 0).label("paid_count"),
+            archived_sum(OrgArchiveTotals.charges_paid_total, org_id).label("archived_paid_total"),
+            archived_sum(OrgArchiveTotals.charges_paid_count, org_id).label("archived_paid_count"),
         )
         .filter(OrgCharge.org_id == org_id)
         .one()
@@ -69,9 +143,9 @@ def finance_summary(
         "expense_total": float(expense_total),
         "balance": float(balance),
         "pending_charges_total": float(charges_agg.pending_total),
-        "paid_charges_total": float(charges_agg.paid_total),
+        "paid_charges_total": float(charges_agg.paid_total + charges_agg.archived_paid_total),
         "pending_charges_count": int(charges_agg.pending_count),
-        "paid_charges_count": int(charges_agg.paid_count),
+        "paid_charges_count": int(charges_agg.paid_count + charges_agg.archived_paid_count),
     }
 
 
@@ -85,49 +159,53 @@ def finance_recent(
     require_org_member(org_id=org_id, db=db, current_user=current_user)
 
     ledger = (
-        db.query(LedgerEntry)
+        db.query(*_RECENT_LEDGER_COLUMNS)
         .filter(LedgerEntry.org_id == org_id)
         .order_by(LedgerEntry.occurred_at.desc())
         .limit(limit)
         .all()
     )
     charges = (
-        db.query(OrgCharge)
+        db.query(*_RECENT_CHARGE_COLUMNS)
         .filter(OrgCharge.org_id == org_id)
         .order_by(OrgCharge.created_at.desc())
         .limit(limit)
         .all()
     )
 
-    return {
-        "org_id": str(org_id),
-        "ledger": [
-            {
-                "id": str(x.id),
-                "type": x.type.value if hasattr(x.type, "value") else str(x.type),
-                "amount": float(x.amount),
-                "description": x.description,
-                "occurred_at": x.occurred_at,
-                "related_member_id": str(x.related_member_id) if x.related_member_id else None,
-                "created_by_id": str(x.created_by_id) if x.created_by_id else None,
-            }
-            for x in ledger
-        ],
-        "charges": [
-            {
-                "id": str(c.id),
-                "org_member_id": str(c.org_member_id),
-                "cycle_key": c.cycle_key,
-                "type": c.type.value if hasattr(c.type, "value") else str(c.type),
-                "status": c.status.value if hasattr(c.status, "value") else str(c.status),
-                "amount": float(c.amount),
-                "game_id": str(getattr(c, "game_id")) if getattr(c, "game_id", None) else None,
-                "ledger_entry_id": str(c.ledger_entry_id) if c.ledger_entry_id else None,
-                "created_at": c.created_at,
-            }
-            for c in charges
-        ],
-    }
+    # org com poucas linhas quentes: completa com o arquivo
+    totals = archive_totals(db, org_id)
+    if totals is not None:
+        ledger = top_up_recent(
+            ledger,
+            lambda: db.query(*_ARCHIVED_LEDGER_COLUMNS)
+            .filter(LedgerEntryArchive.org_id == org_id)
+            .order_by(LedgerEntryArchive.occurred_at.desc())
+            .limit(limit)
+            .all(),
+            totals.ledger_archived_before,
+            lambda x: x.occurred_at,
+            limit,
+        )
+        charges = top_up_recent(
+            charges,
+            lambda: db.query(*_ARCHIVED_CHARGE_COLUMNS)
+            .filter(OrgChargeArchive.org_id == org_id)
+            .order_by(OrgChargeArchive.created_at.desc())
+            .limit(limit)
+            .all(),
+            totals.charges_archived_before,
+            lambda c: c.created_at,
+            limit,
+        )
+
+    return FastJSONResponse(
+        {
+            "org_id": org_id,
+            "ledger": [_recent_ledger_payload(x) for x in ledger],
+            "charges": [_recent_charge_payload(c) for c in charges],
+        }
+    )
 
 
 @router.get("/orgs/{org_id}/finance/dashboard")
@@ -141,24 +219,29 @@ def finance_dashboard(
 ):
     require_org_member(org_id=org_id, db=db, current_user=current_user)
 
+    # período que alcança o arquivo (ou sem start): UNION ALL com as linhas arquivadas
+    totals = archive_totals(db, org_id)
+    ledger = ledger_source(org_id, totals is not None and needs_archive(totals.ledger_archived_before, start))
+    charges = charge_source(org_id, totals is not None and needs_archive(totals.charges_archived_before, start))
+
     # -------- SUMMARY COM PERÍODO --------
-    ledger_query = db.query(LedgerEntry).filter(LedgerEntry.org_id == org_id)
+    ledger_query = db.query(ledger.c.id).filter(ledger.c.org_id == org_id)
 
     if start:
-        ledger_query = ledger_query.filter(LedgerEntry.occurred_at >= start)
+        ledger_query = ledger_query.filter(ledger.c.occurred_at >= start)
     if end:
-        ledger_query = ledger_query.filter(LedgerEntry.occurred_at <= end)
+        ledger_query = ledger_query.filter(ledger.c.occurred_at <= end)
 
     income_total = (
-        ledger_query.filter(LedgerEntry.type == LedgerType.INCOME)
-        .with_entities(func.coalesce(func.sum(LedgerEntry.amount), 0))
+        ledger_query.filter(ledger.c.type == LedgerType.INCOME)
+        .with_entities(func.coalesce(func.sum(ledger.c.amount), 0))
         .scalar()
         or 0
     )
 
     expense_total = (
-        ledger_query.filter(LedgerEntry.type == LedgerType.EXPENSE)
-        .with_entities(func.coalesce(func.sum(LedgerEntry.amount), 0))
+        ledger_query.filter(ledger.c.type == LedgerType.EXPENSE)
+        .with_entities(func.coalesce(func.sum(ledger.c.amount), 0))
         .scalar()
         or 0
     )
@@ -166,73 +249,109 @@ def finance_dashboard(
     balance = float(income_total) - float(expense_total)
 
     # -------- CHARGES --------
-    charges_query = db.query(OrgCharge).filter(OrgCharge.org_id == org_id)
+    charges_query = db.query(charges.c.id).filter(charges.c.org_id == org_id)
 
     if start:
-        charges_query = charges_query.filter(OrgCharge.created_at >= start)
+        charges_query = charges_query.filter(charges.c.created_at >= start)
     if end:
-        charges_query = charges_query.filter(OrgCharge.created_at <= end)
+        charges_query = charges_query.filter(charges.c.created_at <= end)
 
     pending_total = (
-        charges_query.filter(OrgCharge.status == ChargeStatus.PENDING)
-        .with_entities(func.coalesce(func.sum(OrgCharge.amount), 0))
+        charges_query.filter(charges.c.status == ChargeStatus.PENDING)
+        .with_entities(func.coalesce(func.sum(charges.c.amount), 0))
         .scalar()
         or 0
     )
 
     paid_total = (
-        charges_query.filter(OrgCharge.status == ChargeStatus.PAID)
-        .with_entities(func.coalesce(func.sum(OrgCharge.amount), 0))
+        charges_query.filter(charges.c.status == ChargeStatus.PAID)
+        .with_entities(func.coalesce(func.sum(charges.c.amount), 0))
         .scalar()
         or 0
     )
 
     # -------- RECENT --------
     recent_ledger = (
-        ledger_query.order_by(LedgerEntry.occurred_at.desc())
+        ledger_query.with_entities(
+            ledger.c.id, ledger.c.type, ledger.c.amount, ledger.c.description, ledger.c.occurred_at
+        )
+        .order_by(ledger.c.occurred_at.desc())
         .limit(limit)
         .all()
     )
 
     recent_charges = (
-        charges_query.order_by(OrgCharge.created_at.desc())
+        charges_query.with_entities(
+            charges.c.id, charges.c.status, charges.c.type, charges.c.amount, charges.c.created_at
+        )
+        .order_by(charges.c.created_at.desc())
         .limit(limit)
         .all()
     )
 
-    return {
-        "org_id": str(org_id),
-        "period": {
+    return FastJSONResponse(
+        {
+            "org_id": org_id,
+            "period": {
+                "start": start,
+                "end": end,
+            },
+            "summary": {
+                "income_total": float(income_total),
+                "expense_total": float(expense_total),
+                "balance": float(balance),
+                "pending_charges_total": float(pending_total),
+                "paid_charges_total": float(paid_total),
+            },
+            "recent": {
+                "ledger": [
+                    {
+                        "id": x.id,
+                        "type": str(x.type),
+                        "amount": float(x.amount),
+                        "description": x.description,
+                        "occurred_at": x.occurred_at,
+                    }
+                    for x in recent_ledger
+                ],
+                "charges": [
+                    {
+                        "id": c.id,
+                        "status": str(c.status),
+                        "type": str(c.type),
+                        "amount": float(c.amount),
+                        "created_at": c.created_at,
+                    }
+                    for c in recent_charges
+                ],
+            },
+        }
+    )
+
+
+@router.get("/orgs/{org_id}/finance/breakdown", response_model=FinanceBreakdownResponse)
+def finance_breakdown_by_cycle(
+    org_id: UUID,
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    require_org_member(org_id=org_id, db=db, current_user=current_user)
+
+    # padrão: último ano até hoje
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=365)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be >= start")
+
+    settings = get_or_create_settings(db=db, org_id=org_id)
+    return FastJSONResponse(
+        {
+            "org_id": org_id,
+            "cycle": settings.cycle,
             "start": start,
             "end": end,
-        },
-        "summary": {
-            "income_total": float(income_total),
-            "expense_total": float(expense_total),
-            "balance": float(balance),
-            "pending_charges_total": float(pending_total),
-            "paid_charges_total": float(paid_total),
-        },
-        "recent": {
-            "ledger": [
-                {
-                    "id": str(x.id),
-                    "type": str(x.type),
-                    "amount": float(x.amount),
-                    "description": x.description,
-                    "occurred_at": x.occurred_at,
-                }
-                for x in recent_ledger
-            ],
-            "charges": [
-                {
-                    "id": str(c.id),
-                    "status": str(c.status),
-                    "type": str(c.type),
-                    "amount": float(c.amount),
-                    "created_at": c.created_at,
-                }
-                for c in recent_charges
-            ],
-        },
-    }
+            "cycles": finance_breakdown(db, settings, start, end),
+        }
+    )
@@ -1,9 +1,14 @@
 import random
+from datetime import datetime, timedelta, timezone
+from statistics import median
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy import and_, delete, func, insert, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from app.core.idempotency import idempotent
+from app.core.responses import FastJSONResponse
 from app.db.session import get_db
 from app.models.game import AttendanceStatus, Game, GameAttendance
 from app.models.game_draft import DraftStatus, GameDraft, GameDraftPick
@@ -18,10 +23,25 @@ from app.routers.deps import require_org_admin, require_org_member
 from app.schemas.attendance import AttendanceSetRequest, GameAttendanceSummary
 from app.schemas.game_detail import GameDetailResponse
 from app.schemas.draft import DraftPickRequest, DraftStateResponse, DraftSummary
-from app.schemas.teams import CaptainsResolved, CaptainsSetRequest, TeamsResponse, TeamAssignmentSetRequest
+from app.schemas.teams import (
+    CaptainsResolved,
+    CaptainsSetRequest,
+    TeamAssignment,
+    TeamAutoBalanceRequest,
+    TeamsResponse,
+    TeamAssignmentSetRequest,
+)
+from app.services.job_handlers import PAIRING_RECORD
+from app.services.jobs import enqueue
+from app.services.pairing_history import load_captain_counts, load_pair_matrix
 
 router = APIRouter()
 
+def _public_user_payload(u: User) -> dict:
+    # campos de schemas.teams.PublicUser
+    return {"id": u.id, "email": u.email, "full_name": u.full_name, "avatar_url": u.avatar_url}
+
+
 def _resolve_member_payload(m: OrgMember) -> dict:
     included = m.member_type == MemberType.MONTHLY
     return {
@@ -31,7 +51,7 @@ def _resolve_member_payload(m: OrgMember) -> dict:
         "member_type": m.member_type,
         "included": included,
         "billable": not included,
-        "user": m.user,
+        "user": _public_user_payload(m.user),
     }
 
 
@@ -46,15 +66,87 @@ def _resolve_guest_payload(g: GameGuest) -> dict:
     }
 
 
-def _pick_two_with_anti_repeat(candidates: list[tuple[str, UUID]], forbidden: set[tuple[str, UUID]]) -> tuple[tuple[str, UUID], tuple[str, UUID]]:
+def _teams_payload(
+    member_sides: list[tuple[OrgMember | None, TeamSide]],
+    guest_sides: list[tuple[GameGuest | None, TeamSide]],
+) -> dict:
+    team_a_members = []
+    team_b_members = []
+    for m, team in member_sides:
+        if not m or not m.user:
+            continue
+        payload = _resolve_member_payload(m)
+        item = {
+            "org_member_id": payload["org_member_id"],
+            "nickname": payload["nickname"],
+            "member_type": payload["member_type"],
+            "included": payload["included"],
+            "billable": payload["billable"],
+            "user": payload["user"],
+        }
+        if team == TeamSide.A:
+            team_a_members.append(item)
+        else:
+            team_b_members.append(item)
+
+    team_a_guests = []
+    team_b_guests = []
+    for g, team in guest_sides:
+        if not g:
+            continue
+        payload = _resolve_guest_payload(g)
+        item = {
+            "game_guest_id": payload["game_guest_id"],
+            "name": payload["name"],
+            "phone": payload["phone"],
+            "billable": True,
+            "source": "GAME_GUEST",
+        }
+        if team == TeamSide.A:
+            team_a_guests.append(item)
+        else:
+            team_b_guests.append(item)
+
+    return {
+        "team_a": {"members": team_a_members, "guests": team_a_guests},
+        "team_b": {"members": team_b_members, "guests": team_b_guests},
+    }
+
+
+def _pick_two_with_anti_repeat(
+    candidates: list[tuple[str, UUID]],
+    forbidden: set[tuple[str, UUID]],
+    captain_counts: dict[UUID, int] | None = None,
+) -> tuple[tuple[str, UUID], tuple[str, UUID]]:
     available = [c for c in candidates if c not in forbidden]
     pool = available if len(available) >= 2 else candidates
     if len(pool) < 2:
         raise HTTPException(status_code=400, detail="Not enough eligible captains")
+    members = [c for c in pool if c[0] == "MEMBER"]
+    if captain_counts and len(members) >= 2:
+        # sorteia só entre os membros que foram capitão menos vezes (empate no 2º menor entra).
+        # Convidado não tem histórico: fica fora do corte (contar 0 puxaria o corte para 0
+        # e deixaria praticamente só convidados no sorteio) e continua elegível.
+        counts = sorted(captain_counts.get(c[1], 0) for c in members)
+        pool = [c for c in pool if c[0] != "MEMBER" or captain_counts.get(c[1], 0) <= counts[1]]
     chosen = random.sample(pool, 2)
     return chosen[0], chosen[1]
 
 
+_DEFAULT_SKILL_RATING = 5.0
+
+
+def _enqueue_pairing_record(db: Session, game: Game) -> None:
+    # um job pendente por jogo: refinalizar antes do worker rodar não enfileira de novo
+    enqueue(
+        db,
+        PAIRING_RECORD,
+        {"org_id": str(game.org_id), "game_id": str(game.id)},
+        org_id=game.org_id,
+        dedupe_key=f"pairing:{game.id}",
+    )
+
+
 def _draft_turn(order_mode: str, pick_index: int) -> TeamSide:
     mode = (order_mode or "ABBA").upper()
     if mode != "ABBA":
@@ -63,6 +155,7 @@ def _draft_turn(order_mode: str, pick_index: int) -> TeamSide:
     return seq[pick_index % len(seq)]
 
 @router.post("/orgs/{org_id}/games", response_model=GameSchema)
+@idempotent
 def create_game(
     org_id: UUID,
     game_in: GameCreate,
@@ -137,7 +230,7 @@ def get_game_detail(
                 "included": included,
                 "billable": not included,
                 "nickname": r.org_member.nickname,
-                "user": r.org_member.user,
+                "user": _public_user_payload(r.org_member.user),
             }
         )
 
@@ -294,30 +387,33 @@ def get_game_detail(
     if draft_status == DraftStatus.IN_PROGRESS:
         current_turn = _draft_turn(draft_order_mode, draft_pick_index)
 
-    return {
-        "id": game.id,
-        "org_id": game.org_id,
-        "title": game.title,
-        "sport": game.sport,
-        "location": game.location,
-        "start_at": game.start_at,
-        "created_by": created_by,
-        "attendance_summary": {
-            "going_count": going_count,
-            "maybe_count": maybe_count,
-            "not_going_count": not_going_count,
-        },
-        "attendance_list": attendance_list,
-        "game_guests": game_guests,
-        "captains": {"captain_a": captain_a, "captain_b": captain_b},
-        "teams": teams,
-        "draft": {
-            "status": draft_status,
-            "current_turn_team_side": current_turn,
-            "picks_count": picks_count,
-            "remaining_count": remaining_count,
-        },
-    }
+    # payload já em tipos primitivos: vai direto pro orjson, sem revalidar o GameDetailResponse
+    return FastJSONResponse(
+        {
+            "id": game.id,
+            "org_id": game.org_id,
+            "title": game.title,
+            "sport": game.sport,
+            "location": game.location,
+            "start_at": game.start_at,
+            "created_by": created_by,
+            "attendance_summary": {
+                "going_count": going_count,
+                "maybe_count": maybe_count,
+                "not_going_count": not_going_count,
+            },
+            "attendance_list": attendance_list,
+            "game_guests": game_guests,
+            "captains": {"captain_a": captain_a, "captain_b": captain_b},
+            "teams": teams,
+            "draft": {
+                "status": draft_status,
+                "current_turn_team_side": current_turn,
+                "picks_count": picks_count,
+                "remaining_count": remaining_count,
+            },
+        }
+    )
 
 
 @router.put("/orgs/{org_id}/games/{game_id}/captains", response_model=CaptainsResolved)
@@ -461,7 +557,8 @@ def set_game_captains(
         if prev.captain_b_guest_id:
             forbidden.add(("GUEST", prev.captain_b_guest_id))
 
-    cap_a, cap_b = _pick_two_with_anti_repeat(candidates=candidates, forbidden=forbidden)
+    captain_counts = load_captain_counts(db, org_id, [c[1] for c in candidates if c[0] == "MEMBER"])
+    cap_a, cap_b = _pick_two_with_anti_repeat(candidates=candidates, forbidden=forbidden, captain_counts=captain_counts)
 
     def resolve_tuple(t: tuple[str, UUID]) -> dict:
         if t[0] == "MEMBER":
@@ -527,47 +624,124 @@ def get_game_teams(
         .all()
     )
 
-    team_a_members = []
-    team_b_members = []
-    for r in member_rows:
-        if not r.org_member or not r.org_member.user:
-            continue
-        payload = _resolve_member_payload(r.org_member)
-        item = {
-            "org_member_id": payload["org_member_id"],
-            "nickname": payload["nickname"],
-            "member_type": payload["member_type"],
-            "included": payload["included"],
-            "billable": payload["billable"],
-            "user": payload["user"],
-        }
-        if r.team == TeamSide.A:
-            team_a_members.append(item)
-        else:
-            team_b_members.append(item)
+    return _teams_payload(
+        [(r.org_member, r.team) for r in member_rows],
+        [(r.game_guest, r.team) for r in guest_rows],
+    )
 
-    team_a_guests = []
-    team_b_guests = []
-    for r in guest_rows:
-        if not r.game_guest:
-            continue
-        payload = _resolve_guest_payload(r.game_guest)
-        item = {
-            "game_guest_id": payload["game_guest_id"],
-            "name": payload["name"],
-            "phone": payload["phone"],
-            "billable": True,
-            "source": "GAME_GUEST",
-        }
-        if r.team == TeamSide.A:
-            team_a_guests.append(item)
+
+@router.post("/orgs/{org_id}/games/{game_id}/teams/auto-balance", response_model=TeamsResponse)
+def auto_balance_game_teams(
+    org_id: UUID,
+    game_id: UUID,
+    payload: TeamAutoBalanceRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    require_org_admin(org_id=org_id, db=db, current_user=current_user)
+
+    game = db.query(Game).filter(Game.id == game_id, Game.org_id == org_id).first()
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    if payload.recent_days is not None and payload.recent_days <= 0:
+        raise HTTPException(status_code=400, detail="recent_days must be > 0")
+
+    draft = db.query(GameDraft.status).filter(GameDraft.org_id == org_id, GameDraft.game_id == game_id).first()
+    if draft and draft.status == DraftStatus.IN_PROGRESS:
+        raise HTTPException(status_code=409, detail="Draft is in progress")
+
+    member_rows = (
+        db.query(OrgMember.id, OrgMember.skill_rating)
+        .join(GameAttendance, GameAttendance.org_member_id == OrgMember.id)
+        .filter(
+            GameAttendance.org_id == org_id,
+            GameAttendance.game_id == game_id,
+            GameAttendance.status == AttendanceStatus.GOING,
+        )
+        .distinct()
+        .all()
+    )
+    guest_ids = [
+        r[0] for r in db.query(GameGuest.id).filter(GameGuest.org_id == org_id, GameGuest.game_id == game_id).all()
+    ]
+
+    member_ids = [r.id for r in member_rows]
+    players: list[tuple[str, UUID]] = [("MEMBER", mid) for mid in member_ids] + [("GUEST", gid) for gid in guest_ids]
+    if len(players) < 2:
+        raise HTTPException(status_code=400, detail="Not enough players")
+
+    # numpy só é carregado no primeiro auto-balance, fora do cold start do worker
+    import numpy as np
+
+    from app.services.team_balance import balance_teams
+
+    # sem avaliação (membro sem skill_rating, convidado) -> mediana do grupo
+    known = [float(r.skill_rating) for r in member_rows if r.skill_rating is not None]
+    fallback = float(median(known)) if known else _DEFAULT_SKILL_RATING
+    ratings = np.array(
+        [float(r.skill_rating) if r.skill_rating is not None else fallback for r in member_rows]
+        + [fallback] * len(guest_ids)
+    )
+
+    # duplas repetidas desde sempre (org_pair_history, padrão) ou, se pedido, só nos últimos
+    # recent_days (snapshots dos jogos); convidados não têm histórico
+    since = None
+    if payload.recent_days:
+        since = datetime.now(timezone.utc) - timedelta(days=payload.recent_days)
+    pairs = np.zeros((len(players), len(players)))
+    k = len(member_ids)
+    pairs[:k, :k] = load_pair_matrix(db, org_id, member_ids, since=since)
+
+    locked = np.zeros(len(players))
+    if payload.keep_captains:
+        index = {p: i for i, p in enumerate(players)}
+        cap_a = ("MEMBER", game.captain_a_member_id) if game.captain_a_member_id else ("GUEST", game.captain_a_guest_id)
+        cap_b = ("MEMBER", game.captain_b_member_id) if game.captain_b_member_id else ("GUEST", game.captain_b_guest_id)
+        if cap_a in index:
+            locked[index[cap_a]] = 1.0
+        if cap_b in index and cap_b != cap_a:
+            locked[index[cap_b]] = -1.0
+
+    result = balance_teams(ratings, pairs, locked, seed=payload.seed)
+
+    member_values = []
+    guest_values = []
+    for (ptype, pid), side in zip(players, result.sides):
+        team = TeamSide.A if side > 0 else TeamSide.B
+        if ptype == "MEMBER":
+            member_values.append({"org_id": org_id, "game_id": game_id, "org_member_id": pid, "team": team})
         else:
-            team_b_guests.append(item)
+            guest_values.append({"org_id": org_id, "game_id": game_id, "game_guest_id": pid, "team": team})
+
+    db.execute(delete(GameTeamMember).where(GameTeamMember.org_id == org_id, GameTeamMember.game_id == game_id))
+    db.execute(delete(GameTeamGuest).where(GameTeamGuest.org_id == org_id, GameTeamGuest.game_id == game_id))
+    if member_values:
+        db.execute(insert(GameTeamMember), member_values)
+    if guest_values:
+        db.execute(insert(GameTeamGuest), guest_values)
+    db.commit()
 
-    return {
-        "team_a": {"members": team_a_members, "guests": team_a_guests},
-        "team_b": {"members": team_b_members, "guests": team_b_guests},
-    }
+    return get_game_teams(org_id=org_id, game_id=game_id, db=db, current_user=current_user)
+
+
+@router.post("/orgs/{org_id}/games/{game_id}/teams/finalize", response_model=TeamsResponse)
+def finalize_game_teams(
+    org_id: UUID,
+    game_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    require_org_admin(org_id=org_id, db=db, current_user=current_user)
+
+    game = db.query(Game).filter(Game.id == game_id, Game.org_id == org_id).first()
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    # histórico de duplas sai do request: o worker aplica o diff (idempotente) depois do commit
+    _enqueue_pairing_record(db, game)
+    db.commit()
+    return get_game_teams(org_id=org_id, game_id=game_id, db=db, current_user=current_user)
 
 
 @router.post("/orgs/{org_id}/games/{game_id}/draft/start", response_model=DraftStateResponse)
@@ -745,6 +919,10 @@ def finish_draft(
     if draft.status != DraftStatus.IN_PROGRESS:
         raise HTTPException(status_code=409, detail="Draft is not in progress")
     draft.status = DraftStatus.FINISHED
+
+    game = db.query(Game).filter(Game.id == game_id, Game.org_id == org_id).first()
+    if game:
+        _enqueue_pairing_record(db, game)
     db.commit()
     return get_draft(org_id=org_id, game_id=game_id, db=db, current_user=current_user)
 
@@ -852,69 +1030,147 @@ def set_game_team_assignment(
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    ttype = (payload.target.type or "").upper()
-    tid = payload.target.id
-    team = payload.team.upper() if payload.team else None
-    if team not in ("A", "B", None):
-        raise HTTPException(status_code=400, detail="Invalid team")
+    items = list(payload.assignments or [])
+    if payload.target is not None:
+        items.append(TeamAssignment(target=payload.target, team=payload.team))
+    if not items:
+        raise HTTPException(status_code=400, detail="No assignments")
+
+    # alvo -> time desejado (None = remover); último valor ganha
+    wanted_members: dict[UUID, TeamSide | None] = {}
+    wanted_guests: dict[UUID, TeamSide | None] = {}
+    for it in items:
+        ttype = (it.target.type or "").upper()
+        team = it.team.upper() if it.team else None
+        if team not in ("A", "B", None):
+            raise HTTPException(status_code=400, detail="Invalid team")
+        side = None if team is None else (TeamSide.A if team == "A" else TeamSide.B)
+        if ttype == "MEMBER":
+            wanted_members[it.target.id] = side
+        elif ttype == "GUEST":
+            wanted_guests[it.target.id] = side
+        else:
+            raise HTTPException(status_code=400, detail="Invalid target type")
 
-    if ttype == "MEMBER":
-        going = (
-            db.query(GameAttendance)
-            .filter(
+    # 1) membros: atribuição atual + elegibilidade (GOING) numa query só
+    member_rows = (
+        db.query(OrgMember, GameTeamMember.team, GameAttendance.id)
+        .options(joinedload(OrgMember.user))
+        .outerjoin(
+            GameTeamMember,
+            and_(
+                GameTeamMember.org_member_id == OrgMember.id,
+                GameTeamMember.org_id == org_id,
+                GameTeamMember.game_id == game_id,
+            ),
+        )
+        .outerjoin(
+            GameAttendance,
+            and_(
+                GameAttendance.org_member_id == OrgMember.id,
                 GameAttendance.org_id == org_id,
                 GameAttendance.game_id == game_id,
-                GameAttendance.org_member_id == tid,
                 GameAttendance.status == AttendanceStatus.GOING,
-            )
-            .first()
+            ),
         )
-        if not going:
-            raise HTTPException(status_code=409, detail="Member is not GOING")
-
-        row = (
-            db.query(GameTeamMember)
-            .filter(GameTeamMember.org_id == org_id, GameTeamMember.game_id == game_id, GameTeamMember.org_member_id == tid)
-            .first()
+        .filter(
+            OrgMember.org_id == org_id,
+            or_(OrgMember.id.in_(list(wanted_members)), GameTeamMember.id.isnot(None)),
         )
-        if team is None:
-            if row:
-                db.delete(row)
-        else:
-            side = TeamSide.A if team == "A" else TeamSide.B
-            if row:
-                row.team = side
-            else:
-                db.add(GameTeamMember(org_id=org_id, game_id=game_id, org_member_id=tid, team=side))
-
-    elif ttype == "GUEST":
-        gg = (
-            db.query(GameGuest)
-            .filter(GameGuest.id == tid, GameGuest.org_id == org_id, GameGuest.game_id == game_id)
-            .first()
+        .all()
+    )
+    # 2) convidados do jogo + atribuição atual
+    guest_rows = (
+        db.query(GameGuest, GameTeamGuest.team)
+        .outerjoin(
+            GameTeamGuest,
+            and_(
+                GameTeamGuest.game_guest_id == GameGuest.id,
+                GameTeamGuest.org_id == org_id,
+                GameTeamGuest.game_id == game_id,
+            ),
         )
-        if not gg:
+        .filter(GameGuest.org_id == org_id, GameGuest.game_id == game_id)
+        .all()
+    )
+
+    members_by_id = {m.id: m for m, _, _ in member_rows}
+    member_sides: dict[UUID, TeamSide] = {m.id: team for m, team, _ in member_rows if team is not None}
+    going_ids = {m.id for m, _, attendance_id in member_rows if attendance_id is not None}
+    guests_by_id = {g.id: g for g, _ in guest_rows}
+    guest_sides: dict[UUID, TeamSide] = {g.id: team for g, team in guest_rows if team is not None}
+
+    for mid in wanted_members:
+        if mid not in going_ids:
+            raise HTTPException(status_code=409, detail="Member is not GOING")
+    for gid in wanted_guests:
+        if gid not in guests_by_id:
             raise HTTPException(status_code=404, detail="Game guest not found")
 
-        row = (
-            db.query(GameTeamGuest)
-            .filter(GameTeamGuest.org_id == org_id, GameTeamGuest.game_id == game_id, GameTeamGuest.game_guest_id == tid)
-            .first()
+    # diff -> delete em lote + upsert em lote
+    member_delete = [mid for mid, side in wanted_members.items() if side is None and mid in member_sides]
+    member_upsert = [
+        {"org_id": org_id, "game_id": game_id, "org_member_id": mid, "team": side}
+        for mid, side in wanted_members.items()
+        if side is not None and member_sides.get(mid) != side
+    ]
+    guest_delete = [gid for gid, side in wanted_guests.items() if side is None and gid in guest_sides]
+    guest_upsert = [
+        {"org_id": org_id, "game_id": game_id, "game_guest_id": gid, "team": side}
+        for gid, side in wanted_guests.items()
+        if side is not None and guest_sides.get(gid) != side
+    ]
+
+    if member_delete:
+        db.execute(
+            delete(GameTeamMember).where(
+                GameTeamMember.org_id == org_id,
+                GameTeamMember.game_id == game_id,
+                GameTeamMember.org_member_id.in_(member_delete),
+            )
+        )
+    if member_upsert:
+        stmt = pg_insert(GameTeamMember)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_game_team_members_game_member",
+            set_={"team": stmt.excluded.team, "updated_at": func.now()},
+        )
+        db.execute(stmt, member_upsert)
+    if guest_delete:
+        db.execute(
+            delete(GameTeamGuest).where(
+                GameTeamGuest.org_id == org_id,
+                GameTeamGuest.game_id == game_id,
+                GameTeamGuest.game_guest_id.in_(guest_delete),
+            )
+        )
+    if guest_upsert:
+        stmt = pg_insert(GameTeamGuest)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_game_team_guests_game_guest",
+            set_={"team": stmt.excluded.team, "updated_at": func.now()},
         )
-        if team is None:
-            if row:
-                db.delete(row)
+        db.execute(stmt, guest_upsert)
+
+    # estado final montado em memória (sem reler as tabelas de times)
+    for mid, side in wanted_members.items():
+        if side is None:
+            member_sides.pop(mid, None)
         else:
-            side = TeamSide.A if team == "A" else TeamSide.B
-            if row:
-                row.team = side
-            else:
-                db.add(GameTeamGuest(org_id=org_id, game_id=game_id, game_guest_id=tid, team=side))
-    else:
-        raise HTTPException(status_code=400, detail="Invalid target type")
+            member_sides[mid] = side
+    for gid, side in wanted_guests.items():
+        if side is None:
+            guest_sides.pop(gid, None)
+        else:
+            guest_sides[gid] = side
 
+    # payload ANTES do commit: expire_on_commit faria um SELECT de refresh por membro/convidado
+    result = _teams_payload(
+        [(members_by_id[mid], side) for mid, side in member_sides.items()],
+        [(guests_by_id[gid], side) for gid, side in guest_sides.items()],
+    )
     db.commit()
-    return get_game_teams(org_id=org_id, game_id=game_id, db=db, current_user=current_user)
+    return result
 
 
 @router.get("/orgs/{org_id}/games/{game_id}/attendance", response_model=GameAttendanceSummary)
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.responses import FastJSONResponse
 from app.db.session import get_db
 from app.models.game import Game
 from app.models.game_guest import GameGuest
@@ -30,6 +32,35 @@ def _norm(s: str | None) -> str | None:
     return v if v else None
 
 
+def _name_key():
+    # mesma expressão do índice ix_org_guests_org_name_norm
+    return func.lower(func.btrim(OrgGuest.name))
+
+
+def _like_prefix(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def _org_guest_payload(r) -> dict:
+    # formato de OrgGuestResponse
+    return {
+        "name": r.name,
+        "phone": r.phone,
+        "id": r.id,
+        "org_id": r.org_id,
+        "created_at": r.created_at,
+        "updated_at": r.updated_at,
+    }
+
+
+def _unique_violation(exc: IntegrityError) -> str | None:
+    # nome do índice UNIQUE violado (psycopg2 unique_violation = 23505)
+    if getattr(exc.orig, "pgcode", None) != "23505":
+        return None
+    return getattr(getattr(exc.orig, "diag", None), "constraint_name", None)
+
+
 @router.get("/orgs/{org_id}/guests", response_model=list[OrgGuestResponse])
 def list_org_guests(
     org_id: UUID,
@@ -37,7 +68,38 @@ def list_org_guests(
     current_user: User = Depends(get_current_user),
 ):
     require_org_member(org_id=org_id, db=db, current_user=current_user)
-    return db.query(OrgGuest).filter(OrgGuest.org_id == org_id).order_by(OrgGuest.created_at.asc()).all()
+    rows = (
+        db.query(OrgGuest.id, OrgGuest.org_id, OrgGuest.name, OrgGuest.phone, OrgGuest.created_at, OrgGuest.updated_at)
+        .filter(OrgGuest.org_id == org_id)
+        .order_by(OrgGuest.created_at.asc())
+        .all()
+    )
+    return FastJSONResponse([_org_guest_payload(r) for r in rows])
+
+
+@router.get("/orgs/{org_id}/guests/search", response_model=list[OrgGuestResponse])
+def search_org_guests(
+    org_id: UUID,
+    q: str = Query(min_length=1, max_length=255),
+    limit: int = Query(default=10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    require_org_member(org_id=org_id, db=db, current_user=current_user)
+
+    term = _norm(q)
+    if not term:
+        return []
+
+    # prefix match em lower(btrim(name)) -> usa ix_org_guests_org_name_norm (text_pattern_ops)
+    name_key = _name_key()
+    return (
+        db.query(OrgGuest)
+        .filter(OrgGuest.org_id == org_id, name_key.like(_like_prefix(term.lower()), escape="\\"))
+        .order_by(name_key.asc(), OrgGuest.id.asc())
+        .limit(limit)
+        .all()
+    )
 
 
 @router.post("/orgs/{org_id}/guests", response_model=OrgGuestResponse)
@@ -54,18 +116,15 @@ def create_org_guest(
         raise HTTPException(status_code=400, detail="name is required")
     phone = _norm(payload.phone)
 
-    if phone:
-        existing = (
-            db.query(OrgGuest)
-            .filter(OrgGuest.org_id == org_id, OrgGuest.phone == phone)
-            .first()
-        )
-        if existing:
-            raise HTTPException(status_code=409, detail="Guest with this phone already exists")
-
     guest = OrgGuest(org_id=org_id, name=name, phone=phone)
     db.add(guest)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if _unique_violation(e) == "uq_org_guests_org_phone":
+            raise HTTPException(status_code=409, detail="Guest with this phone already exists")
+        raise
     db.refresh(guest)
     return guest
 
@@ -91,18 +150,15 @@ def update_org_guest(
             raise HTTPException(status_code=400, detail="name cannot be empty")
         guest.name = name
     if "phone" in data:
-        phone = _norm(data["phone"])
-        if phone:
-            existing = (
-                db.query(OrgGuest)
-                .filter(OrgGuest.org_id == org_id, OrgGuest.phone == phone, OrgGuest.id != guest_id)
-                .first()
-            )
-            if existing:
-                raise HTTPException(status_code=409, detail="Guest with this phone already exists")
-        guest.phone = phone
+        guest.phone = _norm(data["phone"])
 
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if _unique_violation(e) == "uq_org_guests_org_phone":
+            raise HTTPException(status_code=409, detail="Guest with this phone already exists")
+        raise
     db.refresh(guest)
     return guest
 
@@ -120,7 +176,8 @@ def delete_org_guest(
     if not guest:
         raise HTTPException(status_code=404, detail="Guest not found")
 
-    in_use = db.query(GameGuest).filter(GameGuest.org_guest_id == guest_id).first()
+    # index-only probe em ix_game_guests_org_guest_id
+    in_use = db.query(GameGuest.id).filter(GameGuest.org_guest_id == guest_id).limit(1).first()
     if in_use:
         raise HTTPException(status_code=409, detail="Guest is in use by game guests")
 
@@ -203,18 +260,6 @@ def create_game_guest(
         phone = _norm(payload.phone)
         org_guest_id = None
 
-    exists = (
-        db.query(GameGuest)
-        .filter(
-            GameGuest.game_id == game_id,
-            func.lower(func.btrim(GameGuest.name)) == name.lower(),
-            func.coalesce(func.btrim(GameGuest.phone), "") == (phone or ""),
-        )
-        .first()
-    )
-    if exists:
-        raise HTTPException(status_code=409, detail="Guest already added to this game")
-
     row = GameGuest(
         org_id=org_id,
         game_id=game_id,
@@ -224,7 +269,13 @@ def create_game_guest(
         created_by_member_id=membership.id,
     )
     db.add(row)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if _unique_violation(e) == "uq_game_guests_game_name_phone":
+            raise HTTPException(status_code=409, detail="Guest already added to this game")
+        raise
     db.refresh(row)
 
     return GameGuestResponse(
@@ -1,42 +1,45 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Header, HTTPException
+import time
+
+from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
+from app.core.metrics import BILLING_CHARGES_CREATED, BILLING_ORG_DURATION, BILLING_RUN_DURATION
 from app.db.session import get_db
 from app.models.organization import Organization
-from app.routers.billing import _generate_charges_core  # <-- IMPORT CERTO
+from app.services.billing_service import generate_charges_for_org
+from app.routers.deps import require_internal_key
 
 router = APIRouter()
 
 
-def _require_internal_key(x_internal_key: str | None):
-    expected = getattr(settings, "INTERNAL_KEY", None)
-    if not expected:
-        raise HTTPException(status_code=500, detail="INTERNAL_KEY não configurado")
-    if not x_internal_key or x_internal_key != expected:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-
-
-@router.post("/internal/billing/run")
-def run_billing(
-    db: Session = Depends(get_db),
-    x_internal_key: str | None = Header(default=None),
-):
-    _require_internal_key(x_internal_key)
-
+@router.post("/internal/billing/run", dependencies=[Depends(require_internal_key)])
+def run_billing(db: Session = Depends(get_db)):
+    run_started = time.perf_counter()
     org_ids = [row[0] for row in db.query(Organization.id).all()]
 
     results = []
     for org_id in org_ids:
-        r = _generate_charges_core(
+        org_started = time.perf_counter()
+        r = generate_charges_for_org(
             db=db,
             org_id=org_id,
             force=False,
             cycle_key_override=None,
             created_by_id=None,
         )
+        BILLING_ORG_DURATION.observe(time.perf_counter() - org_started)
+        BILLING_CHARGES_CREATED.inc(r.get("created", 0))
         results.append({"org_id": str(org_id), **r})
 
+    BILLING_RUN_DURATION.observe(time.perf_counter() - run_started)
     return {"orgs": len(org_ids), "results": results}
+
+
+@router.get("/internal/billing/schedule", dependencies=[Depends(require_internal_key)])
+def billing_schedule(limit: int = 50):
+    # próximas viradas de ciclo no scheduler deste processo
+    from app.services.billing_scheduler import BILLING_SCHEDULER
+
+    return {"upcoming": BILLING_SCHEDULER.upcoming(limit=min(max(limit, 1), 1000))}
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.db.slow_queries import STATEMENTS
+from app.routers.deps import require_internal_key
+
+router = APIRouter(dependencies=[Depends(require_internal_key)])
+
+
+@router.get("/internal/db/statements")
+def list_statements(
+    limit: int = Query(default=50, ge=1, le=500),
+    order_by: str = Query(default="total_ms"),
+):
+    try:
+        rows = STATEMENTS.top(limit=limit, order_by=order_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"order_by": order_by, "statements": rows}
+
+
+@router.delete("/internal/db/statements")
+def reset_statements():
+    STATEMENTS.reset()
+    return {"ok": True}
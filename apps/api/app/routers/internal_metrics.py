@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import REGISTRY
+from app.routers.deps import require_internal_key
+
+router = APIRouter()
+
+
+@router.get(
+    "/internal/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_internal_key)],
+)
+def read_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.core.profiler import PROFILER
+from app.routers.deps import require_internal_key
+from app.schemas.profiler import ProfilerConfigUpdate
+
+router = APIRouter(dependencies=[Depends(require_internal_key)])
+
+
+@router.get("/internal/profiler")
+def get_profiler_status():
+    return PROFILER.status()
+
+
+@router.put("/internal/profiler")
+def update_profiler(payload: ProfilerConfigUpdate):
+    PROFILER.update(**payload.model_dump(exclude_none=True))
+    return PROFILER.status()
+
+
+@router.get("/internal/profiler/collapsed", response_class=PlainTextResponse)
+def get_collapsed_stacks(route: str | None = None):
+    # formato "collapsed" do flamegraph.pl / speedscope; sem route = todas, prefixadas pela rota
+    return PlainTextResponse(PROFILER.collapsed(route))
+
+
+@router.delete("/internal/profiler")
+def reset_profiler():
+    PROFILER.reset()
+    return {"ok": True}
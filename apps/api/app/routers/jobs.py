@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models.background_job import BackgroundJob
+from app.models.user import User
+from app.routers.deps import get_current_user, require_org_member
+from app.schemas.job import BackgroundJobResponse
+
+router = APIRouter()
+
+
+@router.get("/orgs/{org_id}/jobs/{job_id}", response_model=BackgroundJobResponse)
+def get_job(
+    org_id: UUID,
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    require_org_member(org_id=org_id, db=db, current_user=current_user)
+
+    job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id, BackgroundJob.org_id == org_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
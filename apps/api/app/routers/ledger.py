@@ -3,7 +3,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
-from app.db.session import get_db
+from app.core.idempotency import idempotent
+from app.core.responses import FastJSONResponse
+from app.db.partitions import ensure_ledger_partition_for
+from app.db.session import engine, get_db
 from app.models.ledger import LedgerEntry, LedgerType
 from app.models.org_member import OrgMember, OrgRole
 from app.schemas.ledger import LedgerEntryCreate, LedgerEntry as LedgerEntrySchema
@@ -14,7 +17,36 @@ from app.routers.deps import require_org_member
 
 router = APIRouter()
 
+
+# leitura só das colunas do response: tuplas, sem identity map/change tracking
+_LEDGER_COLUMNS = (
+    LedgerEntry.id,
+    LedgerEntry.org_id,
+    LedgerEntry.type,
+    LedgerEntry.amount,
+    LedgerEntry.description,
+    LedgerEntry.occurred_at,
+    LedgerEntry.related_member_id,
+    LedgerEntry.created_by_id,
+)
+
+
+def _ledger_entry_payload(x) -> dict:
+    # mesmo formato de schemas.ledger.LedgerEntry, sem passar pelo pydantic
+    return {
+        "type": x.type,
+        "amount": float(x.amount),
+        "description": x.description,
+        "occurred_at": x.occurred_at,
+        "related_member_id": x.related_member_id,
+        "id": x.id,
+        "org_id": x.org_id,
+        "created_by_id": x.created_by_id,
+    }
+
+
 @router.post("/orgs/{org_id}/ledger", response_model=LedgerEntrySchema)
+@idempotent
 def create_ledger_entry(
     org_id: UUID,
     entry_in: LedgerEntryCreate,
@@ -31,6 +63,10 @@ def create_ledger_entry(
     if membership is None or membership.role not in [OrgRole.ADMIN, OrgRole.OWNER]:
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    try:
+        ensure_ledger_partition_for(engine, entry_in.occurred_at)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     entry = LedgerEntry(
         **entry_in.model_dump(),
         org_id=org_id,
@@ -49,7 +85,8 @@ def read_ledger(
     current_user: User = Depends(get_current_user),
 ):
     require_org_member(org_id=org_id, db=db, current_user=current_user)
-    return db.query(LedgerEntry).filter(LedgerEntry.org_id == org_id).all()
+    rows = db.query(*_LEDGER_COLUMNS).filter(LedgerEntry.org_id == org_id).all()
+    return FastJSONResponse([_ledger_entry_payload(x) for x in rows])
 
 @router.get("/orgs/{org_id}/ledger/summary")
 def get_ledger_summary(
@@ -3,6 +3,7 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
 
+from app.core.responses import FastJSONResponse
 from app.db.session import get_db
 from app.models.org_member import OrgMember, OrgRole
 from app.models.user import User
@@ -33,6 +34,23 @@ def _count_owners(db: Session, org_id: UUID) -> int:
     )
 
 
+def _member_row_payload(r) -> dict:
+    # formato de OrgMemberResponse
+    return {
+        "id": r.id,
+        "user_id": r.user_id,
+        "org_id": r.org_id,
+        "role": r.role,
+        "member_type": r.member_type,
+        "nickname": r.nickname,
+        "is_active": r.is_active,
+        "skill_rating": r.skill_rating,
+        "created_at": r.created_at,
+        "updated_at": r.updated_at,
+        "user": {"id": r.user_id, "email": r.email, "full_name": r.full_name},
+    }
+
+
 def _can_manage(current_role: OrgRole, target_role: OrgRole) -> bool:
     if current_role == OrgRole.OWNER:
         return True
@@ -48,14 +66,28 @@ def list_members(
     current_user: User = Depends(get_current_user),
 ):
     require_org_member(org_id=org_id, db=db, current_user=current_user)
-    members = (
-        db.query(OrgMember)
-        .options(joinedload(OrgMember.user))
+    # colunas do membro + do usuário num JOIN, sem montar OrgMember/User
+    rows = (
+        db.query(
+            OrgMember.id,
+            OrgMember.user_id,
+            OrgMember.org_id,
+            OrgMember.role,
+            OrgMember.member_type,
+            OrgMember.nickname,
+            OrgMember.is_active,
+            OrgMember.skill_rating,
+            OrgMember.created_at,
+            OrgMember.updated_at,
+            User.email,
+            User.full_name,
+        )
+        .join(User, User.id == OrgMember.user_id)
         .filter(OrgMember.org_id == org_id)
         .order_by(OrgMember.created_at.asc())
         .all()
     )
-    return members
+    return FastJSONResponse([_member_row_payload(r) for r in rows])
 
 
 @router.post("/orgs/{org_id}/members", response_model=OrgMemberResponse)
@@ -156,14 +188,19 @@ def update_member(
     wants_nickname = "nickname" in data
     wants_member_type = "member_type" in data
     wants_is_active = "is_active" in data
+    wants_skill_rating = "skill_rating" in data
 
     is_admin = my_membership.role in (OrgRole.OWNER, OrgRole.ADMIN)
     is_self = my_membership.id == target.id
 
-    if wants_member_type or wants_is_active:
+    if wants_member_type or wants_is_active or wants_skill_rating:
         if not is_admin:
             raise HTTPException(status_code=403, detail="insufficient role")
 
+    if wants_skill_rating and data["skill_rating"] is not None:
+        if data["skill_rating"] < 1 or data["skill_rating"] > 10:
+            raise HTTPException(status_code=400, detail="skill_rating must be between 1 and 10")
+
     if wants_nickname:
         if not (is_admin or is_self):
             raise HTTPException(status_code=403, detail="insufficient role")
@@ -172,6 +209,8 @@ def update_member(
         target.member_type = data["member_type"]
     if wants_is_active:
         target.is_active = data["is_active"]
+    if wants_skill_rating:
+        target.skill_rating = data["skill_rating"]
 
     db.commit()
     db.refresh(target)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from decimal import Decimal, InvalidOperation
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import Numeric, and_, cast, func, literal, null, or_, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models.org_guest import OrgGuest
+from app.models.org_member import OrgMember
+from app.models.user import User
+from app.routers.deps import get_current_user, require_org_member
+from app.schemas.search import PeopleSearchResponse
+
+router = APIRouter()
+
+# similarity() devolve real; arredondar p/ numeric deixa o cursor (score, type, id) estável
+_SCORE_SCALE = 6
+
+
+def _contains(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _matches(col, term: str, pattern: str):
+    # `%` (pg_trgm) e ILIKE '%x%' são ambos atendidos pelos índices GIN gin_trgm_ops
+    # (org_members/org_guests: GIN (org_id, coluna) -> candidatos já filtrados pela org)
+    return or_(col.op("%")(term), col.ilike(pattern, escape="\\"))
+
+
+def _score(*cols, term: str):
+    sims = [func.similarity(func.coalesce(c, ""), term) for c in cols]
+    best = sims[0] if len(sims) == 1 else func.greatest(*sims)
+    return func.round(cast(best, Numeric), _SCORE_SCALE)
+
+
+def _encode_cursor(score: Decimal, kind: str, row_id: UUID) -> str:
+    return f"{score}:{kind}:{row_id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[Decimal, str, UUID]:
+    try:
+        score, kind, row_id = cursor.split(":", 2)
+        if kind not in ("MEMBER", "GUEST"):
+            raise ValueError(kind)
+        return Decimal(score), kind, UUID(row_id)
+    except (ValueError, InvalidOperation):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/orgs/{org_id}/search", response_model=PeopleSearchResponse)
+def search_people(
+    org_id: UUID,
+    q: str = Query(min_length=1, max_length=255),
+    type: str | None = Query(default=None, description="MEMBER | GUEST"),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    require_org_member(org_id=org_id, db=db, current_user=current_user)
+
+    term = q.strip()
+    if not term:
+        return {"items": [], "next_cursor": None}
+
+    kind_filter = (type or "").upper() or None
+    if kind_filter not in (None, "MEMBER", "GUEST"):
+        raise HTTPException(status_code=400, detail="Invalid type")
+
+    pattern = _contains(term)
+    parts = []
+
+    if kind_filter in (None, "MEMBER"):
+        parts.append(
+            select(
+                literal("MEMBER").label("type"),
+                OrgMember.id.label("id"),
+                func.coalesce(OrgMember.nickname, User.full_name, User.email).label("label"),
+                OrgMember.nickname.label("nickname"),
+                User.full_name.label("full_name"),
+                User.email.label("email"),
+                User.phone.label("phone"),
+                _score(OrgMember.nickname, User.full_name, User.email, term=term).label("score"),
+            )
+            .join(User, User.id == OrgMember.user_id)
+            .where(
+                OrgMember.org_id == org_id,
+                or_(
+                    _matches(OrgMember.nickname, term, pattern),
+                    _matches(User.full_name, term, pattern),
+                    _matches(User.email, term, pattern),
+                ),
+            )
+        )
+
+    if kind_filter in (None, "GUEST"):
+        parts.append(
+            select(
+                literal("GUEST").label("type"),
+                OrgGuest.id.label("id"),
+                OrgGuest.name.label("label"),
+                null().label("nickname"),
+                OrgGuest.name.label("full_name"),
+                null().label("email"),
+                OrgGuest.phone.label("phone"),
+                _score(OrgGuest.name, term=term).label("score"),
+            )
+            .where(OrgGuest.org_id == org_id, _matches(OrgGuest.name, term, pattern))
+        )
+
+    hits = (parts[0] if len(parts) == 1 else union_all(*parts)).subquery("hits")
+
+    stmt = select(hits)
+    if cursor:
+        c_score, c_kind, c_id = _decode_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                hits.c.score < c_score,
+                and_(hits.c.score == c_score, tuple_(hits.c.type, hits.c.id) > tuple_(c_kind, c_id)),
+            )
+        )
+    stmt = stmt.order_by(hits.c.score.desc(), hits.c.type.asc(), hits.c.id.asc()).limit(limit + 1)
+
+    rows = db.execute(stmt).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = _encode_cursor(last.score, last.type, last.id)
+
+    return {
+        "items": [
+            {
+                "type": r.type,
+                "id": r.id,
+                "label": r.label,
+                "nickname": r.nickname,
+                "full_name": r.full_name,
+                "email": r.email,
+                "phone": r.phone,
+                "score": float(r.score),
+            }
+            for r in page
+        ],
+        "next_cursor": next_cursor,
+    }
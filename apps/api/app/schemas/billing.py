@@ -33,4 +33,9 @@ class OrgBillingSettingsResponse(OrgBillingSettingsBase):
 class GenerateChargesRequest(BaseModel):
     cycle_key: str | None = None
     force: bool = False
+    # modo range (backfill): todos os ciclos que tocam [start_date, end_date]
+    start_date: date | None = None
+    end_date: date | None = None
+    # True: só enfileira (202 + job_id); o worker gera as cobranças fora do request
+    defer: bool = False
 
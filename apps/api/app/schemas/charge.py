@@ -1,8 +1,8 @@
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.models.org_charge import ChargeStatus, ChargeType
 from app.models.org_member import OrgRole
@@ -59,3 +59,47 @@ class OrgChargeListResponse(BaseModel):
 class UpdateChargeStatusRequest(BaseModel):
     status: ChargeStatus
 
+
+class BulkChargeStatusRequest(BaseModel):
+    status: ChargeStatus
+    # alvo: lista de ids OU filtro (cycle_key + status atual)
+    charge_ids: list[UUID] | None = Field(default=None, max_length=5000)
+    cycle_key: str | None = None
+    current_status: ChargeStatus | None = None
+
+
+class BulkChargeStatusResponse(BaseModel):
+    status: ChargeStatus
+    updated: int
+    unchanged: int
+    ledger_entries_created: int
+    charge_ids: list[UUID]
+
+
+class StatementMatch(BaseModel):
+    line: int
+    posted_on: date
+    amount: float
+    charge_id: UUID
+    org_member_id: UUID
+    cycle_key: str
+    match: str
+    fitid: str | None = None
+
+
+class StatementUnmatched(BaseModel):
+    line: int
+    posted_on: date | None = None
+    amount: float | None = None
+    text: str | None = None
+    reason: str
+    detail: str | None = None
+
+
+class StatementReconcileResponse(BaseModel):
+    lines: int
+    credits: int
+    dry_run: bool
+    matched: list[StatementMatch]
+    unmatched: list[StatementUnmatched]
+    applied: BulkChargeStatusResponse | None = None
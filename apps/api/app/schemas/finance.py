@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 from pydantic import BaseModel
 
@@ -47,3 +47,24 @@ class FinanceRecentResponse(BaseModel):
 class FinanceDashboardResponse(BaseModel):
     summary: FinanceSummaryResponse
     recent: FinanceRecentResponse
+
+
+class FinanceBreakdownCycle(BaseModel):
+    cycle_key: str
+    start: datetime
+    end: datetime
+    income_total: float
+    expense_total: float
+    balance: float
+    pending_charges_total: float
+    paid_charges_total: float
+    pending_charges_count: int
+    paid_charges_count: int
+
+
+class FinanceBreakdownResponse(BaseModel):
+    org_id: UUID
+    cycle: str
+    start: date
+    end: date
+    cycles: list[FinanceBreakdownCycle]
@@ -0,0 +1,22 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.models.background_job import JobStatus
+
+
+class BackgroundJobResponse(BaseModel):
+    id: UUID
+    kind: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    created_at: datetime
+    finished_at: datetime | None = None
+    last_error: str | None = None
+    result: dict | None = None
+
+    class Config:
+        from_attributes = True
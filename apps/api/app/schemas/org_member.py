@@ -22,6 +22,7 @@ class OrgMemberUpdate(BaseModel):
     nickname: str | None = None
     member_type: MemberType | None = None
     is_active: bool | None = None
+    skill_rating: int | None = None
 
 
 class OrgMemberUser(BaseModel):
@@ -41,6 +42,7 @@ class OrgMemberResponse(BaseModel):
     member_type: MemberType
     nickname: str | None = None
     is_active: bool
+    skill_rating: int | None = None
     created_at: datetime
     updated_at: datetime
     user: OrgMemberUser
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+
+
+class ProfilerConfigUpdate(BaseModel):
+    enabled: bool | None = None
+    sample_rate: float | None = Field(default=None, ge=0.0, le=1.0)
+    interval_ms: float | None = Field(default=None, ge=1.0, le=1000.0)
+    max_concurrent: int | None = Field(default=None, ge=1, le=64)
+    max_depth: int | None = Field(default=None, ge=8, le=512)
+    max_stacks_per_route: int | None = Field(default=None, ge=100, le=100_000)
@@ -0,0 +1,19 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class PeopleSearchHit(BaseModel):
+    type: str  # "MEMBER" | "GUEST"
+    id: UUID
+    label: str
+    nickname: str | None = None
+    full_name: str | None = None
+    email: str | None = None
+    phone: str | None = None
+    score: float
+
+
+class PeopleSearchResponse(BaseModel):
+    items: list[PeopleSearchHit]
+    next_cursor: str | None = None
@@ -90,6 +90,21 @@ class TeamTarget(BaseModel):
     id: UUID
 
 
-class TeamAssignmentSetRequest(BaseModel):
+class TeamAssignment(BaseModel):
     target: TeamTarget
     team: str | None = None
+
+
+class TeamAssignmentSetRequest(BaseModel):
+    # formato antigo (um alvo) ou lote em `assignments`
+    target: TeamTarget | None = None
+    team: str | None = None
+    assignments: list[TeamAssignment] | None = None
+
+
+class TeamAutoBalanceRequest(BaseModel):
+    # None = histórico de sempre (org_pair_history, incremental). Com valor, relê os
+    # snapshots dos jogos da janela: opt-in, custo cresce com o número de jogos
+    recent_days: int | None = None
+    keep_captains: bool = True
+    seed: int | None = None
@@ -0,0 +1,75 @@
+"""Arquiva cobranças PAID/VOID e lançamentos antigos (app.services.archive).
+
+    python -m app.scripts.archive_settled                        # todas as orgs, corte = 1 ano
+    python -m app.scripts.archive_settled --org <uuid> --older-than-days 730
+    python -m app.scripts.archive_settled --enqueue              # um job por org na fila
+
+Cada lote (--batch-size linhas) é uma transação curta com lock_timeout e
+SKIP LOCKED; pode rodar com a API no ar. Rodar de novo só move o que ainda
+estiver na tabela quente.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from uuid import UUID
+
+import app.db.base  # noqa: F401  (registra todos os models)
+from app.db.session import SessionLocal
+from app.models.organization import Organization
+from app.services.archive import ARCHIVE_AFTER_DAYS, BATCH_SIZE, archive_org, default_cutoff
+from app.services.job_handlers import ARCHIVE_SETTLED
+from app.services.jobs import enqueue
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--org", type=UUID, action="append", help="só esta org (pode repetir)")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.0, help="segundos entre lotes (alivia réplica/IO)")
+    parser.add_argument("--enqueue", action="store_true", help="enfileira em vez de rodar aqui")
+    args = parser.parse_args()
+
+    if args.older_than_days < 30:
+        parser.error("--older-than-days must be >= 30")
+
+    cutoff = default_cutoff(days=args.older_than_days)
+    db = SessionLocal()
+    try:
+        org_ids = args.org or [r.id for r in db.query(Organization.id).order_by(Organization.id).all()]
+
+        if args.enqueue:
+            for org_id in org_ids:
+                enqueue(
+                    db,
+                    ARCHIVE_SETTLED,
+                    {"org_id": str(org_id), "cutoff": cutoff.isoformat(), "batch_size": args.batch_size},
+                    org_id=org_id,
+                    dedupe_key=f"archive:{org_id}",
+                )
+            db.commit()
+            print(f"OK - {len(org_ids)} archive jobs enqueued (cutoff {cutoff.isoformat()})")
+            return 0
+
+        charges = ledger = lock_timeouts = 0
+        for org_id in org_ids:
+            r = archive_org(db, org_id, cutoff=cutoff, batch_size=args.batch_size, pause_seconds=args.pause)
+            charges += r.charges
+            ledger += r.ledger_entries
+            lock_timeouts += r.lock_timeouts
+            if r.charges or r.ledger_entries:
+                print(f"  {org_id}  charges={r.charges:<8} ledger={r.ledger_entries:<8} {r.elapsed_ms:.0f}ms")
+    finally:
+        db.close()
+
+    print(
+        f"OK - archived {charges} charges and {ledger} ledger entries from {len(org_ids)} orgs "
+        f"(cutoff {cutoff.isoformat()}, {lock_timeouts} lock timeouts)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
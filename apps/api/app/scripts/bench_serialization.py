@@ -0,0 +1,227 @@
+"""CPU por response: caminho pydantic + JSONResponse vs payload direto + orjson.
+
+    python -m app.scripts.bench_serialization --rows 1000 --repeat 50
+
+Não usa banco: monta linhas em memória (models transientes / tuplas, como a query
+devolve) e mede só a serialização de cada endpoint grande. "legacy" reproduz o
+que o FastAPI faz com response_model (validate from_attributes -> dump mode=json
+-> json.dumps); "fast" é o caminho atual dos endpoints (dict de primitivos ->
+FastJSONResponse). Também confere que os dois produzem o mesmo JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+import main  # noqa: F401  (configura os mappers)
+from app.core.responses import FastJSONResponse
+from app.models.game import AttendanceStatus
+from app.models.ledger import LedgerEntry, LedgerType
+from app.models.org_charge import ChargeStatus, ChargeType, OrgCharge
+from app.models.org_member import MemberType, OrgMember, OrgRole
+from app.models.user import User
+from app.routers.billing import _charge_row_payload
+from app.routers.finance import _recent_charge_payload, _recent_ledger_payload
+from app.routers.games import _public_user_payload
+from app.routers.ledger import _ledger_entry_payload
+from app.schemas.charge import OrgChargeResponse
+from app.schemas.finance import FinanceRecentResponse
+from app.schemas.game_detail import GameDetailAttendanceItem
+from app.schemas.ledger import LedgerEntry as LedgerEntrySchema
+
+# linhas como a query por colunas devolve (Row tem acesso por atributo, igual namedtuple)
+_LedgerRow = namedtuple(
+    "_LedgerRow", "id org_id type amount description occurred_at related_member_id created_by_id"
+)
+_ChargeRow = namedtuple(
+    "_ChargeRow",
+    "id org_id org_member_id cycle_key type status amount game_id ledger_entry_id created_by_id "
+    "paid_at voided_at created_at updated_at user_id member_org_id role email full_name",
+)
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _fixtures(n: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    org_id = _uuid(rng)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    ledger = [
+        LedgerEntry(
+            id=_uuid(rng),
+            org_id=org_id,
+            type=rng.choice(list(LedgerType)),
+            amount=Decimal(rng.randint(100, 50_000)) / 100,
+            description=f"lançamento {i}",
+            occurred_at=base + timedelta(minutes=i, microseconds=rng.randint(0, 999_999)),
+            related_member_id=_uuid(rng) if i % 3 else None,
+            created_by_id=_uuid(rng),
+        )
+        for i in range(n)
+    ]
+
+    ledger_rows = [
+        _LedgerRow(
+            x.id, x.org_id, x.type, x.amount, x.description, x.occurred_at, x.related_member_id, x.created_by_id
+        )
+        for x in ledger
+    ]
+
+    members = []
+    for i in range(n):
+        user = User(id=_uuid(rng), email=f"u{i}@example.com", full_name=f"User {i}", avatar_url=None)
+        members.append(
+            OrgMember(
+                id=_uuid(rng), org_id=org_id, user_id=user.id, role=OrgRole.MEMBER,
+                member_type=rng.choice(list(MemberType)), nickname=f"n{i}", user=user,
+            )
+        )
+
+    charges_orm = []
+    charges_rows = []
+    for i, m in enumerate(members):
+        c = OrgCharge(
+            id=_uuid(rng), org_id=org_id, org_member_id=m.id, cycle_key="2024-01",
+            type=ChargeType.MEMBERSHIP, status=rng.choice(list(ChargeStatus)),
+            amount=Decimal(rng.randint(1000, 20_000)) / 100, game_id=None, ledger_entry_id=None,
+            created_by_id=None, paid_at=None, voided_at=None,
+            created_at=base + timedelta(seconds=i), updated_at=base + timedelta(seconds=i),
+        )
+        c.org_member = m
+        charges_orm.append(c)
+        charges_rows.append(
+            _ChargeRow(
+                c.id, c.org_id, c.org_member_id, c.cycle_key, c.type, c.status, c.amount, c.game_id,
+                c.ledger_entry_id, c.created_by_id, c.paid_at, c.voided_at, c.created_at, c.updated_at,
+                m.user_id, m.org_id, m.role, m.user.email, m.user.full_name,
+            )
+        )
+
+    attendance = [(m, rng.choice(list(AttendanceStatus))) for m in members]
+    return {
+        "org_id": org_id,
+        "ledger": ledger,
+        "ledger_rows": ledger_rows,
+        "charges_orm": charges_orm,
+        "charges_rows": charges_rows,
+        "attendance": attendance,
+    }
+
+
+def _attendance_item(m: OrgMember, status: AttendanceStatus, user) -> dict:
+    included = m.member_type == MemberType.MONTHLY
+    return {
+        "org_member_id": m.id,
+        "status": status,
+        "member_type": m.member_type,
+        "included": included,
+        "billable": not included,
+        "nickname": m.nickname,
+        "user": user,
+    }
+
+
+def _cases(fx: dict) -> dict:
+    ledger_list = TypeAdapter(list[LedgerEntrySchema])
+    charge_list = TypeAdapter(list[OrgChargeResponse])
+    attendance_list = TypeAdapter(list[GameDetailAttendanceItem])
+
+    def legacy(adapter, content):
+        return JSONResponse(adapter.dump_python(adapter.validate_python(content, from_attributes=True), mode="json")).body
+
+    def legacy_model(model, content):
+        return JSONResponse(model.model_validate(content).model_dump(mode="json")).body
+
+    return {
+        "read_ledger": (
+            lambda: legacy(ledger_list, fx["ledger"]),
+            lambda: FastJSONResponse([_ledger_entry_payload(x) for x in fx["ledger_rows"]]).body,
+        ),
+        "list_charges": (
+            lambda: legacy(charge_list, fx["charges_orm"]),
+            lambda: FastJSONResponse([_charge_row_payload(r) for r in fx["charges_rows"]]).body,
+        ),
+        "finance_recent": (
+            lambda: legacy_model(
+                FinanceRecentResponse,
+                {
+                    "org_id": str(fx["org_id"]),
+                    "ledger": [
+                        {**_recent_ledger_payload(x), "id": str(x.id), "type": x.type.value,
+                         "related_member_id": str(x.related_member_id) if x.related_member_id else None,
+                         "created_by_id": str(x.created_by_id) if x.created_by_id else None}
+                        for x in fx["ledger"]
+                    ],
+                    "charges": [
+                        {**_recent_charge_payload(c), "id": str(c.id), "org_member_id": str(c.org_member_id),
+                         "type": c.type.value, "status": c.status.value}
+                        for c in fx["charges_orm"]
+                    ],
+                },
+            ),
+            lambda: FastJSONResponse(
+                {
+                    "org_id": fx["org_id"],
+                    "ledger": [_recent_ledger_payload(x) for x in fx["ledger_rows"]],
+                    "charges": [_recent_charge_payload(c) for c in fx["charges_orm"]],
+                }
+            ).body,
+        ),
+        "game_detail.attendance": (
+            lambda: legacy(attendance_list, [_attendance_item(m, s, m.user) for m, s in fx["attendance"]]),
+            lambda: FastJSONResponse(
+                [_attendance_item(m, s, _public_user_payload(m.user)) for m, s in fx["attendance"]]
+            ).body,
+        ),
+    }
+
+
+def _cpu_us(fn, repeat: int) -> float:
+    fn()  # aquece caches do pydantic/orjson
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) / repeat * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    cases = _cases(_fixtures(args.rows, args.seed))
+
+    mismatches = []
+    print(f"{'endpoint':<26}{'legacy us':>12}{'fast us':>12}{'speedup':>10}   ({args.rows} rows)")
+    for name, (legacy, fast) in cases.items():
+        if json.loads(legacy()) != json.loads(fast()):
+            mismatches.append(name)
+        legacy_us = _cpu_us(legacy, args.repeat)
+        fast_us = _cpu_us(fast, args.repeat)
+        print(f"{name:<26}{legacy_us:>12.0f}{fast_us:>12.0f}{legacy_us / fast_us:>9.1f}x")
+
+    if mismatches:
+        print(f"\nMISMATCH: {', '.join(mismatches)}")
+        return 1
+    print("\nOK - same JSON on both paths")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
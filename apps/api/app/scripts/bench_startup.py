@@ -0,0 +1,112 @@
+"""Cold start da API: tempo de `import main` em processos novos.
+
+    python -m app.scripts.bench_startup --runs 5
+    python -m app.scripts.bench_startup --json-out startup.json
+    python -m app.scripts.bench_startup --baseline startup_baseline.json --max-regression 0.25
+
+Cada execução roda `python -X importtime -c "import main"` num subprocesso (sem
+conectar no banco), mede o tempo de parede e soma o importtime. Lista os módulos
+com maior tempo cumulativo para achar import pesado que voltou para o startup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_API_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _parse_importtime(stderr: str) -> tuple[int, dict[str, int]]:
+    """Linhas "import time: self | cumulative | módulo" -> (total_us, {módulo: cumulativo_us})."""
+    total = 0
+    cumulative: dict[str, int] = {}
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not line.startswith("import time:") or not parts[1].strip().isdigit():
+            continue
+        us = int(parts[1])
+        name = parts[2].strip()
+        if not parts[2][1:].startswith(" "):  # sem indentação = import de topo
+            total += us
+        cumulative[name] = max(cumulative.get(name, 0), us)
+    return total, cumulative
+
+
+def run_once(python: str) -> tuple[float, int, dict[str, int]]:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", "import main"],
+        cwd=_API_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise SystemExit(f"import main falhou:\n{proc.stderr[-2000:]}")
+    total_us, cumulative = _parse_importtime(proc.stderr)
+    return wall, total_us, cumulative
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="módulos mais caros a listar")
+    parser.add_argument("--python", default=sys.executable)
+    parser.add_argument("--json-out", default=None)
+    parser.add_argument("--baseline", default=None, help="JSON de uma execução anterior (--json-out)")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="tolerância de piora na mediana (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    walls: list[float] = []
+    totals: list[int] = []
+    modules: dict[str, list[int]] = {}
+    for _ in range(args.runs):
+        wall, total_us, cumulative = run_once(args.python)
+        walls.append(wall)
+        totals.append(total_us)
+        for name, us in cumulative.items():
+            modules.setdefault(name, []).append(us)
+
+    import_ms = statistics.median(totals) / 1000
+    top = sorted(((n, statistics.median(v) / 1000) for n, v in modules.items()), key=lambda kv: -kv[1])[: args.top]
+
+    report = {
+        "runs": args.runs,
+        "wall_ms_median": round(statistics.median(walls) * 1000, 1),
+        "wall_ms_min": round(min(walls) * 1000, 1),
+        "import_ms_median": round(import_ms, 1),
+        "top_modules_ms": {n: round(ms, 1) for n, ms in top},
+    }
+
+    print(f"wall  median {report['wall_ms_median']}ms  min {report['wall_ms_min']}ms  ({args.runs} runs)")
+    print(f"import median {report['import_ms_median']}ms\n")
+    print(f"{'module':<48}{'cumulative ms':>14}")
+    for name, ms in report["top_modules_ms"].items():
+        print(f"{name:<48}{ms:>14}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        ratio = report["wall_ms_median"] / base["wall_ms_median"] if base.get("wall_ms_median") else 1.0
+        if ratio > 1.0 + args.max_regression:
+            print(
+                f"\nREGRESSION: wall {report['wall_ms_median']}ms vs baseline {base['wall_ms_median']}ms "
+                f"(+{(ratio - 1) * 100:.0f}%)"
+            )
+            return 1
+        print("\nOK - within baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""Regressão de planos das queries quentes (EXPLAIN ANALYZE, BUFFERS).
+
+    python -m app.scripts.generate_dataset --profile large
+    python -m app.scripts.check_query_plans --write-baseline query_plans_baseline.json
+    python -m app.scripts.check_query_plans --baseline query_plans_baseline.json
+
+Cada entrada do REGISTRY reproduz o filtro/ordenação de um endpoint. Sai com
+código 1 se alguma query fizer Seq Scan numa tabela grande (>= --seq-scan-min-rows)
+ou se o custo estimado passar do baseline por mais de --max-cost-ratio.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable
+
+from sqlalchemy import case, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+import app.db.base  # noqa: F401  (registra todos os models)
+from app.models.game import AttendanceStatus, Game, GameAttendance
+from app.models.game_draft import GameDraftPick
+from app.models.game_guest import GameGuest
+from app.models.ledger import LedgerEntry, LedgerType
+from app.models.org_charge import ChargeStatus, ChargeType, OrgCharge
+from app.models.org_member import MemberType, OrgMember
+
+
+@dataclass
+class HotQuery:
+    name: str
+    source: str  # endpoint/função de onde a query vem
+    build: Callable[[dict], object]  # ctx -> select()
+    allow_seq_scan: tuple[str, ...] = field(default_factory=tuple)
+
+
+REGISTRY: list[HotQuery] = [
+    HotQuery(
+        "draft_pick_member_taken",
+        "games.draft_pick",
+        lambda c: select(GameDraftPick.id).where(
+            GameDraftPick.game_id == c["game_id"], GameDraftPick.org_member_id == c["member_id"]
+        ).limit(1),
+    ),
+    HotQuery(
+        "draft_pick_guest_taken",
+        "games.draft_pick",
+        lambda c: select(GameDraftPick.id).where(
+            GameDraftPick.game_id == c["game_id"], GameDraftPick.game_guest_id == c["game_guest_id"]
+        ).limit(1),
+    ),
+    HotQuery(
+        "draft_picks_of_game",
+        "games.get_draft",
+        lambda c: select(GameDraftPick).where(GameDraftPick.org_id == c["org_id"], GameDraftPick.game_id == c["game_id"]),
+    ),
+    HotQuery(
+        "org_guest_in_use",
+        "guests.delete_org_guest",
+        lambda c: select(GameGuest.id).where(GameGuest.org_guest_id == c["org_guest_id"]).limit(1),
+    ),
+    HotQuery(
+        "attendance_of_game",
+        "games.get_game_attendance",
+        lambda c: select(GameAttendance).where(GameAttendance.org_id == c["org_id"], GameAttendance.game_id == c["game_id"]),
+    ),
+    HotQuery(
+        "attendance_of_member",
+        "games.put_game_attendance",
+        lambda c: select(GameAttendance).where(
+            GameAttendance.org_id == c["org_id"],
+            GameAttendance.game_id == c["game_id"],
+            GameAttendance.org_member_id == c["member_id"],
+        ),
+    ),
+    HotQuery(
+        "ledger_income_sum",
+        "finance.finance_summary",
+        lambda c: select(func.coalesce(func.sum(LedgerEntry.amount), 0)).where(
+            LedgerEntry.org_id == c["org_id"], LedgerEntry.type == LedgerType.INCOME
+        ),
+        # sem período: soma o histórico todo da org (index-only scan só com o visibility map em dia)
+        allow_seq_scan=("ledger_entries",),
+    ),
+    HotQuery(
+        "ledger_expense_sum_period",
+        "finance.finance_dashboard",
+        lambda c: select(func.coalesce(func.sum(LedgerEntry.amount), 0)).where(
+            LedgerEntry.org_id == c["org_id"],
+            LedgerEntry.type == LedgerType.EXPENSE,
+            LedgerEntry.occurred_at >= c["period_start"],
+            LedgerEntry.occurred_at <= c["period_end"],
+        ),
+    ),
+    HotQuery(
+        "ledger_recent",
+        "finance.finance_recent",
+        lambda c: select(LedgerEntry)
+        .where(LedgerEntry.org_id == c["org_id"])
+        .order_by(LedgerEntry.occurred_at.desc())
+        .limit(20),
+    ),
+    HotQuery(
+        "charges_recent",
+        "finance.finance_recent",
+        lambda c: select(OrgCharge).where(OrgCharge.org_id == c["org_id"]).order_by(OrgCharge.created_at.desc()).limit(20),
+    ),
+    HotQuery(
+        "charges_status_totals",
+        "finance.finance_summary",
+        lambda c: select(
+            func.coalesce(func.sum(case((OrgCharge.status == ChargeStatus.PENDING, OrgCharge.amount), else_=0)), 0),
+            func.coalesce(func.sum(case((OrgCharge.status == ChargeStatus.PAID, OrgCharge.amount), else_=0)), 0),
+        ).where(OrgCharge.org_id == c["org_id"]),
+        # agrega todas as cobranças da org: Seq Scan é esperado quando a org domina a tabela
+        allow_seq_scan=("org_charges",),
+    ),
+    HotQuery(
+        "existing_charges_probe",
+        "billing_service.generate_charges_for_org",
+        # probe único das cobranças existentes de todos os ciclos gerados
+        lambda c: select(OrgCharge).where(
+            OrgCharge.org_id == c["org_id"],
+            OrgCharge.cycle_key.in_([c["cycle_key"]]),
+        ),
+    ),
+    HotQuery(
+        "per_session_attendance",
+        "billing_service.generate_charges_for_org",
+        lambda c: select(Game.id, OrgMember.id)
+        .join(GameAttendance, GameAttendance.game_id == Game.id)
+        .join(OrgMember, (OrgMember.org_id == Game.org_id) & (OrgMember.user_id == GameAttendance.user_id))
+        .where(
+            Game.org_id == c["org_id"],
+            Game.start_at >= c["period_start"],
+            Game.start_at < c["period_end"],
+            GameAttendance.status == AttendanceStatus.GOING,
+            OrgMember.member_type == MemberType.GUEST,
+        )
+        .distinct(),
+    ),
+]
+
+
+def _probe_context(db: Session) -> dict:
+    """Escolhe ids "pesados" do banco atual (org com mais lançamentos, jogo com mais picks...)."""
+    org_id = (
+        db.query(LedgerEntry.org_id).group_by(LedgerEntry.org_id).order_by(func.count().desc()).limit(1).scalar()
+    )
+    if org_id is None:
+        raise SystemExit("banco vazio: rode app.scripts.generate_dataset antes")
+
+    game_id = (
+        db.query(GameDraftPick.game_id)
+        .filter(GameDraftPick.org_id == org_id)
+        .group_by(GameDraftPick.game_id)
+        .order_by(func.count().desc())
+        .limit(1)
+        .scalar()
+    ) or db.query(Game.id).filter(Game.org_id == org_id).limit(1).scalar()
+
+    member_id = (
+        db.query(GameDraftPick.org_member_id)
+        .filter(GameDraftPick.game_id == game_id, GameDraftPick.org_member_id.isnot(None))
+        .limit(1)
+        .scalar()
+    ) or db.query(OrgMember.id).filter(OrgMember.org_id == org_id).limit(1).scalar()
+
+    game_guest_id = db.query(GameGuest.id).filter(GameGuest.game_id == game_id).limit(1).scalar()
+    org_guest_id = (
+        db.query(GameGuest.org_guest_id)
+        .filter(GameGuest.org_id == org_id, GameGuest.org_guest_id.isnot(None))
+        .limit(1)
+        .scalar()
+    )
+    cycle_key = (
+        db.query(OrgCharge.cycle_key)
+        .filter(OrgCharge.org_id == org_id, OrgCharge.type == ChargeType.MEMBERSHIP)
+        .order_by(OrgCharge.cycle_key.desc())
+        .limit(1)
+        .scalar()
+    )
+    last = db.query(func.max(LedgerEntry.occurred_at)).filter(LedgerEntry.org_id == org_id).scalar()
+
+    return {
+        "org_id": org_id,
+        "game_id": game_id,
+        "member_id": member_id,
+        "game_guest_id": game_guest_id,
+        "org_guest_id": org_guest_id,
+        "cycle_key": cycle_key or "",
+        "period_start": last - timedelta(days=30),
+        "period_end": last,
+    }
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(db: Session, stmt) -> dict:
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    rows = db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar()
+    return (json.loads(rows) if isinstance(rows, str) else rows)[0]
+
+
+def check(db: Session, *, baseline: dict, seq_scan_min_rows: int, max_cost_ratio: float) -> tuple[dict, list[str]]:
+    ctx = _probe_context(db)
+    reltuples = dict(
+        db.execute(text("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p')")).all()
+    )
+    # plano de tabela particionada cita a partição (ledger_entries_p2025_01): allow_seq_scan vale pelo parent
+    parent_of = dict(
+        db.execute(
+            text(
+                "SELECT c.relname, p.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent"
+            )
+        ).all()
+    )
+
+    results: dict[str, dict] = {}
+    problems: list[str] = []
+    for hq in REGISTRY:
+        out = explain(db, hq.build(ctx))
+        plan = out["Plan"]
+        seq_scans = sorted({n["Relation Name"] for n in _walk(plan) if n.get("Node Type") == "Seq Scan"})
+        results[hq.name] = {
+            "source": hq.source,
+            "total_cost": plan["Total Cost"],
+            "execution_ms": out.get("Execution Time"),
+            "shared_hit": plan.get("Shared Hit Blocks", 0),
+            "shared_read": plan.get("Shared Read Blocks", 0),
+            "seq_scans": seq_scans,
+        }
+
+        for rel in seq_scans:
+            allowed = rel in hq.allow_seq_scan or parent_of.get(rel) in hq.allow_seq_scan
+            if not allowed and reltuples.get(rel, 0) >= seq_scan_min_rows:
+                problems.append(f"{hq.name} ({hq.source}): Seq Scan on {rel} (~{int(reltuples[rel])} rows)")
+
+        base = baseline.get(hq.name)
+        if base and base.get("total_cost") and plan["Total Cost"] > base["total_cost"] * max_cost_ratio:
+            problems.append(
+                f"{hq.name} ({hq.source}): cost {plan['Total Cost']:.1f} vs baseline {base['total_cost']:.1f}"
+            )
+
+    # EXPLAIN ANALYZE executa a query: nada aqui deve persistir
+    db.rollback()
+    return results, problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=None, help="JSON gerado por --write-baseline")
+    parser.add_argument("--write-baseline", default=None)
+    parser.add_argument("--seq-scan-min-rows", type=int, default=10_000)
+    parser.add_argument("--max-cost-ratio", type=float, default=1.5)
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    db = SessionLocal()
+    try:
+        results, problems = check(
+            db, baseline=baseline, seq_scan_min_rows=args.seq_scan_min_rows, max_cost_ratio=args.max_cost_ratio
+        )
+    finally:
+        db.close()
+
+    print(f"{'query':<28}{'cost':>12}{'exec ms':>10}{'hit':>8}{'read':>8}  seq scans")
+    for name, r in results.items():
+        print(
+            f"{name:<28}{r['total_cost']:>12.1f}{(r['execution_ms'] or 0):>10.2f}"
+            f"{r['shared_hit']:>8}{r['shared_read']:>8}  {', '.join(r['seq_scans']) or '-'}"
+        )
+
+    if args.write_baseline:
+        with open(args.write_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline -> {args.write_baseline}")
+
+    if problems:
+        print("\nPLAN REGRESSIONS:")
+        for p in problems:
+            print(f"  - {p}")
+        return 1
+    print("\nOK - no plan regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
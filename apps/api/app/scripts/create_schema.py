@@ -1,7 +1,13 @@
+from sqlalchemy import text
+
 from app.db.session import engine
 from app.db.base import Base
 
 def main():
+    # índices GIN gin_trgm_ops dependem das extensões (btree_gin: org_id na mesma GIN)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gin"))
     Base.metadata.create_all(bind=engine)
     print("OK - schema created via SQLAlchemy create_all()")
 
@@ -0,0 +1,338 @@
+"""Gerador determinístico de dados sintéticos em escala (COPY).
+
+    python -m app.scripts.generate_dataset --profile large --seed 7
+    python -m app.scripts.generate_dataset --profile bench --manifest bench_manifest.json
+
+Mesmo seed + profile + --end-date => mesmos ids, nomes e datas. Escreve tudo
+numa transação com COPY (CSV em memória, descarregado em lotes na ordem das
+FKs) e roda ANALYZE no final, para os planos refletirem o volume gerado.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta, timezone
+
+from app.core.security import get_password_hash
+from app.db.session import engine
+
+FLUSH_ROWS = 100_000
+
+
+@dataclass(frozen=True)
+class Profile:
+    orgs: int
+    members: int  # por org
+    games: int  # jogos passados por org
+    upcoming_games: int  # jogos futuros (sem draft) por org
+    attendees: int  # respostas de presença por jogo
+    org_guests: int  # por org
+    guests_per_game: int
+    draft_rate: float  # fração dos jogos passados com draft finalizado
+    ledger_entries: int  # lançamentos avulsos por org (além de quadra e cobranças pagas)
+    years: int
+
+
+PROFILES = {
+    "small": Profile(orgs=5, members=40, games=100, upcoming_games=5, attendees=20, org_guests=20,
+                     guests_per_game=2, draft_rate=0.3, ledger_entries=300, years=2),
+    "bench": Profile(orgs=3, members=60, games=150, upcoming_games=30, attendees=24, org_guests=40,
+                     guests_per_game=12, draft_rate=0.3, ledger_entries=1_000, years=3),
+    # 1 tenant grande: 5k membros, 2k jogos, ~200k+ lançamentos
+    "large": Profile(orgs=1, members=5_000, games=2_000, upcoming_games=50, attendees=40, org_guests=1_000,
+                     guests_per_game=4, draft_rate=0.25, ledger_entries=150_000, years=3),
+    # ~1M+ linhas no total
+    "xl": Profile(orgs=20, members=1_000, games=1_000, upcoming_games=10, attendees=30, org_guests=200,
+                  guests_per_game=3, draft_rate=0.2, ledger_entries=20_000, years=3),
+}
+
+# ordem de COPY = ordem das FKs
+TABLES = {
+    "users": ("id", "email", "hashed_password", "full_name", "phone", "is_active"),
+    "organizations": ("id", "name", "slug", "owner_id"),
+    "org_members": ("id", "user_id", "org_id", "role", "member_type", "nickname", "is_active", "skill_rating"),
+    "org_billing_settings": ("id", "org_id", "billing_mode", "cycle", "cycle_weeks", "anchor_date", "due_day",
+                             "membership_amount", "session_amount"),
+    "org_guests": ("id", "org_id", "name", "phone"),
+    "games": ("id", "org_id", "title", "sport", "location", "start_at", "created_by_member_id",
+              "captain_a_member_id", "captain_b_member_id"),
+    "game_attendance": ("id", "game_id", "user_id", "org_id", "org_member_id", "status"),
+    "game_guests": ("id", "org_id", "game_id", "org_guest_id", "name", "phone", "created_by_member_id"),
+    "game_drafts": ("id", "org_id", "game_id", "status", "order_mode", "current_pick_index"),
+    "game_draft_picks": ("id", "org_id", "game_id", "draft_id", "round_number", "pick_number", "team_side",
+                         "org_member_id", "game_guest_id"),
+    "game_team_members": ("id", "org_id", "game_id", "org_member_id", "team"),
+    "game_team_guests": ("id", "org_id", "game_id", "game_guest_id", "team"),
+    "ledger_entries": ("id", "org_id", "type", "amount", "description", "occurred_at", "related_member_id",
+                       "created_by_id"),
+    "org_charges": ("id", "org_id", "org_member_id", "game_id", "cycle_key", "type", "status", "amount",
+                    "ledger_entry_id", "created_by_id", "paid_at", "voided_at"),
+}
+
+FIRST_NAMES = ("Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriel", "Helena", "Igor", "Julia",
+               "Lucas", "Marina", "Nicolas", "Olivia", "Pedro", "Rafaela", "Sergio", "Tatiana", "Vitor", "Yasmin")
+LAST_NAMES = ("Silva", "Souza", "Oliveira", "Santos", "Lima", "Costa", "Pereira", "Almeida", "Ribeiro", "Carvalho")
+EXPENSES = ("Aluguel da quadra", "Bolas", "Coletes", "Arbitragem", "Confraternização", "Água/gelo")
+ABBA = ("A", "B", "B", "A")
+
+
+class _CopyLoader:
+    """Buffers CSV por tabela; flush() faz COPY de todas na ordem das FKs."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.buffers = {t: io.StringIO() for t in TABLES}
+        self.writers = {t: csv.writer(b, lineterminator="\n") for t, b in self.buffers.items()}
+        self.pending = 0
+        self.counts = {t: 0 for t in TABLES}
+
+    def add(self, table: str, *values) -> None:
+        # csv chama str() (uuid/datetime/bool são aceitos pelo Postgres como texto);
+        # None vira campo vazio sem aspas == NULL no COPY CSV
+        self.writers[table].writerow(values)
+        self.counts[table] += 1
+        self.pending += 1
+        if self.pending >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        for table, columns in TABLES.items():
+            buf = self.buffers[table]
+            if buf.tell() == 0:
+                continue
+            buf.seek(0)
+            self.cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+            buf.seek(0)
+            buf.truncate()
+        self.pending = 0
+
+
+class _Ids:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def __call__(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+
+def _month_starts(first: date, last: date) -> list[date]:
+    out = []
+    d = first.replace(day=1)
+    while d <= last:
+        out.append(d)
+        d = date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+    return out
+
+
+def generate(loader: _CopyLoader, profile: Profile, *, seed: int, tag: str, end: datetime, password_hash: str) -> dict:
+    rng = random.Random(seed)
+    new_id = _Ids(rng)
+    add = loader.add
+    start = end - timedelta(days=365 * profile.years)
+    span = (end - start).total_seconds()
+    manifest: dict = {"orgs": []}
+
+    for o in range(profile.orgs):
+        org_id = new_id()
+        members = []  # (member_id, user_id, is_monthly, name)
+        for m in range(profile.members):
+            user_id, member_id = new_id(), new_id()
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            monthly = rng.random() < 0.6
+            add("users", user_id, f"{tag}-o{o}-m{m}@gen.local", password_hash, name, f"+55119{o:03d}{m:05d}", True)
+            members.append((member_id, user_id, monthly, name))
+        owner_member, owner_user = members[0][0], members[0][1]
+        add("organizations", org_id, f"{tag.upper()} Org {o}", f"{tag}-org-{o}", owner_user)
+        for m, (member_id, user_id, monthly, name) in enumerate(members):
+            role = "OWNER" if m == 0 else ("ADMIN" if m < 3 else "MEMBER")
+            add("org_members", member_id, user_id, org_id, role, "MONTHLY" if monthly else "GUEST",
+                f"{name.split()[0]}{m}", True, rng.randint(1, 10))
+        add("org_billing_settings", new_id(), org_id, "HYBRID", "MONTHLY", None, start.date(), 10, 100, 20)
+
+        org_guests = []
+        for g in range(profile.org_guests):
+            guest_id = new_id()
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} ({g})"
+            add("org_guests", guest_id, org_id, name, f"+55219{o:03d}{g:05d}")
+            org_guests.append((guest_id, name))
+
+        ledger_ids = []
+
+        def charge(member_id, cycle_key, charge_type, amount, due_at, game_id=None):
+            roll = rng.random()
+            ledger_id = paid_at = voided_at = None
+            if roll < 0.85:
+                status = "PAID"
+                paid_at = due_at + timedelta(days=rng.randint(0, 15))
+                ledger_id = new_id()
+                add("ledger_entries", ledger_id, org_id, "INCOME", amount, f"Charge paid: {cycle_key} ({charge_type})",
+                    paid_at, member_id, None)
+            elif roll < 0.95:
+                status = "PENDING"
+            else:
+                status, voided_at = "VOID", due_at
+            add("org_charges", new_id(), org_id, member_id, game_id, cycle_key, charge_type, status, amount,
+                ledger_id, None, paid_at, voided_at)
+
+        attendees = min(profile.attendees, len(members))
+        recent_games = []
+        for g in range(profile.games):
+            game_id = new_id()
+            start_at = (start + timedelta(seconds=span * (g + rng.random()) / profile.games)).replace(
+                minute=0, second=0, microsecond=0
+            )
+            crowd = rng.sample(members, attendees)
+            going = [m for m in crowd if rng.random() < 0.75]
+            has_draft = len(going) >= 2 and rng.random() < profile.draft_rate
+            cap_a, cap_b = (going[0][0], going[1][0]) if has_draft else (None, None)
+            add("games", game_id, org_id, f"Pelada {start_at:%d/%m/%Y}", "Futebol", "Quadra Sintética", start_at,
+                owner_member, cap_a, cap_b)
+            recent_games.append(game_id)
+
+            going_ids = {m[0] for m in going}
+            for member_id, user_id, monthly, _ in crowd:
+                if member_id in going_ids:
+                    status = "GOING"
+                    if not monthly:
+                        charge(member_id, f"GAME:{game_id}", "PER_SESSION", 20, start_at, game_id)
+                else:
+                    status = rng.choice(("MAYBE", "NOT_GOING"))
+                add("game_attendance", new_id(), game_id, user_id, org_id, member_id, status)
+
+            guests = []
+            for i in range(profile.guests_per_game):
+                guest_id = new_id()
+                if org_guests and rng.random() < 0.5:
+                    og_id, name = rng.choice(org_guests)
+                    name = f"{name} #{i}"
+                else:
+                    og_id, name = None, f"Convidado {i + 1}"
+                add("game_guests", guest_id, org_id, game_id, og_id, name, None, owner_member)
+                guests.append(guest_id)
+
+            if has_draft:
+                draft_id = new_id()
+                pool = [("m", m[0]) for m in going] + [("g", gid) for gid in guests]
+                rng.shuffle(pool)
+                add("game_drafts", draft_id, org_id, game_id, "FINISHED", "ABBA", len(pool))
+                for n, (kind, target) in enumerate(pool):
+                    side = ABBA[n % 4]
+                    member_target = target if kind == "m" else None
+                    guest_target = target if kind == "g" else None
+                    add("game_draft_picks", new_id(), org_id, game_id, draft_id, n // 4 + 1, n + 1, side,
+                        member_target, guest_target)
+                    if member_target:
+                        add("game_team_members", new_id(), org_id, game_id, member_target, side)
+                    else:
+                        add("game_team_guests", new_id(), org_id, game_id, guest_target, side)
+
+            add("ledger_entries", new_id(), org_id, "EXPENSE", 250, "Aluguel da quadra", start_at, None, owner_user)
+
+        draft_game_ids = []
+        for g in range(profile.upcoming_games):
+            game_id = new_id()
+            start_at = end + timedelta(days=1 + g)
+            add("games", game_id, org_id, f"Pelada {start_at:%d/%m/%Y}", "Futebol", "Quadra Sintética", start_at,
+                owner_member, None, None)
+            for i in range(profile.guests_per_game):
+                add("game_guests", new_id(), org_id, game_id, None, f"Convidado {i + 1}", None, owner_member)
+            draft_game_ids.append(str(game_id))
+
+        for month in _month_starts(start.date(), end.date()):
+            due = datetime(month.year, month.month, 10, 12, tzinfo=timezone.utc)
+            for member_id, _, monthly, _ in members:
+                if monthly:
+                    charge(member_id, f"{month:%Y-%m}", "MEMBERSHIP", 100, due)
+
+        for _ in range(profile.ledger_entries):
+            occurred = start + timedelta(seconds=rng.random() * span)
+            if rng.random() < 0.7:
+                add("ledger_entries", new_id(), org_id, "EXPENSE", round(rng.uniform(10, 400), 2),
+                    rng.choice(EXPENSES), occurred, None, owner_user)
+            else:
+                member_id = rng.choice(members)[0]
+                add("ledger_entries", new_id(), org_id, "INCOME", round(rng.uniform(10, 200), 2), "Contribuição",
+                    occurred, member_id, owner_user)
+
+        manifest["orgs"].append(
+            {
+                "org_id": str(org_id),
+                "admin_email": f"{tag}-o{o}-m0@gen.local",
+                "member_emails": [f"{tag}-o{o}-m{m}@gen.local" for m in range(profile.members)],
+                "game_ids": [str(g) for g in recent_games[-20:]],
+                "draft_game_ids": draft_game_ids,
+            }
+        )
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tag", default="gen", help="prefixo de e-mails/slugs (precisa ser único no banco)")
+    parser.add_argument("--end-date", default="2026-01-01", help="fim do histórico (YYYY-MM-DD); fixo p/ reprodutibilidade")
+    parser.add_argument("--password", default="bench-pass-123", help="senha de todos os usuários gerados")
+    parser.add_argument("--orgs", type=int, help="sobrescreve o profile")
+    parser.add_argument("--members", type=int, help="sobrescreve o profile")
+    parser.add_argument("--games", type=int, help="sobrescreve o profile")
+    parser.add_argument("--manifest", default=None, help="grava o manifest para scripts/bench.py")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    overrides = {k: getattr(args, k) for k in ("orgs", "members", "games") if getattr(args, k) is not None}
+    profile = replace(profile, **overrides)
+    if profile.members < 3:
+        parser.error("members precisa ser >= 3")
+
+    end = datetime.combine(date.fromisoformat(args.end_date), datetime.min.time(), tzinfo=timezone.utc)
+    started = time.perf_counter()
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute("SELECT 1 FROM users WHERE email = %s", (f"{args.tag}-o0-m0@gen.local",))
+        if cur.fetchone():
+            raise SystemExit(f"tag '{args.tag}' já foi usada neste banco (use --tag diferente)")
+
+        loader = _CopyLoader(cur)
+        manifest = generate(
+            loader,
+            profile,
+            seed=args.seed,
+            tag=args.tag,
+            end=end,
+            password_hash=get_password_hash(args.password),  # bcrypt é caro: um hash só
+        )
+        loader.flush()
+
+        # estatísticas atualizadas antes de qualquer EXPLAIN/benchmark
+        for table in TABLES:
+            cur.execute(f"ANALYZE {table}")
+        raw.commit()
+    finally:
+        raw.close()
+
+    total = sum(loader.counts.values())
+    elapsed = time.perf_counter() - started
+    for table, n in loader.counts.items():
+        print(f"  {table:<22} {n:>10}")
+    print(f"OK - {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+    if args.manifest:
+        manifest["password"] = args.password
+        manifest["counts"] = loader.counts
+        with open(args.manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        print(f"manifest -> {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
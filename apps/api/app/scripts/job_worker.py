@@ -0,0 +1,56 @@
+"""Worker da fila de jobs (background_jobs), fora do processo da API.
+
+    python -m app.scripts.job_worker --concurrency 4
+    python -m app.scripts.job_worker --once          # drena o que está vencido e sai
+
+É o consumidor padrão da fila (serviço `worker` do docker-compose). Pode rodar
+em N processos/máquinas: o claim usa FOR UPDATE SKIP LOCKED. A API só consome
+a fila com JOB_WORKER_EMBEDDED=true (opt-in, dev com um processo).
+"""
+
+from __future__ import annotations
+
+import argparse
+import signal
+import sys
+import threading
+
+import app.db.base  # noqa: F401  (registra todos os models)
+from app.db.session import SessionLocal
+from app.services.jobs import JobWorker
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    worker = JobWorker(
+        SessionLocal,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+    )
+
+    if args.once:
+        while worker.run_once():
+            pass
+        print(f"OK - {worker.stats['done']} done, {worker.stats['failed']} failed")
+        return 0
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    worker.start()
+    print(f"OK - worker {worker.name} running with {args.concurrency} threads")
+    stop.wait()
+    worker.stop()
+    print(f"OK - stopped ({worker.stats['done']} done, {worker.stats['failed']} failed)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Manutenção das partições de ledger_entries / org_charges (app.db.partitions).
+
+    python -m app.scripts.manage_partitions                       # lista e cria os meses futuros
+    python -m app.scripts.manage_partitions --ahead 24
+    python -m app.scripts.manage_partitions --detach-before 2024-01          # DETACH CONCURRENTLY
+    python -m app.scripts.manage_partitions --detach-before 2024-01 --drop   # e apaga
+
+A API já roda a criação dos meses futuros uma vez por dia
+(LEDGER_PARTITION_MAINTENANCE_INTERVAL_SECONDS); este script é para folga
+maior e para tirar meses antigos do parent sem lock longo.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date
+
+from app.db.partitions import (
+    CHARGES_TABLE,
+    LEDGER_TABLE,
+    MONTHS_AHEAD,
+    detach_ledger_partitions,
+    ensure_charge_partitions,
+    ensure_ledger_partitions,
+    existing_partitions,
+)
+from app.db.session import engine
+
+
+def _month_arg(value: str) -> date:
+    try:
+        year, month = value.split("-")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected YYYY-MM")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ahead", type=int, default=MONTHS_AHEAD, help="meses futuros a garantir")
+    parser.add_argument("--detach-before", type=_month_arg, default=None, metavar="YYYY-MM")
+    parser.add_argument("--drop", action="store_true", help="apaga as partições desanexadas")
+    args = parser.parse_args()
+
+    if args.drop and args.detach_before is None:
+        parser.error("--drop requires --detach-before")
+
+    with engine.begin() as conn:
+        created = ensure_ledger_partitions(conn, months_ahead=args.ahead)
+        created += ensure_charge_partitions(conn)
+    for name in created:
+        print(f"created {name}")
+
+    if args.detach_before is not None:
+        for name in detach_ledger_partitions(engine, args.detach_before, drop=args.drop):
+            print(f"{'dropped' if args.drop else 'detached'} {name}")
+
+    with engine.connect() as conn:
+        ledger = existing_partitions(conn, LEDGER_TABLE)
+        charges = existing_partitions(conn, CHARGES_TABLE)
+    print(f"OK - {LEDGER_TABLE}: {len(ledger)} partitions, {CHARGES_TABLE}: {len(charges)} partitions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+from sqlalchemy import delete
+
+from app.db.session import SessionLocal
+import app.db.base  # noqa: F401  (registra todos os models)
+from app.models.game import Game
+from app.models.game_team import GameTeamMember
+from app.models.pairing_history import OrgCaptainHistory, OrgPairHistory
+from app.services.pairing_history import record_game_teams
+
+
+def main():
+    # reconstrói org_pair_history / org_captain_history a partir dos times já gravados
+    db = SessionLocal()
+    try:
+        db.execute(delete(OrgPairHistory))
+        db.execute(delete(OrgCaptainHistory))
+        db.query(Game).update({Game.teams_snapshot: None, Game.teams_recorded_at: None})
+
+        game_ids = db.query(GameTeamMember.game_id).distinct().subquery()
+        games = db.query(Game).filter(Game.id.in_(game_ids)).order_by(Game.start_at.asc()).all()
+        for game in games:
+            record_game_teams(db, game)
+        db.commit()
+        print(f"OK - pairing history rebuilt from {len(games)} games")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import DateTime, bindparam, func, select, text, union_all
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models.archive import LedgerEntryArchive, OrgArchiveTotals, OrgChargeArchive
+from app.models.ledger import LedgerEntry
+from app.models.org_charge import OrgCharge
+from app.services.finance_cache import mark_dirty
+
+logger = logging.getLogger("app.services.archive")
+
+# Arquivo frio de cobranças liquidadas e lançamentos antigos.
+#
+# Escrita: archive_org() move, por org, lotes de até batch_size linhas com um
+# statement só (DELETE ... RETURNING -> INSERT no arquivo -> soma no
+# org_archive_totals). Cada lote é uma transação curta com lock_timeout e
+# FOR UPDATE SKIP LOCKED: linha travada por um request fica para a próxima
+# rodada em vez de esperar. A linha está sempre em exatamente um dos lados.
+#
+# O que sai: cobrança PAID/VOID criada e liquidada antes do corte (padrão: 1
+# ano) e lançamento com occurred_at antes do corte que não seja o lançamento
+# de uma cobrança que ficou na tabela quente.
+#
+# Leitura: org_archive_totals guarda as somas arquivadas (totais "desde
+# sempre" exatos sem ler o arquivo) e o horizonte (*_archived_before). Consulta
+# com período que começa depois do horizonte lê só a tabela quente; antes
+# disso (ou sem início), ledger_source/charge_source fazem UNION ALL com o arquivo.
+
+ARCHIVE_AFTER_DAYS = 365
+BATCH_SIZE = 1000
+LOCK_TIMEOUT_MS = 2000
+_LOCK_NOT_AVAILABLE = "55P03"
+
+_CHARGE_COLUMNS = (
+    "id, org_id, org_member_id, game_id, cycle_key, type, status, amount, ledger_entry_id, created_by_id, "
+    "paid_at, voided_at, created_at, updated_at"
+)
+_LEDGER_COLUMNS = (
+    "id, org_id, type, amount, description, occurred_at, related_member_id, created_by_id, created_at, updated_at"
+)
+
+_ARCHIVE_CHARGES_SQL = text(
+    f"""
+    WITH picked AS (
+        SELECT id FROM org_charges
+        WHERE org_id = :org_id AND status IN ('PAID', 'VOID')
+          AND created_at < :cutoff AND COALESCE(paid_at, voided_at, updated_at) < :cutoff
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM org_charges c USING picked
+        WHERE c.org_id = :org_id AND c.id = picked.id
+        RETURNING c.*
+    ),
+    archived AS (
+        INSERT INTO org_charges_archive ({_CHARGE_COLUMNS})
+        SELECT {_CHARGE_COLUMNS} FROM moved
+        RETURNING status, amount
+    ),
+    totals AS (
+        INSERT INTO org_archive_totals AS t (
+            org_id, charges_paid_total, charges_paid_count, charges_void_total, charges_void_count,
+            charges_archived_before, updated_at
+        )
+        SELECT :org_id,
+               COALESCE(SUM(amount) FILTER (WHERE status = 'PAID'), 0),
+               COUNT(*) FILTER (WHERE status = 'PAID'),
+               COALESCE(SUM(amount) FILTER (WHERE status = 'VOID'), 0),
+               COUNT(*) FILTER (WHERE status = 'VOID'),
+               :cutoff, now()
+        FROM archived
+        HAVING COUNT(*) > 0
+        ON CONFLICT (org_id) DO UPDATE SET
+            charges_paid_total = t.charges_paid_total + EXCLUDED.charges_paid_total,
+            charges_paid_count = t.charges_paid_count + EXCLUDED.charges_paid_count,
+            charges_void_total = t.charges_void_total + EXCLUDED.charges_void_total,
+            charges_void_count = t.charges_void_count + EXCLUDED.charges_void_count,
+            charges_archived_before = GREATEST(t.charges_archived_before, EXCLUDED.charges_archived_before),
+            updated_at = now()
+    )
+    SELECT COUNT(*) FROM archived
+    """
+).bindparams(
+    bindparam("org_id", type_=PGUUID(as_uuid=True)),
+    bindparam("cutoff", type_=DateTime(timezone=True)),
+)
+
+_ARCHIVE_LEDGER_SQL = text(
+    f"""
+    WITH picked AS (
+        SELECT l.id, l.occurred_at FROM ledger_entries l
+        WHERE l.org_id = :org_id AND l.occurred_at < :cutoff
+          AND NOT EXISTS (
+              SELECT 1 FROM org_charges c WHERE c.org_id = :org_id AND c.ledger_entry_id = l.id
+          )
+        LIMIT :limit
+        FOR UPDATE OF l SKIP LOCKED
+    ),
+    moved AS (
+        DELETE FROM ledger_entries l USING picked
+        WHERE l.id = picked.id AND l.occurred_at = picked.occurred_at
+        RETURNING l.*
+    ),
+    archived AS (
+        INSERT INTO ledger_entries_archive ({_LEDGER_COLUMNS})
+        SELECT {_LEDGER_COLUMNS} FROM moved
+        RETURNING type, amount
+    ),
+    totals AS (
+        INSERT INTO org_archive_totals AS t (
+            org_id, ledger_income_total, ledger_expense_total, ledger_count, ledger_archived_before, updated_at
+        )
+        SELECT :org_id,
+               COALESCE(SUM(amount) FILTER (WHERE type = 'INCOME'), 0),
+               COALESCE(SUM(amount) FILTER (WHERE type = 'EXPENSE'), 0),
+               COUNT(*),
+               :cutoff, now()
+        FROM archived
+        HAVING COUNT(*) > 0
+        ON CONFLICT (org_id) DO UPDATE SET
+            ledger_income_total = t.ledger_income_total + EXCLUDED.ledger_income_total,
+            ledger_expense_total = t.ledger_expense_total + EXCLUDED.ledger_expense_total,
+            ledger_count = t.ledger_count + EXCLUDED.ledger_count,
+            ledger_archived_before = GREATEST(t.ledger_archived_before, EXCLUDED.ledger_archived_before),
+            updated_at = now()
+    )
+    SELECT COUNT(*) FROM archived
+    """
+).bindparams(
+    bindparam("org_id", type_=PGUUID(as_uuid=True)),
+    bindparam("cutoff", type_=DateTime(timezone=True)),
+)
+
+
+@dataclass
+class ArchiveReport:
+    org_id: UUID
+    cutoff: datetime
+    charges: int = 0
+    ledger_entries: int = 0
+    batches: int = 0
+    lock_timeouts: int = 0
+    elapsed_ms: float = 0.0
+
+
+def default_cutoff(now: datetime | None = None, days: int = ARCHIVE_AFTER_DAYS) -> datetime:
+    return (now or datetime.now(timezone.utc)) - timedelta(days=days)
+
+
+def _run_batches(db: Session, sql, params: dict, report: ArchiveReport, pause_seconds: float) -> int:
+    moved = 0
+    while True:
+        try:
+            # lock_timeout só vale para a transação do lote
+            db.execute(text(f"SET LOCAL lock_timeout = {int(LOCK_TIMEOUT_MS)}"))
+            n = db.execute(sql, params).scalar() or 0
+            if n:
+                mark_dirty(db, params["org_id"])
+            db.commit()
+        except OperationalError as exc:
+            db.rollback()
+            if getattr(exc.orig, "pgcode", None) == _LOCK_NOT_AVAILABLE:
+                # DDL/lock pesado na tabela: desiste desta org nesta rodada
+                report.lock_timeouts += 1
+                return moved
+            raise
+        report.batches += 1
+        moved += n
+        if n < params["limit"]:
+            return moved
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+
+def archive_org(
+    db: Session,
+    org_id: UUID,
+    *,
+    cutoff: datetime | None = None,
+    batch_size: int = BATCH_SIZE,
+    pause_seconds: float = 0.0,
+) -> ArchiveReport:
+    """Move as linhas frias de uma org em lotes (uma transação por lote)."""
+    cutoff = cutoff or default_cutoff()
+    report = ArchiveReport(org_id=org_id, cutoff=cutoff)
+    started = time.perf_counter()
+    params = {"org_id": org_id, "cutoff": cutoff, "limit": batch_size}
+    # cobranças primeiro: o lançamento de uma cobrança arquivada fica livre para sair junto
+    report.charges = _run_batches(db, _ARCHIVE_CHARGES_SQL, params, report, pause_seconds)
+    report.ledger_entries = _run_batches(db, _ARCHIVE_LEDGER_SQL, params, report, pause_seconds)
+    report.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    if report.charges or report.ledger_entries:
+        logger.info(
+            json.dumps(
+                {
+                    "org_id": str(org_id),
+                    "archived_charges": report.charges,
+                    "archived_ledger_entries": report.ledger_entries,
+                    "batches": report.batches,
+                    "ms": report.elapsed_ms,
+                }
+            )
+        )
+    return report
+
+
+# ---------------------------------------------------------------- leitura
+
+
+def archive_totals(db: Session, org_id: UUID) -> OrgArchiveTotals | None:
+    return db.get(OrgArchiveTotals, org_id)
+
+
+def needs_archive(horizon: datetime | None, start: datetime | None) -> bool:
+    """Período [start, ...] alcança linhas arquivadas? (sem start = desde sempre)."""
+    return horizon is not None and (start is None or start < horizon)
+
+
+def archived_sum(column, org_id: UUID):
+    """Escalar do org_archive_totals (0 sem linha): soma no mesmo statement que lê a tabela quente."""
+    return func.coalesce(select(column).where(OrgArchiveTotals.org_id == org_id).scalar_subquery(), 0)
+
+
+_LEDGER_FIELDS = (
+    "id",
+    "org_id",
+    "type",
+    "amount",
+    "description",
+    "occurred_at",
+    "related_member_id",
+    "created_by_id",
+)
+_CHARGE_FIELDS = (
+    "id",
+    "org_id",
+    "org_member_id",
+    "cycle_key",
+    "type",
+    "status",
+    "amount",
+    "game_id",
+    "ledger_entry_id",
+    "created_by_id",
+    "paid_at",
+    "voided_at",
+    "created_at",
+    "updated_at",
+)
+
+
+def _source(hot, cold, fields: tuple[str, ...], org_id: UUID, include_archive: bool, name: str):
+    if not include_archive:
+        return hot.__table__
+    return union_all(
+        select(*(getattr(hot, f) for f in fields)).where(hot.org_id == org_id),
+        select(*(getattr(cold, f) for f in fields)).where(cold.org_id == org_id),
+    ).subquery(name)
+
+
+def ledger_source(org_id: UUID, include_archive: bool):
+    """ledger_entries, ou ledger_entries + arquivo da org (mesmas colunas em .c)."""
+    return _source(LedgerEntry, LedgerEntryArchive, _LEDGER_FIELDS, org_id, include_archive, "ledger_all")
+
+
+def charge_source(org_id: UUID, include_archive: bool):
+    """org_charges, ou org_charges + arquivo da org (mesmas colunas em .c)."""
+    return _source(OrgCharge, OrgChargeArchive, _CHARGE_FIELDS, org_id, include_archive, "charges_all")
+
+
+def top_up_recent(
+    live: list, fetch_archive: Callable[[], list], horizon: datetime | None, key: Callable, limit: int
+) -> list:
+    """"Recentes" exatos: só lê o arquivo se ele pode ter linha entre as `limit` mais novas."""
+    if horizon is None or (len(live) >= limit and key(live[-1]) >= horizon):
+        return live
+    return sorted([*live, *fetch_archive()], key=key, reverse=True)[:limit]
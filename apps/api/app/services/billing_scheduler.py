@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models.org_billing_settings import BillingCycle, OrgBillingSettings
+from app.services.billing_service import compute_cycle
+from app.services.job_handlers import BILLING_GENERATE
+from app.services.jobs import enqueue
+
+logger = logging.getLogger("app.services.billing_scheduler")
+
+# Scheduler de cobrança recorrente dentro da API.
+#
+# Para cada org com OrgBillingSettings calcula a próxima virada de ciclo (mesma
+# matemática de compute_cycle, em UTC) e guarda num min-heap (due_at, org).
+# O loop dorme até o topo do heap vencer, e aí enfileira um job
+# billing.generate_charges só daquela org/ciclo (fila de app.services.jobs,
+# dedupe por org+ciclo). Não varre todas as orgs a cada rodada.
+#
+# - Cada org ganha um deslocamento fixo (hash do id) dentro de spread_seconds:
+#   todas as orgs mensais viram no dia 1, mas a geração se espalha na janela.
+# - Mudança de settings: refresh periódico lê só as linhas com updated_at novo e
+#   reagenda. Entrada velha no heap é descartada pela versão (lazy delete).
+# - Startup: ciclo que começou há menos de catch_up é enfileirado na hora. Gerar
+#   de novo é inofensivo (ON CONFLICT DO NOTHING).
+# - Vários processos da API com scheduler: o dedupe do job evita fila duplicada.
+
+
+def _spread_offset(org_id: UUID, spread_seconds: int) -> timedelta:
+    if spread_seconds <= 0:
+        return timedelta(0)
+    return timedelta(seconds=zlib.crc32(org_id.bytes) % spread_seconds)
+
+
+def current_cycle_at(settings: OrgBillingSettings, when: datetime) -> tuple[str, datetime, datetime]:
+    """Ciclo (key, start, end) que contém `when` (UTC)."""
+    when = when.astimezone(timezone.utc)
+    if settings.cycle == BillingCycle.MONTHLY:
+        key = f"{when.year:04d}-{when.month:02d}"
+    elif settings.cycle == BillingCycle.WEEKLY:
+        iso = when.isocalendar()
+        key = f"{iso.year:04d}-W{iso.week:02d}"
+    elif settings.cycle == BillingCycle.CUSTOM_WEEKS:
+        if not settings.cycle_weeks or settings.cycle_weeks <= 0:
+            raise HTTPException(status_code=400, detail="cycle_weeks is required for CUSTOM_WEEKS")
+        period_days = settings.cycle_weeks * 7
+        n = max(0, (when.date() - settings.anchor_date).days // period_days)  # igual compute_cycle
+        key = (settings.anchor_date + timedelta(days=n * period_days)).isoformat()
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported billing cycle")
+    return compute_cycle(settings=settings, cycle_key=key)
+
+
+def next_boundary(settings: OrgBillingSettings, after: datetime) -> tuple[str, datetime]:
+    """Primeiro ciclo que começa depois de `after`: (cycle_key, start)."""
+    if settings.cycle == BillingCycle.CUSTOM_WEEKS and after.date() < settings.anchor_date:
+        anchor = datetime.combine(settings.anchor_date, datetime.min.time(), tzinfo=timezone.utc)
+        if anchor > after:
+            return settings.anchor_date.isoformat(), anchor
+    _, _, end = current_cycle_at(settings, after)
+    key, start, _ = current_cycle_at(settings, end)
+    return key, start
+
+
+@dataclass(frozen=True)
+class _CycleSpec:
+    # só o que compute_cycle usa; não segura o objeto ORM entre sessões
+    org_id: UUID
+    cycle: BillingCycle
+    cycle_weeks: int | None
+    anchor_date: date
+    updated_at: datetime
+
+
+class BillingScheduler:
+    def __init__(self, *, spread_seconds: int = 900, catch_up_seconds: int = 6 * 3600):
+        self.spread_seconds = spread_seconds
+        self.catch_up = timedelta(seconds=catch_up_seconds)
+        # (due_at, org_id, updated_at, cycle_key); entrada com updated_at antigo é descartada
+        self._heap: list[tuple[datetime, UUID, datetime, str]] = []
+        self._specs: dict[UUID, _CycleSpec] = {}
+        self._seen_until: datetime | None = None
+        self._lock = threading.Lock()
+
+    def _live(self, entry) -> bool:
+        spec = self._specs.get(entry[1])
+        return spec is not None and spec.updated_at == entry[2]
+
+    def _push(self, spec: _CycleSpec, now: datetime, catch_up: bool) -> None:
+        self._specs[spec.org_id] = spec
+        offset = _spread_offset(spec.org_id, self.spread_seconds)
+        try:
+            key, start, _ = current_cycle_at(spec, now)
+            if not (catch_up and start + offset > now - self.catch_up):
+                key, start = next_boundary(spec, now - offset)
+        except HTTPException:
+            # settings inválido (CUSTOM_WEEKS sem cycle_weeks): fica fora até alguém corrigir
+            return
+        heapq.heappush(self._heap, (start + offset, spec.org_id, spec.updated_at, key))
+
+    def _load(self, db: Session, now: datetime, since: datetime | None) -> int:
+        q = db.query(
+            OrgBillingSettings.org_id,
+            OrgBillingSettings.cycle,
+            OrgBillingSettings.cycle_weeks,
+            OrgBillingSettings.anchor_date,
+            OrgBillingSettings.updated_at,
+        )
+        if since is not None:
+            q = q.filter(OrgBillingSettings.updated_at > since)
+        rows = q.all()
+        for r in rows:
+            # catch-up só na carga inicial; settings alterado reagenda a partir do próximo ciclo
+            self._push(_CycleSpec(*r), now, catch_up=since is None)
+            if self._seen_until is None or r.updated_at > self._seen_until:
+                self._seen_until = r.updated_at
+        return len(rows)
+
+    def load(self, db: Session, now: datetime | None = None) -> int:
+        with self._lock:
+            self._heap.clear()
+            self._specs.clear()
+            self._seen_until = None
+            return self._load(db, now or datetime.now(timezone.utc), None)
+
+    def refresh(self, db: Session, now: datetime | None = None) -> int:
+        """Reagenda só as orgs cujo settings mudou desde a última leitura."""
+        with self._lock:
+            return self._load(db, now or datetime.now(timezone.utc), self._seen_until)
+
+    def next_due(self) -> datetime | None:
+        with self._lock:
+            while self._heap and not self._live(self._heap[0]):
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def tick(self, db: Session, now: datetime | None = None) -> list[tuple[UUID, str]]:
+        """Enfileira a geração das orgs vencidas (um commit) e agenda o ciclo seguinte delas."""
+        now = now or datetime.now(timezone.utc)
+        fired: list[tuple[UUID, str]] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if not self._live(entry):
+                    continue
+                due_at, org_id, version, key = entry
+                enqueue(
+                    db,
+                    BILLING_GENERATE,
+                    {"org_id": str(org_id), "cycle_key": key, "force": False, "created_by_id": None},
+                    org_id=org_id,
+                    dedupe_key=f"billing:{org_id}:{key}:0",
+                )
+                fired.append((org_id, key))
+                offset = _spread_offset(org_id, self.spread_seconds)
+                next_key, start = next_boundary(self._specs[org_id], due_at - offset)
+                heapq.heappush(self._heap, (start + offset, org_id, version, next_key))
+            db.commit()
+        return fired
+
+    def upcoming(self, limit: int = 50) -> list[dict]:
+        with self._lock:
+            live = [e for e in self._heap if self._live(e)]
+        return [
+            {"org_id": org_id, "cycle_key": key, "due_at": due_at}
+            for due_at, org_id, _, key in heapq.nsmallest(limit, live)
+        ]
+
+
+BILLING_SCHEDULER = BillingScheduler()
+
+
+async def run_scheduler(
+    session_factory, scheduler: BillingScheduler, refresh_seconds: float, max_sleep: float = 300
+) -> None:
+    """Loop do startup: dorme até a próxima org vencer (ou o próximo refresh)."""
+    loaded = False
+    failures = 0
+    next_refresh = 0.0
+    loop = asyncio.get_running_loop()
+
+    def step(load: bool, refresh: bool) -> list:
+        db = session_factory()
+        try:
+            if load:
+                scheduler.load(db)
+            elif refresh:
+                scheduler.refresh(db)
+            return scheduler.tick(db)
+        finally:
+            db.close()
+
+    while True:
+        try:
+            now = loop.time()
+            refresh = now >= next_refresh
+            fired = await asyncio.to_thread(step, not loaded, refresh)
+            loaded = True
+            failures = 0
+            if refresh:
+                next_refresh = now + refresh_seconds
+            if fired:
+                logger.info(json.dumps({"billing_scheduled": [[str(o), k] for o, k in fired]}))
+        except Exception:
+            # tick pode ter tirado entradas do heap sem commitar: recarrega tudo na próxima
+            loaded = False
+            failures += 1
+            logger.exception("billing scheduler step failed")
+            await asyncio.sleep(min(max_sleep, 5 * 2 ** min(failures, 6)))
+            continue
+
+        due = scheduler.next_due()
+        sleep = max_sleep if due is None else (due - datetime.now(timezone.utc)).total_seconds()
+        sleep = min(max(sleep, 0.5), max_sleep, max(next_refresh - loop.time(), 0.5))
+        await asyncio.sleep(sleep)
@@ -1,92 +1,196 @@
 from __future__ import annotations
 
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
 from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, case, cast, column, func, insert, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, insert as pg_insert
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
+from app.models.archive import OrgChargeArchive
 from app.models.game import AttendanceStatus, Game, GameAttendance
-from app.models.org_billing_settings import BillingMode
+from app.models.ledger import LedgerEntry, LedgerType
+from app.models.org_billing_settings import BillingCycle, BillingMode, OrgBillingSettings
 from app.models.org_charge import ChargeStatus, ChargeType, OrgCharge
 from app.models.org_member import MemberType, OrgMember
-from app.routers.billing import _get_or_create_settings, _compute_cycle  # já existe no teu billing.py
+from app.services.finance_cache import mark_dirty
 
-def generate_charges_for_org(
+_INSERT_BATCH = 1000
+
+
+def get_or_create_settings(db: Session, org_id: UUID) -> OrgBillingSettings:
+    settings = db.query(OrgBillingSettings).filter(OrgBillingSettings.org_id == org_id).first()
+    if settings:
+        return settings
+    settings = OrgBillingSettings(
+        org_id=org_id,
+        billing_mode=BillingMode.HYBRID,
+        cycle=BillingCycle.MONTHLY,
+        cycle_weeks=None,
+        anchor_date=date.today(),
+        due_day=1,
+        membership_amount=0,
+        session_amount=0,
+    )
+    db.add(settings)
+    db.commit()
+    db.refresh(settings)
+    return settings
+
+
+def month_range_utc(start: date) -> tuple[datetime, datetime]:
+    start_dt = datetime.combine(start.replace(day=1), time.min, tzinfo=timezone.utc)
+    if start.month == 12:
+        end_month = date(start.year + 1, 1, 1)
+    else:
+        end_month = date(start.year, start.month + 1, 1)
+    end_dt = datetime.combine(end_month, time.min, tzinfo=timezone.utc)
+    return start_dt, end_dt
+
+
+def week_range_utc(iso_year: int, iso_week: int) -> tuple[datetime, datetime]:
+    start_dt = datetime.fromisocalendar(iso_year, iso_week, 1).replace(tzinfo=timezone.utc)
+    end_dt = start_dt + timedelta(days=7)
+    return start_dt, end_dt
+
+
+def compute_cycle(settings: OrgBillingSettings, cycle_key: str | None) -> tuple[str, datetime, datetime]:
+    now = datetime.now(timezone.utc)
+
+    if settings.cycle == BillingCycle.MONTHLY:
+        if cycle_key:
+            try:
+                y, m = cycle_key.split("-")
+                y_i = int(y)
+                m_i = int(m)
+                start_date = date(y_i, m_i, 1)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid cycle_key for MONTHLY (expected YYYY-MM)")
+        else:
+            start_date = date(now.year, now.month, 1)
+            cycle_key = f"{now.year:04d}-{now.month:02d}"
+        start_dt, end_dt = month_range_utc(start_date)
+        return cycle_key, start_dt, end_dt
+
+    if settings.cycle == BillingCycle.WEEKLY:
+        if cycle_key:
+            try:
+                y, w = cycle_key.split("-W")
+                iso_year = int(y)
+                iso_week = int(w)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid cycle_key for WEEKLY (expected YYYY-Www)")
+        else:
+            iso = now.isocalendar()
+            iso_year = iso.year
+            iso_week = iso.week
+            cycle_key = f"{iso_year:04d}-W{iso_week:02d}"
+        start_dt, end_dt = week_range_utc(iso_year, iso_week)
+        return cycle_key, start_dt, end_dt
+
+    if settings.cycle == BillingCycle.CUSTOM_WEEKS:
+        if not settings.cycle_weeks or settings.cycle_weeks <= 0:
+            raise HTTPException(status_code=400, detail="cycle_weeks is required for CUSTOM_WEEKS")
+        period_days = settings.cycle_weeks * 7
+        anchor = settings.anchor_date
+        if cycle_key:
+            try:
+                start_date = date.fromisoformat(cycle_key)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid cycle_key for CUSTOM_WEEKS (expected YYYY-MM-DD)")
+        else:
+            delta_days = (date.today() - anchor).days
+            n = max(0, delta_days // period_days)
+            start_date = anchor + timedelta(days=n * period_days)
+            cycle_key = start_date.isoformat()
+        start_dt = datetime.combine(start_date, time.min, tzinfo=timezone.utc)
+        end_dt = start_dt + timedelta(days=period_days)
+        return cycle_key, start_dt, end_dt
+
+    raise HTTPException(status_code=400, detail="Unsupported billing cycle")
+
+
+# teto do modo range: ~10 anos mensais / ~2 anos semanais
+MAX_RANGE_CYCLES = 120
+
+
+def cycle_keys_in_range(
+    settings: OrgBillingSettings, start: date, end: date, max_cycles: int = MAX_RANGE_CYCLES
+) -> list[str]:
+    """Chaves de todos os ciclos que tocam [start, end], no formato que compute_cycle entende."""
+    keys: list[str] = []
+
+    if settings.cycle == BillingCycle.MONTHLY:
+        y, m = start.year, start.month
+        while (y, m) <= (end.year, end.month):
+            keys.append(f"{y:04d}-{m:02d}")
+            y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+            if len(keys) > max_cycles:
+                break
+
+    elif settings.cycle == BillingCycle.WEEKLY:
+        d = start - timedelta(days=start.weekday())
+        while d <= end:
+            iso = d.isocalendar()
+            keys.append(f"{iso.year:04d}-W{iso.week:02d}")
+            d += timedelta(days=7)
+            if len(keys) > max_cycles:
+                break
+
+    elif settings.cycle == BillingCycle.CUSTOM_WEEKS:
+        if not settings.cycle_weeks or settings.cycle_weeks <= 0:
+            raise HTTPException(status_code=400, detail="cycle_weeks is required for CUSTOM_WEEKS")
+        period_days = settings.cycle_weeks * 7
+        anchor = settings.anchor_date
+        n = max(0, (start - anchor).days // period_days)
+        d = anchor + timedelta(days=n * period_days)
+        while d <= end:
+            keys.append(d.isoformat())
+            d += timedelta(days=period_days)
+            if len(keys) > max_cycles:
+                break
+
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported billing cycle")
+
+    if len(keys) > max_cycles:
+        raise HTTPException(status_code=400, detail=f"Range covers more than {max_cycles} cycles")
+    return keys
+
+
+def _generate_for_cycles(
     *,
     db: Session,
     org_id: UUID,
-    force: bool = False,
-    cycle_key_override: str | None = None,
-    created_by_id: UUID | None = None,
-) -> dict:
-    settings = _get_or_create_settings(db=db, org_id=org_id)
-    cycle_key, start_dt, end_dt = _compute_cycle(settings=settings, cycle_key=cycle_key_override)
+    settings: OrgBillingSettings,
+    cycles: list[tuple[str, datetime, datetime]],
+    force: bool,
+    created_by_id: UUID | None,
+) -> tuple[int, int]:
+    """Gera as cobranças de N ciclos numa passada; retorna (created, skipped).
 
+    Uma carga de membros, uma query de presença para a janela inteira, um probe
+    das cobranças existentes (por cycle_key) e um INSERT em lote.
+    """
     members: list[OrgMember] = db.query(OrgMember).filter(OrgMember.org_id == org_id).all()
 
-    created = 0
-    skipped = 0
-
-    def ensure_charge(
-        member: OrgMember,
-        charge_type: ChargeType,
-        amount: float,
-        cycle_key_value: str,
-        game_id: UUID | None = None,
-    ) -> None:
-        nonlocal created, skipped
-
-        existing = (
-            db.query(OrgCharge)
-            .filter(
-                OrgCharge.org_id == org_id,
-                OrgCharge.org_member_id == member.id,
-                OrgCharge.cycle_key == cycle_key_value,
-                OrgCharge.type == charge_type,
-            )
-            .first()
-        )
-
-        if existing:
-            if existing.status == ChargeStatus.PAID:
-                skipped += 1
-                return
-            if not force:
-                skipped += 1
-                return
-            existing.amount = amount
-            existing.game_id = game_id
-            if existing.status == ChargeStatus.VOID:
-                existing.status = ChargeStatus.PENDING
-                existing.voided_at = None
-            skipped += 1
-            return
-
-        charge = OrgCharge(
-            org_id=org_id,
-            org_member_id=member.id,
-            cycle_key=cycle_key_value,
-            type=charge_type,
-            status=ChargeStatus.PENDING,
-            amount=amount,
-            created_by_id=created_by_id,
-            game_id=game_id,
-        )
-        db.add(charge)
-        created += 1
+    # (org_member_id, cycle_key, type) -> (amount, game_id)
+    wanted: dict[tuple[UUID, str, ChargeType], tuple[float, UUID | None]] = {}
 
     # MEMBERSHIP
     if settings.billing_mode in (BillingMode.MEMBERSHIP, BillingMode.HYBRID):
-        for m in members:
-            if m.member_type == MemberType.MONTHLY:
-                ensure_charge(
-                    m,
-                    ChargeType.MEMBERSHIP,
-                    float(settings.membership_amount),
-                    cycle_key_value=cycle_key,
-                )
+        monthly = [m for m in members if m.member_type == MemberType.MONTHLY]
+        amount = float(settings.membership_amount)
+        for cycle_key, _, _ in cycles:
+            for m in monthly:
+                wanted[(m.id, cycle_key, ChargeType.MEMBERSHIP)] = (amount, None)
 
     # PER_SESSION por jogo (GUEST + GOING)
-    if settings.billing_mode in (BillingMode.PER_SESSION, BillingMode.HYBRID):
+    if cycles and settings.billing_mode in (BillingMode.PER_SESSION, BillingMode.HYBRID):
+        start_dt = min(c[1] for c in cycles)
+        end_dt = max(c[2] for c in cycles)
         rows = (
             db.query(Game.id.label("game_id"), OrgMember.id.label("org_member_id"))
             .join(GameAttendance, GameAttendance.game_id == Game.id)
@@ -104,19 +208,236 @@ def generate_charges_for_org(
             .distinct()
             .all()
         )
-
-        member_by_id = {m.id: m for m in members}
+        amount = float(settings.session_amount)
         for r in rows:
-            member = member_by_id.get(r.org_member_id)
-            if not member:
-                continue
-            ensure_charge(
-                member,
-                ChargeType.PER_SESSION,
-                float(settings.session_amount),
-                cycle_key_value=f"GAME:{r.game_id}",
-                game_id=r.game_id,
+            wanted[(r.org_member_id, f"GAME:{r.game_id}", ChargeType.PER_SESSION)] = (amount, r.game_id)
+
+    if not wanted:
+        return 0, 0
+
+    skipped = 0
+    keys = {k[1] for k in wanted}
+    existing = (
+        db.query(OrgCharge)
+        .filter(OrgCharge.org_id == org_id, OrgCharge.cycle_key.in_(keys))
+        .all()
+    )
+    for charge in existing:
+        target = wanted.pop((charge.org_member_id, charge.cycle_key, charge.type), None)
+        if target is None:
+            continue
+        skipped += 1
+        if charge.status == ChargeStatus.PAID or not force:
+            continue
+        charge.amount, charge.game_id = target
+        if charge.status == ChargeStatus.VOID:
+            charge.status = ChargeStatus.PENDING
+            charge.voided_at = None
+
+    # ciclo antigo já arquivado (PAID/VOID): não volta como cobrança nova
+    if wanted:
+        archived = (
+            db.query(OrgChargeArchive.org_member_id, OrgChargeArchive.cycle_key, OrgChargeArchive.type)
+            .filter(OrgChargeArchive.org_id == org_id, OrgChargeArchive.cycle_key.in_(keys))
+            .all()
+        )
+        for r in archived:
+            if wanted.pop((r.org_member_id, r.cycle_key, r.type), None) is not None:
+                skipped += 1
+
+    created = 0
+    values = [
+        {
+            "id": uuid.uuid4(),
+            "org_id": org_id,
+            "org_member_id": member_id,
+            "cycle_key": cycle_key,
+            "type": charge_type,
+            "status": ChargeStatus.PENDING,
+            "amount": amount,
+            "created_by_id": created_by_id,
+            "game_id": game_id,
+        }
+        for (member_id, cycle_key, charge_type), (amount, game_id) in wanted.items()
+    ]
+    for i in range(0, len(values), _INSERT_BATCH):
+        chunk = values[i : i + _INSERT_BATCH]
+        # corrida com outra geração concorrente: uq_org_charges_org_member_cycle_type decide,
+        # quem perdeu conta como skipped
+        stmt = pg_insert(OrgCharge).values(chunk).on_conflict_do_nothing()
+        inserted = db.execute(stmt).rowcount
+        created += inserted
+        skipped += len(chunk) - inserted
+    if values:
+        mark_dirty(db, org_id)  # INSERT via Core não passa pelo after_flush
+
+    return created, skipped
+
+
+def generate_charges_for_org(
+    *,
+    db: Session,
+    org_id: UUID,
+    force: bool = False,
+    cycle_key_override: str | None = None,
+    created_by_id: UUID | None = None,
+) -> dict:
+    settings = get_or_create_settings(db=db, org_id=org_id)
+    cycle = compute_cycle(settings=settings, cycle_key=cycle_key_override)
+    created, skipped = _generate_for_cycles(
+        db=db, org_id=org_id, settings=settings, cycles=[cycle], force=force, created_by_id=created_by_id
+    )
+    db.commit()
+    return {"cycle_key": cycle[0], "created": created, "skipped": skipped}
+
+
+def generate_charges_for_range(
+    *,
+    db: Session,
+    org_id: UUID,
+    start_date: date,
+    end_date: date,
+    force: bool = False,
+    created_by_id: UUID | None = None,
+) -> dict:
+    """Backfill: todos os ciclos que tocam [start_date, end_date] numa transação só."""
+    from app.services.cycle_calendar import get_cycle_calendar
+
+    settings = get_or_create_settings(db=db, org_id=org_id)
+    cycle_keys_in_range(settings, start_date, end_date)  # valida o teto de ciclos do backfill
+    calendar = get_cycle_calendar(settings, start_date, end_date)
+    start_dt = datetime.combine(start_date, time.min, tzinfo=timezone.utc)
+    end_dt = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    cycles = [w for w in calendar.windows() if w[2] > start_dt and w[1] < end_dt]
+    keys = [w[0] for w in cycles]
+    created, skipped = _generate_for_cycles(
+        db=db, org_id=org_id, settings=settings, cycles=cycles, force=force, created_by_id=created_by_id
+    )
+    db.commit()
+    return {"cycle_keys": keys, "created": created, "skipped": skipped}
+
+
+def bulk_transition_charges(
+    *,
+    db: Session,
+    org_id: UUID,
+    status: ChargeStatus,
+    actor_id: UUID,
+    charge_ids: list[UUID] | None = None,
+    cycle_key: str | None = None,
+    current_status: ChargeStatus | None = None,
+    paid_at_by_charge: dict[UUID, datetime] | None = None,
+) -> dict:
+    """PAID/VOID em lote: valida o conjunto inteiro (tudo ou nada) e comita uma vez.
+
+    PAID: um INSERT multi-row dos lançamentos (RETURNING) e um UPDATE ... FROM
+    (VALUES ...) ligando cada cobrança ao seu lançamento. VOID: um UPDATE.
+    Mesmas regras do PATCH unitário: não paga VOID, não anula PAID, e cobrança
+    já no status alvo conta como unchanged. paid_at_by_charge (import de extrato)
+    usa a data do pagamento em paid_at/occurred_at em vez de agora.
+    """
+    if status not in (ChargeStatus.PAID, ChargeStatus.VOID):
+        raise HTTPException(status_code=400, detail="Unsupported status transition")
+    if not charge_ids and not cycle_key:
+        raise HTTPException(status_code=400, detail="charge_ids or cycle_key is required")
+
+    q = db.query(
+        OrgCharge.id,
+        OrgCharge.status,
+        OrgCharge.amount,
+        OrgCharge.cycle_key,
+        OrgCharge.type,
+        OrgCharge.org_member_id,
+        OrgCharge.ledger_entry_id,
+    ).filter(OrgCharge.org_id == org_id)
+    if charge_ids:
+        q = q.filter(OrgCharge.id.in_(set(charge_ids)))
+    if cycle_key:
+        q = q.filter(OrgCharge.cycle_key == cycle_key)
+    if current_status:
+        q = q.filter(OrgCharge.status == current_status)
+    # trava as linhas: duas baixas concorrentes não criam lançamento duplicado
+    rows = q.with_for_update().all()
+
+    if charge_ids:
+        missing = set(charge_ids) - {r.id for r in rows}
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Charges not found: {sorted(str(i) for i in missing)}")
+
+    forbidden = ChargeStatus.VOID if status == ChargeStatus.PAID else ChargeStatus.PAID
+    blocked = [str(r.id) for r in rows if r.status == forbidden]
+    if blocked:
+        verb = "pay a VOID" if status == ChargeStatus.PAID else "void a PAID"
+        raise HTTPException(status_code=400, detail=f"Cannot {verb} charge: {blocked}")
+
+    todo = [r for r in rows if r.status != status]
+    now = datetime.now(timezone.utc)
+    paid_at = {r.id: (paid_at_by_charge or {}).get(r.id, now) for r in todo}
+    entries_created = 0
+
+    if todo and status == ChargeStatus.PAID:
+        entry_by_charge = {r.id: uuid.uuid4() for r in todo if not r.ledger_entry_id}
+        if entry_by_charge:
+            inserted = db.execute(
+                insert(LedgerEntry)
+                .values(
+                    [
+                        {
+                            "id": entry_by_charge[r.id],
+                            "org_id": org_id,
+                            "type": LedgerType.INCOME,
+                            "amount": r.amount,
+                            "description": f"Charge paid: {r.cycle_key} ({r.type.value})",
+                            "occurred_at": paid_at[r.id],
+                            "related_member_id": r.org_member_id,
+                            "created_by_id": actor_id,
+                        }
+                        for r in todo
+                        if r.id in entry_by_charge
+                    ]
+                )
+                .returning(LedgerEntry.id)
+            ).scalars().all()
+            if len(inserted) != len(entry_by_charge):
+                raise HTTPException(status_code=500, detail="Ledger insert mismatch")
+            entries_created = len(inserted)
+
+        links = values(
+            column("charge_id", PGUUID(as_uuid=True)),
+            column("entry_id", PGUUID(as_uuid=True)),
+            column("paid_at", DateTime(timezone=True)),
+            name="links",
+        ).data([(r.id, entry_by_charge.get(r.id), paid_at[r.id]) for r in todo])
+        # cast explícito: se todas as linhas vierem com NULL o VALUES sai como text
+        entry_id = cast(links.c.entry_id, PGUUID(as_uuid=True))
+        db.execute(
+            update(OrgCharge)
+            .where(OrgCharge.org_id == org_id, OrgCharge.id == links.c.charge_id)
+            .values(
+                status=ChargeStatus.PAID,
+                paid_at=links.c.paid_at,
+                voided_at=None,
+                ledger_entry_id=func.coalesce(OrgCharge.ledger_entry_id, entry_id),
+                created_by_id=case((entry_id.isnot(None), actor_id), else_=OrgCharge.created_by_id),
             )
+            .execution_options(synchronize_session=False)
+        )
+
+    elif todo:
+        db.execute(
+            update(OrgCharge)
+            .where(OrgCharge.org_id == org_id, OrgCharge.id.in_([r.id for r in todo]))
+            .values(status=ChargeStatus.VOID, voided_at=now)
+            .execution_options(synchronize_session=False)
+        )
 
+    if todo:
+        mark_dirty(db, org_id)
     db.commit()
-    return {"cycle_key": cycle_key, "created": created, "skipped": skipped}
+    return {
+        "status": status,
+        "updated": len(todo),
+        "unchanged": len(rows) - len(todo),
+        "ledger_entries_created": entries_created,
+        "charge_ids": [r.id for r in todo],
+    }
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from uuid import UUID
+
+from app.models.org_billing_settings import OrgBillingSettings
+from app.services.billing_service import compute_cycle, cycle_keys_in_range
+
+# Calendário de ciclos de cobrança de uma org.
+#
+# Expande o OrgBillingSettings na lista ordenada de janelas [start, end) com a
+# mesma matemática de compute_cycle. Quem consome (breakdown financeiro e
+# geração por range) manda as janelas para o Postgres, que faz o bucketing
+# no próprio statement.
+#
+# get_cycle_calendar() memoiza por (org_id, settings.updated_at): qualquer PUT
+# em billing-settings muda o updated_at e a entrada velha deixa de casar. O
+# horizonte só cresce (união do que já foi pedido), então dashboards com
+# períodos diferentes reusam o mesmo.
+
+_MAX_CYCLES = 5000
+_CACHE_SIZE = 1024
+
+
+class CycleCalendar:
+    def __init__(self, windows: list[tuple[str, datetime, datetime]], horizon: tuple[date, date]):
+        self._windows = windows
+        self.horizon = horizon
+
+    @classmethod
+    def build(cls, settings: OrgBillingSettings, start: date, end: date) -> "CycleCalendar":
+        keys = cycle_keys_in_range(settings, start, end, max_cycles=_MAX_CYCLES)
+        return cls([compute_cycle(settings=settings, cycle_key=k) for k in keys], (start, end))
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def covers(self, start: date, end: date) -> bool:
+        return self.horizon[0] <= start and end <= self.horizon[1]
+
+    def windows(self) -> list[tuple[str, datetime, datetime]]:
+        return list(self._windows)
+
+
+_cache: OrderedDict[UUID, tuple[datetime | None, CycleCalendar]] = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_cycle_calendar(settings: OrgBillingSettings, start: date, end: date) -> CycleCalendar:
+    """Calendário que cobre [start, end], memoizado por (org_id, updated_at)."""
+    org_id = settings.org_id
+    with _lock:
+        entry = _cache.get(org_id)
+        if entry and entry[0] == settings.updated_at and entry[1].covers(start, end):
+            _cache.move_to_end(org_id)
+            return entry[1]
+
+    if entry and entry[0] == settings.updated_at:
+        # mesma config, horizonte maior: reconstrói cobrindo a união
+        start = min(start, entry[1].horizon[0])
+        end = max(end, entry[1].horizon[1])
+    calendar = CycleCalendar.build(settings, start, end)
+
+    with _lock:
+        _cache[org_id] = (settings.updated_at, calendar)
+        _cache.move_to_end(org_id)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return calendar
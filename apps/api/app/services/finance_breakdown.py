@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import DateTime, String, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Session
+
+from app.models.org_billing_settings import OrgBillingSettings
+from app.services.archive import archive_totals, needs_archive
+from app.services.billing_service import cycle_keys_in_range
+from app.services.finance_cache import FINANCE_CACHE
+
+# Totais por ciclo de cobrança num statement só.
+#
+# As janelas vêm do calendário de ciclos (mesma matemática do billing) e entram
+# como arrays; o Postgres faz o resto:
+#   - ledger: soma INCOME/EXPENSE por occurred_at dentro da janela;
+#   - MEMBERSHIP: cobrança casa pelo cycle_key do ciclo;
+#   - PER_SESSION (cycle_key "GAME:<id>"): cai no ciclo do start_at do jogo.
+# Cobranças MEMBERSHIP com cycle_key de outra definição de ciclo (settings
+# trocado depois) não casam com nenhuma janela e ficam de fora.
+# Janela anterior ao horizonte do arquivo (app.services.archive): a mesma
+# query lê tabela quente + arquivo via UNION ALL.
+
+_ARCHIVED_LEDGER = (
+    "(SELECT org_id, type, amount, occurred_at FROM ledger_entries "
+    "UNION ALL SELECT org_id, type, amount, occurred_at FROM ledger_entries_archive)"
+)
+_ARCHIVED_CHARGES = (
+    "(SELECT org_id, type, status, amount, cycle_key, game_id FROM org_charges "
+    "UNION ALL SELECT org_id, type, status, amount, cycle_key, game_id FROM org_charges_archive)"
+)
+
+_BREAKDOWN_TEMPLATE = """
+    WITH cycles AS (
+        SELECT *
+        FROM unnest(CAST(:keys AS text[]), CAST(:starts AS timestamptz[]), CAST(:ends AS timestamptz[]))
+             AS c(cycle_key, start_at, end_at)
+    ),
+    ledger AS (
+        SELECT c.cycle_key,
+               SUM(l.amount) FILTER (WHERE l.type = 'INCOME') AS income_total,
+               SUM(l.amount) FILTER (WHERE l.type = 'EXPENSE') AS expense_total
+        FROM cycles c
+        JOIN {ledger} l
+          ON l.org_id = :org_id AND l.occurred_at >= c.start_at AND l.occurred_at < c.end_at
+        GROUP BY c.cycle_key
+    ),
+    charges AS (
+        SELECT c.cycle_key, ch.status, ch.amount
+        FROM cycles c
+        JOIN {charges} ch
+          ON ch.org_id = :org_id AND ch.type = 'MEMBERSHIP' AND ch.cycle_key = c.cycle_key
+        UNION ALL
+        SELECT c.cycle_key, ch.status, ch.amount
+        FROM cycles c
+        JOIN games g
+          ON g.org_id = :org_id AND g.start_at >= c.start_at AND g.start_at < c.end_at
+        JOIN {charges} ch
+          ON ch.org_id = :org_id AND ch.type = 'PER_SESSION' AND ch.game_id = g.id
+    ),
+    charge_totals AS (
+        SELECT cycle_key,
+               SUM(amount) FILTER (WHERE status = 'PENDING') AS pending_total,
+               SUM(amount) FILTER (WHERE status = 'PAID') AS paid_total,
+               COUNT(*) FILTER (WHERE status = 'PENDING') AS pending_count,
+               COUNT(*) FILTER (WHERE status = 'PAID') AS paid_count
+        FROM charges
+        GROUP BY cycle_key
+    )
+    SELECT c.cycle_key,
+           c.start_at,
+           c.end_at,
+           COALESCE(l.income_total, 0) AS income_total,
+           COALESCE(l.expense_total, 0) AS expense_total,
+           COALESCE(t.pending_total, 0) AS pending_total,
+           COALESCE(t.paid_total, 0) AS paid_total,
+           COALESCE(t.pending_count, 0) AS pending_count,
+           COALESCE(t.paid_count, 0) AS paid_count
+    FROM cycles c
+    LEFT JOIN ledger l ON l.cycle_key = c.cycle_key
+    LEFT JOIN charge_totals t ON t.cycle_key = c.cycle_key
+    ORDER BY c.start_at
+"""
+
+
+def _breakdown_sql(ledger: str, charges: str):
+    return text(_BREAKDOWN_TEMPLATE.format(ledger=ledger, charges=charges)).bindparams(
+        bindparam("org_id", type_=UUID(as_uuid=True)),
+        bindparam("keys", type_=ARRAY(String)),
+        bindparam("starts", type_=ARRAY(DateTime(timezone=True))),
+        bindparam("ends", type_=ARRAY(DateTime(timezone=True))),
+    )
+
+
+_BREAKDOWN_SQL = _breakdown_sql("ledger_entries", "org_charges")
+_BREAKDOWN_ARCHIVE_SQL = _breakdown_sql(_ARCHIVED_LEDGER, _ARCHIVED_CHARGES)
+
+
+def finance_breakdown(db: Session, settings: OrgBillingSettings, start: date, end: date) -> list[dict]:
+    org_id = settings.org_id
+    cache_key = ("breakdown", start, end, settings.updated_at)
+    cached = FINANCE_CACHE.get(org_id, cache_key)
+    if cached is not None:
+        return cached
+    version = FINANCE_CACHE.version(org_id)
+
+    from app.services.cycle_calendar import get_cycle_calendar
+
+    cycle_keys_in_range(settings, start, end)  # mesmo teto do backfill
+    calendar = get_cycle_calendar(settings, start, end)
+    windows = [w for w in calendar.windows() if w[1].date() <= end and w[2].date() > start]
+
+    totals = archive_totals(db, org_id)
+    first_start = windows[0][1] if windows else None
+    archived = totals is not None and (
+        needs_archive(totals.ledger_archived_before, first_start)
+        or needs_archive(totals.charges_archived_before, first_start)
+    )
+
+    rows = db.execute(
+        _BREAKDOWN_ARCHIVE_SQL if archived else _BREAKDOWN_SQL,
+        {
+            "org_id": org_id,
+            "keys": [w[0] for w in windows],
+            "starts": [w[1] for w in windows],
+            "ends": [w[2] for w in windows],
+        },
+    ).all()
+
+    result = [
+        {
+            "cycle_key": r.cycle_key,
+            "start": r.start_at,
+            "end": r.end_at,
+            "income_total": float(r.income_total),
+            "expense_total": float(r.expense_total),
+            "balance": float(r.income_total - r.expense_total),
+            "pending_charges_total": float(r.pending_total),
+            "paid_charges_total": float(r.paid_total),
+            "pending_charges_count": int(r.pending_count),
+            "paid_charges_count": int(r.paid_count),
+        }
+        for r in rows
+    ]
+    FINANCE_CACHE.put(org_id, cache_key, result, version)
+    return result
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.game import Game
+from app.models.ledger import LedgerEntry
+from app.models.org_billing_settings import OrgBillingSettings
+from app.models.org_charge import OrgCharge
+
+# Cache de leituras financeiras agregadas (breakdown por ciclo), por org.
+#
+# Invalida no commit de qualquer escrita que mude os números: hooks de sessão
+# pegam inserts/updates/deletes do ORM em ledger_entries, org_charges, games
+# (o start_at decide o ciclo das cobranças PER_SESSION) e org_billing_settings.
+# Escrita via Core (INSERT em lote) chama mark_dirty() explicitamente.
+#
+# Cada org tem uma versão: a leitura captura a versão antes da query e só grava
+# se ninguém commitou no meio. Cache é por processo (um worker uvicorn).
+#
+# Invalidação é best-effort: só o processo que fez a escrita fica sabendo.
+# Escrita em outro worker uvicorn, no app.scripts.job_worker ou no worker
+# embutido de outra API (ex.: generate_charges com defer=true) não limpa este
+# cache; por isso toda entrada vence em ttl_seconds (FINANCE_CACHE_TTL_SECONDS)
+# e o atraso máximo de uma escrita "de fora" é esse TTL.
+
+_TRACKED = (LedgerEntry, OrgCharge, Game, OrgBillingSettings)
+_DIRTY_KEY = "finance_dirty_orgs"
+
+
+class FinanceCache:
+    def __init__(self, max_orgs: int = 1024, ttl_seconds: float = 60.0):
+        self.max_orgs = max_orgs
+        self.ttl_seconds = ttl_seconds
+        # org -> key -> (expira_em monotonic, valor)
+        self._entries: OrderedDict[UUID, dict[Any, tuple[float, Any]]] = OrderedDict()
+        self._versions: dict[UUID, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, org_id: UUID) -> int:
+        with self._lock:
+            return self._versions.get(org_id, 0)
+
+    def get(self, org_id: UUID, key: Any) -> Any | None:
+        with self._lock:
+            entries = self._entries.get(org_id)
+            if entries is None or key not in entries:
+                return None
+            expires_at, value = entries[key]
+            if expires_at <= time.monotonic():
+                del entries[key]
+                return None
+            self._entries.move_to_end(org_id)
+            return value
+
+    def put(self, org_id: UUID, key: Any, value: Any, version: int) -> None:
+        with self._lock:
+            if self._versions.get(org_id, 0) != version:
+                return  # houve commit durante a leitura: o valor já nasceu velho
+            self._entries.setdefault(org_id, {})[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(org_id)
+            while len(self._entries) > self.max_orgs:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, org_id: UUID) -> None:
+        with self._lock:
+            self._versions[org_id] = self._versions.get(org_id, 0) + 1
+            self._entries.pop(org_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            for org_id in list(self._entries):
+                self._versions[org_id] = self._versions.get(org_id, 0) + 1
+            self._entries.clear()
+
+
+FINANCE_CACHE = FinanceCache(ttl_seconds=settings.FINANCE_CACHE_TTL_SECONDS)
+
+
+def mark_dirty(db: Session, org_id: UUID) -> None:
+    """Para escritas fora do unit of work (Core): invalida a org no próximo commit."""
+    db.info.setdefault(_DIRTY_KEY, set()).add(org_id)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _TRACKED) and obj.org_id is not None:
+            session.info.setdefault(_DIRTY_KEY, set()).add(obj.org_id)
+
+
+def _after_commit(session: Session) -> None:
+    for org_id in session.info.pop(_DIRTY_KEY, ()):
+        FINANCE_CACHE.invalidate(org_id)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
+
+
+def install_finance_cache_invalidation(session_factory) -> None:
+    if event.contains(session_factory, "after_commit", _after_commit):
+        return
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
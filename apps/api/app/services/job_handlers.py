@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.game import Game
+from app.services.archive import BATCH_SIZE, archive_org
+from app.services.billing_service import generate_charges_for_org, generate_charges_for_range
+from app.services.jobs import job_handler
+from app.services.pairing_history import record_game_teams
+
+# Handlers da fila (app.services.jobs). Payload é JSON: ids/datas chegam como str.
+# Todos idempotentes: o worker pode entregar o mesmo job mais de uma vez.
+
+BILLING_GENERATE = "billing.generate_charges"
+PAIRING_RECORD = "pairing.record_game_teams"
+ARCHIVE_SETTLED = "archive.settled_rows"
+
+
+def _uuid(value: str | None) -> UUID | None:
+    return UUID(value) if value else None
+
+
+@job_handler(BILLING_GENERATE)
+def run_generate_charges(db: Session, payload: dict) -> dict:
+    # ON CONFLICT DO NOTHING + probe de existentes: reexecutar não duplica cobrança
+    org_id = UUID(payload["org_id"])
+    if payload.get("start_date"):
+        r = generate_charges_for_range(
+            db=db,
+            org_id=org_id,
+            start_date=date.fromisoformat(payload["start_date"]),
+            end_date=date.fromisoformat(payload["end_date"]),
+            force=bool(payload.get("force")),
+            created_by_id=_uuid(payload.get("created_by_id")),
+        )
+    else:
+        r = generate_charges_for_org(
+            db=db,
+            org_id=org_id,
+            force=bool(payload.get("force")),
+            cycle_key_override=payload.get("cycle_key"),
+            created_by_id=_uuid(payload.get("created_by_id")),
+        )
+    return {"created": r["created"], "skipped": r["skipped"], "cycle_keys": r.get("cycle_keys") or [r.get("cycle_key")]}
+
+
+@job_handler(PAIRING_RECORD)
+def run_record_game_teams(db: Session, payload: dict) -> dict:
+    # FOR UPDATE: dois jobs do mesmo jogo não aplicam o mesmo diff em paralelo
+    game = (
+        db.query(Game)
+        .filter(Game.id == UUID(payload["game_id"]), Game.org_id == UUID(payload["org_id"]))
+        .with_for_update()
+        .first()
+    )
+    if game is None:
+        return {"skipped": "game not found"}
+    record_game_teams(db, game)
+    db.commit()
+    return {"game_id": str(game.id)}
+
+
+@job_handler(ARCHIVE_SETTLED)
+def run_archive_settled(db: Session, payload: dict) -> dict:
+    # cada lote comita sozinho; reexecutar só move o que ainda não saiu
+    r = archive_org(
+        db,
+        UUID(payload["org_id"]),
+        cutoff=datetime.fromisoformat(payload["cutoff"]) if payload.get("cutoff") else None,
+        batch_size=int(payload.get("batch_size") or BATCH_SIZE),
+    )
+    return {
+        "cutoff": r.cutoff.isoformat(),
+        "charges": r.charges,
+        "ledger_entries": r.ledger_entries,
+        "batches": r.batches,
+        "lock_timeouts": r.lock_timeouts,
+    }
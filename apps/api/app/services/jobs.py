@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from uuid import UUID
+
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.background_job import BackgroundJob, JobStatus
+
+logger = logging.getLogger("app.services.jobs")
+
+# Fila de jobs em Postgres (outbox transacional).
+#
+# enqueue() grava o job na sessão do request, sem commit: o job só existe se a
+# mudança de domínio commitar junto (e some no rollback). O worker faz polling
+# com FOR UPDATE SKIP LOCKED, então N threads/processos consomem a mesma fila
+# sem pegar o mesmo job. Cada job roda na própria sessão/transação; erro volta
+# para PENDING com backoff exponencial (+ jitter) até max_attempts, depois FAILED.
+# Job RUNNING cujo worker morreu volta para PENDING depois do lease.
+#
+# O índice único de dedupe só cobre PENDING: com um job RUNNING, enqueue() da
+# mesma chave cria um irmão pendente. Se o RUNNING falhar (ou perder o lease)
+# ele não volta para PENDING: fica DONE com result {"superseded": true} e o
+# irmão, mais novo, refaz o trabalho.
+#
+# Entrega é at-least-once: handler tem que ser idempotente.
+
+Handler = Callable[[Session, dict], "dict | None"]
+HANDLERS: dict[str, Handler] = {}
+
+_BACKOFF_BASE_SECONDS = 5.0
+_BACKOFF_MAX_SECONDS = 3600.0
+_LEASE_SECONDS = 600
+_ERROR_PREVIEW = 4000
+
+
+def job_handler(kind: str):
+    def decorator(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+
+    return decorator
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: dict[str, Any] | None = None,
+    *,
+    org_id: UUID | None = None,
+    dedupe_key: str | None = None,
+    delay_seconds: float = 0,
+    max_attempts: int = 5,
+) -> UUID:
+    """Grava o job na transação corrente (sem commit). Com dedupe_key, reaproveita o pendente."""
+    job_id = uuid.uuid4()
+    values = {
+        "id": job_id,
+        "org_id": org_id,
+        "kind": kind,
+        "payload": payload or {},
+        "dedupe_key": dedupe_key,
+        "status": JobStatus.PENDING,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_after": datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+    }
+    stmt = pg_insert(BackgroundJob).values(**values)
+    if dedupe_key is None:
+        db.execute(stmt)
+        return job_id
+
+    inserted = db.execute(
+        stmt.on_conflict_do_nothing(
+            index_elements=[BackgroundJob.dedupe_key],
+            index_where=text("status = 'PENDING'"),
+        ).returning(BackgroundJob.id)
+    ).scalar()
+    if inserted is not None:
+        return inserted
+    existing = db.execute(
+        select(BackgroundJob.id).where(
+            BackgroundJob.dedupe_key == dedupe_key, BackgroundJob.status == JobStatus.PENDING
+        )
+    ).scalar()
+    # pendente sumiu entre o INSERT e o SELECT (worker pegou): enfileira de novo
+    return existing if existing is not None else enqueue(
+        db, kind, payload, org_id=org_id, dedupe_key=dedupe_key, delay_seconds=delay_seconds, max_attempts=max_attempts
+    )
+
+
+_CLAIM_SQL = text(
+    """
+    UPDATE background_jobs j
+    SET status = 'RUNNING', locked_at = now(), locked_by = :worker, attempts = j.attempts + 1
+    FROM (
+        SELECT id FROM background_jobs
+        WHERE status = 'PENDING' AND run_after <= now()
+        ORDER BY run_after
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    ) picked
+    WHERE j.id = picked.id
+    RETURNING j.id, j.kind, j.payload, j.org_id, j.dedupe_key, j.attempts, j.max_attempts
+    """
+)
+
+_REQUEUE_STALE_SQL = text(
+    """
+    WITH stale AS (
+        SELECT id, dedupe_key, created_at FROM background_jobs
+        WHERE status = 'RUNNING' AND locked_at < now() - make_interval(secs => :lease)
+        FOR UPDATE SKIP LOCKED
+    ),
+    ranked AS (
+        -- com a mesma chave só o mais novo pode voltar, e só se não houver pendente
+        SELECT id,
+               dedupe_key IS NOT NULL AND (
+                   row_number() OVER (PARTITION BY dedupe_key ORDER BY created_at DESC, id DESC) > 1
+                   OR EXISTS (
+                       SELECT 1 FROM background_jobs p
+                       WHERE p.status = 'PENDING' AND p.dedupe_key = stale.dedupe_key
+                   )
+               ) AS superseded
+        FROM stale
+    )
+    UPDATE background_jobs j
+    SET status = CASE
+            WHEN r.superseded THEN 'DONE'::job_status
+            WHEN j.attempts >= j.max_attempts THEN 'FAILED'::job_status
+            ELSE 'PENDING'::job_status
+        END,
+        result = CASE WHEN r.superseded THEN '{"superseded": true}'::jsonb ELSE j.result END,
+        finished_at = CASE WHEN r.superseded OR j.attempts >= j.max_attempts THEN now() END,
+        last_error = 'worker lease expired',
+        locked_at = NULL,
+        locked_by = NULL,
+        run_after = now()
+    FROM ranked r
+    WHERE j.id = r.id
+    """
+)
+
+_PENDING_SIBLING_SQL = text(
+    "SELECT EXISTS (SELECT 1 FROM background_jobs WHERE status = 'PENDING' AND dedupe_key = :key AND id <> :id)"
+)
+
+
+def backoff_seconds(attempts: int) -> float:
+    delay = min(_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), _BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(db: Session, worker: str, limit: int) -> list:
+    rows = db.execute(_CLAIM_SQL, {"worker": worker, "limit": limit}).all()
+    db.commit()
+    return rows
+
+
+def requeue_stale(db: Session, lease_seconds: int = _LEASE_SECONDS) -> int:
+    n = db.execute(_REQUEUE_STALE_SQL, {"lease": lease_seconds}).rowcount
+    db.commit()
+    return n
+
+
+def run_job(session_factory, job) -> bool:
+    """Executa um job já reservado; True se concluiu."""
+    handler = HANDLERS.get(job.kind)
+    db = session_factory()
+    try:
+        if handler is None:
+            raise LookupError(f"no handler for job kind {job.kind!r}")
+        result = handler(db, dict(job.payload or {}))
+        db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job.id)
+            .values(status=JobStatus.DONE, result=result, last_error=None, finished_at=datetime.now(timezone.utc))
+        )
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        error = traceback.format_exc()[-_ERROR_PREVIEW:]
+        final = job.attempts >= job.max_attempts
+        superseded = False
+        if not final and job.dedupe_key is not None:
+            superseded = bool(db.execute(_PENDING_SIBLING_SQL, {"key": job.dedupe_key, "id": job.id}).scalar())
+        try:
+            _record_failure(db, job, error, final=final, superseded=superseded)
+        except IntegrityError:
+            # irmão pendente entrou entre o SELECT e o UPDATE
+            db.rollback()
+            superseded = True
+            _record_failure(db, job, error, final=False, superseded=True)
+        logger.warning(
+            json.dumps(
+                {
+                    "job_id": str(job.id),
+                    "kind": job.kind,
+                    "attempts": job.attempts,
+                    "final": final,
+                    "superseded": superseded,
+                },
+                default=str,
+            )
+        )
+        return False
+    finally:
+        db.close()
+
+
+def _record_failure(db: Session, job, error: str, *, final: bool, superseded: bool) -> None:
+    now = datetime.now(timezone.utc)
+    if superseded:
+        values = {"status": JobStatus.DONE, "result": {"superseded": True}, "finished_at": now}
+    elif final:
+        values = {"status": JobStatus.FAILED, "finished_at": now}
+    else:
+        values = {
+            "status": JobStatus.PENDING,
+            "run_after": now + timedelta(seconds=backoff_seconds(job.attempts)),
+            "finished_at": None,
+        }
+    db.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job.id)
+        .values(last_error=error, locked_at=None, locked_by=None, **values)
+    )
+    db.commit()
+
+
+def _load_handlers() -> None:
+    # registra os @job_handler (import tardio: evita ciclo services <-> jobs)
+    import app.services.job_handlers  # noqa: F401
+
+
+class JobWorker:
+    """concurrency threads, cada uma faz polling e roda um lote por vez."""
+
+    def __init__(
+        self,
+        session_factory,
+        *,
+        concurrency: int = 4,
+        batch_size: int = 1,
+        poll_interval: float = 1.0,
+        name: str | None = None,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stats = {"done": 0, "failed": 0}
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        _load_handlers()
+
+    def run_once(self, worker: str | None = None) -> int:
+        """Um ciclo de polling; devolve quantos jobs rodou."""
+        db = self.session_factory()
+        try:
+            try:
+                requeue_stale(db)
+            except Exception:
+                # linha problemática no requeue não pode travar o claim da fila inteira
+                db.rollback()
+                logger.exception("job requeue failed")
+            jobs = claim(db, worker or self.name, self.batch_size)
+        finally:
+            db.close()
+        for job in jobs:
+            ok = run_job(self.session_factory, job)
+            with self._lock:
+                self.stats["done" if ok else "failed"] += 1
+        return len(jobs)
+
+    def _loop(self, index: int) -> None:
+        worker = f"{self.name}#{index}"
+        while not self._stop.is_set():
+            try:
+                ran = self.run_once(worker)
+            except Exception:
+                logger.exception("job worker poll failed")
+                ran = 0
+            if not ran:
+                # fila vazia (ou banco fora): espera com jitter para as threads não baterem juntas
+                self._stop.wait(self.poll_interval * random.uniform(0.5, 1.5))
+
+    def start(self) -> None:
+        for i in range(self.concurrency):
+            t = threading.Thread(target=self._loop, args=(i,), name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float | None = 30.0) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads.clear()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import combinations
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.game import Game
+from app.models.game_team import GameTeamMember, TeamSide
+from app.models.pairing_history import OrgCaptainHistory, OrgPairHistory
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Histórico incremental de duplas/capitães por org.
+#
+# Ao finalizar os times de um jogo aplicamos só o DIFF entre o snapshot já
+# contabilizado (Game.teams_snapshot) e os times atuais, então refinalizar um
+# jogo não conta em dobro. Regras de fairness leem apenas as linhas dos
+# jogadores envolvidos (O(jogadores²)) em vez de varrer game_team_members.
+
+
+def _snapshot_for(db: Session, game: Game) -> dict:
+    rows = (
+        db.query(GameTeamMember.org_member_id, GameTeamMember.team)
+        .filter(GameTeamMember.org_id == game.org_id, GameTeamMember.game_id == game.id)
+        .all()
+    )
+    team_a = sorted(str(mid) for mid, team in rows if team == TeamSide.A)
+    team_b = sorted(str(mid) for mid, team in rows if team == TeamSide.B)
+    captains = sorted(str(mid) for mid in (game.captain_a_member_id, game.captain_b_member_id) if mid)
+    return {"A": team_a, "B": team_b, "captains": captains}
+
+
+def _pair_counts(snapshot: dict | None) -> Counter:
+    counts: Counter = Counter()
+    if not snapshot:
+        return counts
+    for side in ("A", "B"):
+        ids = sorted(UUID(x) for x in snapshot.get(side, []))
+        for a, b in combinations(ids, 2):
+            counts[(a, b)] += 1
+    return counts
+
+
+def _captain_counts(snapshot: dict | None) -> Counter:
+    if not snapshot:
+        return Counter()
+    return Counter(UUID(x) for x in snapshot.get("captains", []))
+
+
+def record_game_teams(db: Session, game: Game) -> None:
+    """Contabiliza os times/capitães atuais do jogo no histórico da org (sem commit)."""
+    new = _snapshot_for(db, game)
+    old = game.teams_snapshot
+
+    pair_delta = _pair_counts(new)
+    pair_delta.subtract(_pair_counts(old))
+    captain_delta = _captain_counts(new)
+    captain_delta.subtract(_captain_counts(old))
+
+    played_at = game.start_at
+
+    pair_rows = [
+        {
+            "org_id": game.org_id,
+            "member_a_id": a,
+            "member_b_id": b,
+            "together_count": d,
+            "last_played_at": played_at if d > 0 else None,
+        }
+        for (a, b), d in pair_delta.items()
+        if d
+    ]
+    if pair_rows:
+        stmt = pg_insert(OrgPairHistory)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_org_pair_history_org_pair",
+            set_={
+                "together_count": func.greatest(OrgPairHistory.together_count + stmt.excluded.together_count, 0),
+                # greatest() ignora NULL: desfazer não "volta" last_played_at
+                "last_played_at": func.greatest(OrgPairHistory.last_played_at, stmt.excluded.last_played_at),
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt, pair_rows)
+
+    captain_rows = [
+        {
+            "org_id": game.org_id,
+            "org_member_id": mid,
+            "captain_count": d,
+            "last_captain_at": played_at if d > 0 else None,
+        }
+        for mid, d in captain_delta.items()
+        if d
+    ]
+    if captain_rows:
+        stmt = pg_insert(OrgCaptainHistory)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_org_captain_history_org_member",
+            set_={
+                "captain_count": func.greatest(OrgCaptainHistory.captain_count + stmt.excluded.captain_count, 0),
+                "last_captain_at": func.greatest(OrgCaptainHistory.last_captain_at, stmt.excluded.last_captain_at),
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt, captain_rows)
+
+    game.teams_snapshot = new
+    game.teams_recorded_at = datetime.now(timezone.utc)
+
+
+def load_pair_matrix(
+    db: Session,
+    org_id: UUID,
+    member_ids: list[UUID],
+    since: datetime | None = None,
+) -> np.ndarray:
+    """Matriz simétrica (n, n) de vezes juntos entre os membros dados (ordem de member_ids).
+
+    Sem `since` (padrão do auto-balance): contagem de sempre (org_pair_history).
+    Com `since` (opt-in): só jogos com start_at >= since, recontados a partir do
+    snapshot de cada jogo -- uma linha por jogo da janela, não usa o incremental.
+    """
+    import numpy as np  # lazy: mantém numpy fora do import do app
+
+    n = len(member_ids)
+    out = np.zeros((n, n))
+    if n < 2:
+        return out
+
+    index = {mid: i for i, mid in enumerate(member_ids)}
+    if since is not None:
+        # together_count é acumulado desde sempre: filtrar por last_played_at traria a
+        # contagem total das duplas ativas. A janela relê os snapshots (um por jogo).
+        snapshots = (
+            db.query(Game.teams_snapshot)
+            .filter(Game.org_id == org_id, Game.start_at >= since, Game.teams_snapshot.isnot(None))
+            .all()
+        )
+        for (snapshot,) in snapshots:
+            for (a, b), count in _pair_counts(snapshot).items():
+                i, j = index.get(a), index.get(b)
+                if i is not None and j is not None:
+                    out[i, j] += count
+                    out[j, i] += count
+        return out
+
+    q = db.query(OrgPairHistory.member_a_id, OrgPairHistory.member_b_id, OrgPairHistory.together_count).filter(
+        OrgPairHistory.org_id == org_id,
+        OrgPairHistory.member_a_id.in_(member_ids),
+        OrgPairHistory.member_b_id.in_(member_ids),
+        OrgPairHistory.together_count > 0,
+    )
+    for a, b, count in q.all():
+        i, j = index[a], index[b]
+        out[i, j] = out[j, i] = float(count)
+    return out
+
+
+def load_captain_counts(db: Session, org_id: UUID, member_ids: list[UUID]) -> dict[UUID, int]:
+    if not member_ids:
+        return {}
+    rows = (
+        db.query(OrgCaptainHistory.org_member_id, OrgCaptainHistory.captain_count)
+        .filter(OrgCaptainHistory.org_id == org_id, OrgCaptainHistory.org_member_id.in_(member_ids))
+        .all()
+    )
+    return {mid: int(count) for mid, count in rows}
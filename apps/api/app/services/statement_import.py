@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import csv
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timezone
+from decimal import Decimal, InvalidOperation
+from typing import IO, Iterable, Iterator
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.org_charge import ChargeStatus, OrgCharge
+from app.models.org_member import OrgMember
+from app.models.statement_import import ImportedStatementLine
+from app.models.user import User
+
+# Import de extrato (CSV/OFX) com conciliação automática contra cobranças PENDING.
+#
+# O arquivo é lido em streaming (linha a linha). As cobranças pendentes da org
+# vêm numa query só e viram dois índices em memória:
+#   - (valor em centavos, org_member_id) -> cobranças, mais antiga primeiro;
+#   - referência normalizada -> membros (nome completo, apelido, email, parte
+#     local do email, telefone) e prefixo do id da cobrança -> cobrança.
+# Para cada crédito, os n-gramas da descrição são procurados no índice de
+# referências; o match só vale se apontar para UM membro com cobrança daquele
+# valor dentro da janela de datas. Referência ambígua (membros ou prefixo de
+# cobrança que bate com mais de uma) fica em unmatched.
+#
+# OFX traz FITID por transação: os já baixados ficam em imported_statement_lines
+# e são pulados antes do match (reimportar o extrato não paga de novo). CSV não
+# tem id estável de transação e não é deduplicado.
+
+MAX_STATEMENT_LINES = 50_000
+_FITID_CHUNK = 1000
+_CHARGE_REF_LEN = 8  # "ref a1b2c3d4" no memo do PIX = primeiros 8 hex do id da cobrança
+_MAX_NGRAM = 4
+
+_NON_WORD = re.compile(r"[^a-z0-9@._+-]+")
+_DIGITS = re.compile(r"\D+")
+_OFX_TAG = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+_CSV_DATE = ("date", "data", "dt", "data lancamento", "data_lancamento")
+_CSV_AMOUNT = ("amount", "valor", "value", "valor (r$)")
+_CSV_TEXT = ("description", "descricao", "memo", "historico", "reference", "referencia", "name", "nome")
+
+
+@dataclass
+class StatementLine:
+    line: int
+    date: date
+    amount: Decimal
+    text: str
+    fitid: str | None = None
+
+
+@dataclass
+class ImportReport:
+    lines: int = 0
+    credits: int = 0
+    matched: list[dict] = field(default_factory=list)
+    unmatched: list[dict] = field(default_factory=list)
+
+
+def _norm(value: str | None) -> str:
+    if not value:
+        return ""
+    v = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(_NON_WORD.sub(" ", v).split())
+
+
+def _parse_amount(raw: str) -> Decimal:
+    v = raw.strip().replace("R$", "").replace(" ", "")
+    if "," in v and "." in v:
+        # 1.234,56 (BR) ou 1,234.56
+        v = v.replace(".", "").replace(",", ".") if v.rfind(",") > v.rfind(".") else v.replace(",", "")
+    elif "," in v:
+        v = v.replace(",", ".")
+    try:
+        return Decimal(v)
+    except InvalidOperation:
+        raise ValueError(f"invalid amount: {raw!r}") from None
+
+
+def _parse_date(raw: str) -> date:
+    v = raw.strip()
+    if len(v) >= 8 and v[:8].isdigit():  # OFX: YYYYMMDD[HHMMSS[.XXX][TZ]]
+        return date(int(v[:4]), int(v[4:6]), int(v[6:8]))
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(v[:10], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"invalid date: {raw!r}")
+
+
+def _pick(header: dict[str, str], names: tuple[str, ...]) -> str | None:
+    for name in names:
+        if name in header:
+            return header[name]
+    return None
+
+
+def parse_csv(stream: IO[str]) -> Iterator[StatementLine | tuple[int, str]]:
+    """Linhas do CSV (',' ou ';'); erro de parse sai como (linha, motivo)."""
+    first = stream.readline()
+    delimiter = ";" if first.count(";") > first.count(",") else ","
+    header_row = next(csv.reader([first], delimiter=delimiter), [])
+    header = {_norm(h): h for h in header_row}
+    col_date, col_amount = _pick(header, _CSV_DATE), _pick(header, _CSV_AMOUNT)
+    col_text = [header[n] for n in _CSV_TEXT if n in header]
+    if not col_date or not col_amount:
+        raise HTTPException(status_code=400, detail="CSV needs date and amount columns")
+
+    for i, row in enumerate(csv.DictReader(stream, fieldnames=header_row, delimiter=delimiter), start=2):
+        try:
+            yield StatementLine(
+                line=i,
+                date=_parse_date(row[col_date] or ""),
+                amount=_parse_amount(row[col_amount] or ""),
+                text=" ".join(row[c] or "" for c in col_text),
+            )
+        except (ValueError, AttributeError) as exc:
+            yield (i, str(exc))
+
+
+def parse_ofx(stream: IO[str]) -> Iterator[StatementLine | tuple[int, str]]:
+    """<STMTTRN> de OFX 1.x (SGML, tags sem fechamento) ou 2.x (XML)."""
+    current: dict[str, str] | None = None
+    start_line = 0
+    for i, raw in enumerate(stream, start=1):
+        upper = raw.upper()
+        if "<STMTTRN>" in upper:
+            current, start_line = {}, i
+        if current is not None:
+            for tag, value in _OFX_TAG.findall(raw):
+                current[tag.upper()] = value.strip()
+        if "</STMTTRN>" in upper and current is not None:
+            try:
+                yield StatementLine(
+                    line=start_line,
+                    date=_parse_date(current.get("DTPOSTED", "")),
+                    amount=_parse_amount(current.get("TRNAMT", "")),
+                    text=" ".join(current.get(t, "") for t in ("NAME", "MEMO", "PAYEEID")).strip(),
+                    fitid=current.get("FITID"),
+                )
+            except ValueError as exc:
+                yield (start_line, str(exc))
+            current = None
+
+
+class ChargeMatcher:
+    def __init__(self, rows: Iterable, window_days: int):
+        self.window_days = window_days
+        self._by_amount_member: dict[tuple[int, UUID], list] = {}
+        self._by_ref: dict[str, set[UUID]] = {}
+        self._by_charge_ref: dict[str, list] = {}
+        self._taken: set[UUID] = set()
+
+        for r in rows:
+            cents = int((Decimal(r.amount) * 100).to_integral_value())
+            self._by_amount_member.setdefault((cents, r.org_member_id), []).append(r)
+            # prefixo de 8 hex pode colidir: guarda todas e decide no match
+            self._by_charge_ref.setdefault(r.id.hex[:_CHARGE_REF_LEN], []).append(r)
+            for ref in self._member_refs(r):
+                self._by_ref.setdefault(ref, set()).add(r.org_member_id)
+        for charges in self._by_amount_member.values():
+            charges.sort(key=lambda c: c.created_at)
+
+    @staticmethod
+    def _member_refs(r) -> set[str]:
+        refs = {_norm(r.full_name), _norm(r.nickname), _norm(r.email)}
+        if r.email and "@" in r.email:
+            refs.add(_norm(r.email.split("@", 1)[0]))
+        phone = _DIGITS.sub("", r.phone or "")
+        if len(phone) >= 8:
+            refs.add(phone[-8:])  # sem DDI/DDD
+        refs.discard("")
+        return refs
+
+    def _in_window(self, charge, when: date) -> bool:
+        return abs((when - charge.created_at.date()).days) <= self.window_days
+
+    def match(self, txn: StatementLine) -> tuple[object | None, str]:
+        words = _norm(txn.text).split()
+        cents = int((txn.amount * 100).to_integral_value())
+
+        # 1) referência explícita da cobrança no memo
+        for w in words:
+            if len(w) < _CHARGE_REF_LEN:
+                continue
+            hits = [
+                c
+                for c in self._by_charge_ref.get(w[:_CHARGE_REF_LEN], ())
+                if c.id not in self._taken
+                and int((Decimal(c.amount) * 100).to_integral_value()) == cents
+                and self._in_window(c, txn.date)
+            ]
+            if len(hits) > 1:
+                return None, "ambiguous_charge_ref"
+            if hits:
+                return self._take(hits[0]), "charge_ref"
+
+        # 2) n-gramas da descrição -> membros
+        members: set[UUID] = set()
+        for n in range(1, _MAX_NGRAM + 1):
+            for k in range(len(words) - n + 1):
+                hit = self._by_ref.get(" ".join(words[k : k + n]))
+                if hit:
+                    members |= hit
+        for w in words:
+            digits = _DIGITS.sub("", w)
+            if len(digits) >= 8:
+                members |= self._by_ref.get(digits[-8:], set())
+        if not members:
+            return None, "no_member_reference"
+
+        candidates = []
+        for member_id in members:
+            for charge in self._by_amount_member.get((cents, member_id), ()):
+                if charge.id not in self._taken and self._in_window(charge, txn.date):
+                    candidates.append(charge)
+                    break  # mais antiga elegível daquele membro
+        if not candidates:
+            return None, "no_pending_charge"
+        if len(candidates) > 1:
+            return None, "ambiguous"
+        return self._take(candidates[0]), "member_reference"
+
+    def _take(self, charge):
+        self._taken.add(charge.id)
+        return charge
+
+
+def load_pending_charges(db: Session, org_id: UUID) -> list:
+    """Uma query: cobranças PENDING + dados de referência do membro."""
+    return (
+        db.query(
+            OrgCharge.id,
+            OrgCharge.amount,
+            OrgCharge.cycle_key,
+            OrgCharge.created_at,
+            OrgCharge.org_member_id,
+            OrgMember.nickname,
+            User.full_name,
+            User.email,
+            User.phone,
+        )
+        .join(OrgMember, OrgMember.id == OrgCharge.org_member_id)
+        .join(User, User.id == OrgMember.user_id)
+        .filter(OrgCharge.org_id == org_id, OrgCharge.status == ChargeStatus.PENDING)
+        .all()
+    )
+
+
+def load_imported_fitids(db: Session, org_id: UUID, fitids: Iterable[str]) -> set[str]:
+    """Quais destes FITIDs a org já baixou (uma query por lote de _FITID_CHUNK)."""
+    wanted = sorted(set(fitids))
+    found: set[str] = set()
+    for k in range(0, len(wanted), _FITID_CHUNK):
+        chunk = wanted[k : k + _FITID_CHUNK]
+        found.update(
+            r[0]
+            for r in db.query(ImportedStatementLine.fitid)
+            .filter(ImportedStatementLine.org_id == org_id, ImportedStatementLine.fitid.in_(chunk))
+            .all()
+        )
+    return found
+
+
+def record_imported_fitids(db: Session, org_id: UUID, report: ImportReport, actor_id: UUID | None) -> int:
+    """Grava os FITIDs conciliados (sem commit: entra na transação da baixa)."""
+    rows = [
+        {
+            "org_id": org_id,
+            "fitid": m["fitid"],
+            "charge_id": m["charge_id"],
+            "posted_on": m["posted_on"],
+            "amount": m["amount"],
+            "imported_by_id": actor_id,
+        }
+        for m in report.matched
+        if m["fitid"]
+    ]
+    if rows:
+        # import concorrente do mesmo extrato: quem chegar depois não duplica
+        db.execute(pg_insert(ImportedStatementLine).on_conflict_do_nothing(), rows)
+    return len(rows)
+
+
+def reconcile(
+    lines: Iterable[StatementLine | tuple[int, str]],
+    matcher: ChargeMatcher,
+    imported_fitids: set[str] | None = None,
+) -> ImportReport:
+    report = ImportReport()
+    seen_fitids = set(imported_fitids or ())
+    for item in lines:
+        report.lines += 1
+        if report.lines > MAX_STATEMENT_LINES:
+            raise HTTPException(status_code=400, detail=f"Statement has more than {MAX_STATEMENT_LINES} lines")
+        if isinstance(item, tuple):
+            report.unmatched.append({"line": item[0], "reason": "parse_error", "detail": item[1]})
+            continue
+        if item.amount <= 0:
+            continue  # débito: não é pagamento de cobrança
+        report.credits += 1
+        if item.fitid:
+            if item.fitid in seen_fitids:
+                # antes do match: a transação repetida não pode "pegar" outra cobrança pendente
+                report.unmatched.append(
+                    {
+                        "line": item.line,
+                        "posted_on": item.date,
+                        "amount": float(item.amount),
+                        "text": item.text,
+                        "reason": "already_imported",
+                        "detail": item.fitid,
+                    }
+                )
+                continue
+            seen_fitids.add(item.fitid)
+        charge, how = matcher.match(item)
+        if charge is None:
+            report.unmatched.append(
+                {"line": item.line, "posted_on": item.date, "amount": float(item.amount), "text": item.text, "reason": how}
+            )
+            continue
+        report.matched.append(
+            {
+                "line": item.line,
+                "posted_on": item.date,
+                "amount": float(item.amount),
+                "charge_id": charge.id,
+                "org_member_id": charge.org_member_id,
+                "cycle_key": charge.cycle_key,
+                "match": how,
+                "fitid": item.fitid,
+            }
+        )
+    return report
+
+
+def paid_at_by_charge(report: ImportReport) -> dict[UUID, datetime]:
+    # data do extrato (sem hora) -> meio-dia UTC, para não cair no dia anterior em UTC-3
+    return {m["charge_id"]: datetime.combine(m["posted_on"], time(12), tzinfo=timezone.utc) for m in report.matched}
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Auto-balance de times A/B.
+#
+# Cada jogador vira x_i = +1 (A) ou -1 (B). O custo minimizado é
+#
+#     w_rating * |sum(r_i * x_i)|  +  w_repeat * sum_{i<j, mesmo time} P_ij
+#
+# onde r é o rating e P[i, j] quantas vezes i e j jogaram no mesmo time nos
+# jogos recentes. A busca local só faz trocas (i em A <-> j em B), então o
+# tamanho dos times nunca muda; o ganho de TODAS as trocas possíveis é
+# calculado de uma vez com broadcasting (|A| x |B|) e aplicamos a melhor.
+
+
+@dataclass
+class BalanceResult:
+    sides: np.ndarray  # +1 = A, -1 = B (mesma ordem da entrada)
+    rating_gap: float
+    repeat_pairs: float
+    cost: float
+
+
+def _pair_cost(pairs: np.ndarray, x: np.ndarray) -> float:
+    # sum_{i<j} P_ij [x_i == x_j] == (sum(P) + x^T P x) / 4   (diag(P) == 0)
+    return float((pairs.sum() + x @ pairs @ x) / 4.0)
+
+
+def _initial_split(n: int, ratings: np.ndarray, locked: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    # "snake" por rating com ruído, respeitando jogadores travados (capitães)
+    x = np.zeros(n)
+    x[locked != 0] = locked[locked != 0]
+    free = np.flatnonzero(locked == 0)
+    order = free[np.argsort(-(ratings[free] + rng.normal(0.0, 0.5, size=free.size)))]
+
+    size_a = (n + 1) // 2 if rng.random() < 0.5 else n // 2
+    need_a = size_a - int((x > 0).sum())
+    need_b = (n - size_a) - int((x < 0).sum())
+    if need_a < 0 or need_b < 0:
+        # travas desequilibradas: aceita o tamanho que elas impõem
+        need_a = max(need_a, 0)
+        need_b = free.size - need_a
+
+    turn = [1, -1, -1, 1]
+    k = 0
+    for idx in order:
+        side = turn[k % 4]
+        if side > 0 and need_a == 0:
+            side = -1
+        elif side < 0 and need_b == 0:
+            side = 1
+        x[idx] = side
+        if side > 0:
+            need_a -= 1
+        else:
+            need_b -= 1
+        k += 1
+    return x
+
+
+def _local_search(
+    x: np.ndarray,
+    ratings: np.ndarray,
+    pairs: np.ndarray,
+    movable: np.ndarray,
+    w_rating: float,
+    w_repeat: float,
+    max_iters: int,
+) -> np.ndarray:
+    x = x.copy()
+    for _ in range(max_iters):
+        a = np.flatnonzero((x > 0) & movable)
+        b = np.flatnonzero((x < 0) & movable)
+        if a.size == 0 or b.size == 0:
+            break
+
+        diff = float(ratings @ x)
+        g = pairs @ x  # afinidade assinada de cada jogador com o próprio time
+
+        # i (A) vai p/ B e j (B) vai p/ A
+        new_diff = diff - 2.0 * ratings[a][:, None] + 2.0 * ratings[b][None, :]
+        d_rating = np.abs(new_diff) - abs(diff)
+        d_pairs = -(g[a][:, None] * x[a][:, None] + g[b][None, :] * x[b][None, :]) - 2.0 * pairs[np.ix_(a, b)]
+        delta = w_rating * d_rating + w_repeat * d_pairs
+
+        k = int(np.argmin(delta))
+        if delta.flat[k] >= -1e-9:
+            break
+        i, j = np.unravel_index(k, delta.shape)
+        x[a[i]] = -1.0
+        x[b[j]] = 1.0
+    return x
+
+
+def balance_teams(
+    ratings: np.ndarray,
+    pairs: np.ndarray,
+    locked: np.ndarray | None = None,
+    *,
+    w_rating: float = 1.0,
+    w_repeat: float = 0.5,
+    restarts: int = 8,
+    max_iters: int = 200,
+    seed: int | None = None,
+) -> BalanceResult:
+    """Divide n jogadores em dois times minimizando diferença de rating e repetição de duplas.
+
+    ratings: (n,) rating de cada jogador
+    pairs:   (n, n) simétrica, quantas vezes cada dupla jogou junta recentemente
+    locked:  (n,) +1 força A, -1 força B, 0 livre (ex.: capitães)
+    """
+    ratings = np.asarray(ratings, dtype=float)
+    n = ratings.size
+    if n < 2:
+        raise ValueError("at least two players are required")
+
+    pairs = np.asarray(pairs, dtype=float).copy()
+    np.fill_diagonal(pairs, 0.0)
+    locked = np.zeros(n) if locked is None else np.asarray(locked, dtype=float)
+    movable = locked == 0
+
+    rng = np.random.default_rng(seed)
+    best: BalanceResult | None = None
+    for _ in range(max(1, restarts)):
+        x = _initial_split(n, ratings, locked, rng)
+        x = _local_search(x, ratings, pairs, movable, w_rating, w_repeat, max_iters)
+
+        gap = abs(float(ratings @ x))
+        rep = _pair_cost(pairs, x)
+        cost = w_rating * gap + w_repeat * rep
+        if best is None or cost < best.cost:
+            best = BalanceResult(sides=x, rating_gap=gap, repeat_pairs=rep, cost=cost)
+    return best
+
@@ -1,13 +1,22 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.routers import auth, organizations, games, ledger, org_members, billing, users, guests, finance, internal_billing
-#from app.db.session import engine
+from app.core.idempotency import IdempotencyMiddleware, purge_periodically
+from app.core.metrics import MetricsMiddleware, register_db_pool, register_routes
+from app.core.profiler import PROFILER, ProfilerMiddleware
+from app.core.responses import FastJSONResponse
+from app.db.query_stats import QueryStatsMiddleware, install_query_stats
+from app.db.session import SessionLocal, engine
+from app.db.slow_queries import dump_periodically
+from app.services.finance_cache import install_finance_cache_invalidation
+from app.routers import auth, organizations, games, ledger, org_members, billing, users, guests, finance, internal_billing, internal_db, internal_metrics, internal_profiler, jobs, search
 #from app.db.base_class import Base
 #import app.db.base  # garante que os models foram importados
 
 
-app = FastAPI(title=settings.PROJECT_NAME, version="0.1.0")
+app = FastAPI(title=settings.PROJECT_NAME, version="0.1.0", default_response_class=FastJSONResponse)
 
 # Set all CORS enabled origins
 
@@ -17,12 +26,27 @@ origins = [
     "http://10.0.29.107:3000",
 ]
 
+# contagem/tempo de SQL por request (Server-Timing + log)
+install_query_stats(engine)
+app.add_middleware(QueryStatsMiddleware, enforce_budget=settings.QUERY_BUDGET_ENFORCE)
+# métricas Prometheus (GET /api/v1/internal/metrics, X-Internal-Key)
+app.add_middleware(MetricsMiddleware)
+register_db_pool(engine)
+# cache do breakdown financeiro: invalida no commit de escrita em ledger/cobranças/jogos/settings
+install_finance_cache_invalidation(SessionLocal)
+# profiler por amostragem, opt-in (PUT /api/v1/internal/profiler liga/ajusta em runtime)
+PROFILER.update(enabled=settings.PROFILER_ENABLED, sample_rate=settings.PROFILER_SAMPLE_RATE)
+app.add_middleware(ProfilerMiddleware, internal_key=settings.INTERNAL_KEY)
+# retries com Idempotency-Key nos endpoints @idempotent devolvem a resposta guardada
+app.add_middleware(IdempotencyMiddleware)
+# CORS por último = camada mais externa: replay/409/422 do IdempotencyMiddleware também levam os headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 
@@ -34,15 +58,89 @@ app.include_router(org_members.router, prefix="/api/v1", tags=["org_members"])
 app.include_router(billing.router, prefix="/api/v1", tags=["billing"])
 app.include_router(users.router, prefix="/api/v1", tags=["users"])
 app.include_router(guests.router, prefix="/api/v1", tags=["guests"])
+app.include_router(search.router, prefix="/api/v1", tags=["search"])
 app.include_router(games.router, prefix="/api/v1", tags=["games"])
 app.include_router(ledger.router, prefix="/api/v1", tags=["ledger"])
 app.include_router(finance.router, prefix="/api/v1", tags=["finance"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
 app.include_router(internal_billing.router, prefix="/api/v1", tags=["internal"])
+app.include_router(internal_metrics.router, prefix="/api/v1", tags=["internal"])
+app.include_router(internal_db.router, prefix="/api/v1", tags=["internal"])
+app.include_router(internal_profiler.router, prefix="/api/v1", tags=["internal"])
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Sport SaaS API"}
 
+
+register_routes(app.routes)
+
+
+_background_tasks: list[asyncio.Task] = []
+_job_workers: list = []
+
+
+@app.on_event("startup")
+async def start_slow_query_dump():
+    if settings.SLOW_QUERY_LOG_INTERVAL_SECONDS > 0:
+        _background_tasks.append(
+            asyncio.create_task(
+                dump_periodically(settings.SLOW_QUERY_LOG_INTERVAL_SECONDS, settings.SLOW_QUERY_LOG_TOP_N)
+            )
+        )
+
+
+@app.on_event("startup")
+async def start_billing_scheduler():
+    # desligado por padrão: ligar em UM processo (ver README, "Tarefas em background")
+    if settings.BILLING_SCHEDULER_ENABLED:
+        from app.services.billing_scheduler import BILLING_SCHEDULER, run_scheduler
+
+        BILLING_SCHEDULER.spread_seconds = settings.BILLING_SCHEDULER_SPREAD_SECONDS
+        _background_tasks.append(
+            asyncio.create_task(
+                run_scheduler(SessionLocal, BILLING_SCHEDULER, settings.BILLING_SCHEDULER_REFRESH_SECONDS)
+            )
+        )
+
+
+@app.on_event("startup")
+async def start_idempotency_purge():
+    if settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS > 0:
+        _background_tasks.append(
+            asyncio.create_task(purge_periodically(settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS))
+        )
+
+
+@app.on_event("startup")
+async def start_partition_maintenance():
+    if settings.LEDGER_PARTITION_MAINTENANCE_INTERVAL_SECONDS > 0:
+        from app.db.partitions import maintain_periodically
+
+        _background_tasks.append(
+            asyncio.create_task(
+                maintain_periodically(engine, settings.LEDGER_PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+            )
+        )
+
+
+@app.on_event("startup")
+def start_job_worker():
+    if settings.JOB_WORKER_EMBEDDED and settings.JOB_WORKER_CONCURRENCY > 0:
+        from app.services.jobs import JobWorker
+
+        worker = JobWorker(SessionLocal, concurrency=settings.JOB_WORKER_CONCURRENCY)
+        worker.start()
+        _job_workers.append(worker)
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in _background_tasks:
+        task.cancel()
+    for worker in _job_workers:
+        await asyncio.to_thread(worker.stop, 10.0)
+
 #@app.on_event("startup")
 #def on_startup():
 #    Base.metadata.create_all(bind=engine)
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""Benchmark/carga dos endpoints quentes da API (substitui os smoke-*.ps1 para performance).
+
+Só usa a stdlib. Fluxo:
+
+    # 1) dados (dentro de apps/api, apontando DATABASE_URL para o Postgres local)
+    python -m app.scripts.generate_dataset --profile bench --manifest bench_manifest.json
+
+    # 2) carga contra a API rodando
+    python scripts/bench.py --manifest apps/api/bench_manifest.json --concurrency 16 --duration 20
+
+    # 3) CI: compara com um baseline e falha se o p95 piorar mais que --max-regression
+    python scripts/bench.py ... --json-out bench.json --baseline bench_baseline.json
+
+Cenários: login, game_detail, attendance_put, draft_pick, finance_dashboard, billing_run,
+ledger_list, member_list (listas grandes: leitura por colunas + orjson).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+SCENARIOS = (
+    "login",
+    "game_detail",
+    "attendance_put",
+    "draft_pick",
+    "finance_dashboard",
+    "billing_run",
+    "ledger_list",
+    "member_list",
+)
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, body: str):
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.status = status
+
+
+class Client:
+    def __init__(self, base: str, timeout: float):
+        self.base = base.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, *, token: str | None = None, body=None, headers: dict | None = None):
+        data = None
+        hdrs = {"Accept": "application/json", **(headers or {})}
+        if body is not None:
+            data = json.dumps(body).encode()
+            hdrs["Content-Type"] = "application/json"
+        if token:
+            hdrs["Authorization"] = f"Bearer {token}"
+        req = urllib.request.Request(self.base + path, data=data, method=method, headers=hdrs)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                raw = resp.read()
+        except urllib.error.HTTPError as e:
+            raise ApiError(e.code, e.read().decode(errors="replace")) from None
+        return json.loads(raw) if raw else None
+
+    def login(self, email: str, password: str) -> str:
+        return self.request("POST", "/auth/login", body={"email": email, "password": password})["access_token"]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.errors: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def ok(self, seconds: float) -> None:
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def fail(self, exc: Exception) -> None:
+        key = f"HTTP {exc.status}" if isinstance(exc, ApiError) else type(exc).__name__
+        with self.lock:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, math.ceil(p / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+
+def _summary(stats: Stats, elapsed: float) -> dict:
+    lat = sorted(stats.latencies)
+    errors = sum(stats.errors.values())
+    return {
+        "requests": len(lat) + errors,
+        "errors": errors,
+        "error_kinds": stats.errors,
+        "rps": round(len(lat) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(_percentile(lat, 50) * 1000, 2),
+        "p95_ms": round(_percentile(lat, 95) * 1000, 2),
+        "p99_ms": round(_percentile(lat, 99) * 1000, 2),
+        "max_ms": round((lat[-1] if lat else 0.0) * 1000, 2),
+    }
+
+
+def _timed(stats: Stats, fn, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as exc:
+        stats.fail(exc)
+        return None
+    stats.ok(time.perf_counter() - started)
+    return result
+
+
+class Bench:
+    def __init__(self, args, manifest: dict):
+        self.args = args
+        self.client = Client(args.api, args.timeout)
+        self.orgs = manifest["orgs"]
+        self.password = manifest["password"]
+        self._tokens: dict[str, str] = {}
+        self._tokens_lock = threading.Lock()
+        self._draft_games = deque((o["org_id"], g) for o in self.orgs for g in o["draft_game_ids"])
+        self._draft_lock = threading.Lock()
+
+    def token(self, email: str) -> str:
+        tok = self._tokens.get(email)
+        if tok is None:
+            tok = self.client.login(email, self.password)
+            with self._tokens_lock:
+                self._tokens[email] = tok
+        return tok
+
+    # --- cenários: cada chamada executa UMA unidade de trabalho medida ---
+
+    def login(self, rng: random.Random, stats: Stats) -> None:
+        org = rng.choice(self.orgs)
+        _timed(stats, self.client.login, rng.choice(org["member_emails"]), self.password)
+
+    def game_detail(self, rng: random.Random, stats: Stats) -> None:
+        org = rng.choice(self.orgs)
+        tok = self.token(rng.choice(org["member_emails"]))
+        game_id = rng.choice(org["game_ids"])
+        _timed(stats, self.client.request, "GET", f"/orgs/{org['org_id']}/games/{game_id}", token=tok)
+
+    def attendance_put(self, rng: random.Random, stats: Stats) -> None:
+        org = rng.choice(self.orgs)
+        tok = self.token(rng.choice(org["member_emails"]))
+        game_id = rng.choice(org["draft_game_ids"] or org["game_ids"])
+        status = rng.choice(("GOING", "MAYBE", "NOT_GOING"))
+        _timed(
+            stats,
+            self.client.request,
+            "PUT",
+            f"/orgs/{org['org_id']}/games/{game_id}/attendance",
+            token=tok,
+            body={"status": status},
+        )
+
+    def draft_pick(self, rng: random.Random, stats: Stats) -> None:
+        # cada jogo de draft só pode ser consumido uma vez: start (não medido) + todos os picks (medidos)
+        with self._draft_lock:
+            if not self._draft_games:
+                raise StopIteration
+            org_id, game_id = self._draft_games.popleft()
+        org = next(o for o in self.orgs if o["org_id"] == org_id)
+        tok = self.token(org["admin_email"])
+        base = f"/orgs/{org_id}/games/{game_id}/draft"
+        try:
+            state = self.client.request("POST", f"{base}/start", token=tok)
+        except Exception as exc:
+            stats.fail(exc)
+            return
+        while state and state.get("status") == "IN_PROGRESS" and state.get("remaining_pool"):
+            target = state["remaining_pool"][0]
+            body = {
+                "team_side": state["current_turn_team_side"],
+                "org_member_id": target.get("org_member_id"),
+                "game_guest_id": target.get("game_guest_id"),
+            }
+            state = _timed(stats, self.client.request, "POST", f"{base}/pick", token=tok, body=body)
+
+    def finance_dashboard(self, rng: random.Random, stats: Stats) -> None:
+        org = rng.choice(self.orgs)
+        tok = self.token(org["admin_email"])
+        _timed(stats, self.client.request, "GET", f"/orgs/{org['org_id']}/finance/dashboard", token=tok)
+
+    def ledger_list(self, rng: random.Random, stats: Stats) -> None:
+        org = rng.choice(self.orgs)
+        tok = self.token(rng.choice(org["member_emails"]))
+        _timed(stats, self.client.request, "GET", f"/orgs/{org['org_id']}/ledger", token=tok)
+
+    def member_list(self, rng: random.Random, stats: Stats) -> None:
+        org = rng.choice(self.orgs)
+        tok = self.token(rng.choice(org["member_emails"]))
+        _timed(stats, self.client.request, "GET", f"/orgs/{org['org_id']}/members", token=tok)
+
+    def billing_run(self, rng: random.Random, stats: Stats) -> None:
+        _timed(
+            stats,
+            self.client.request,
+            "POST",
+            "/internal/billing/run",
+            headers={"X-Internal-Key": self.args.internal_key},
+        )
+
+
+def run_scenario(bench: Bench, name: str, *, concurrency: int, duration: float, max_requests: int | None, seed: int) -> dict:
+    fn = getattr(bench, name)
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+    issued = [0]
+    issued_lock = threading.Lock()
+
+    def worker(worker_id: int) -> None:
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            if max_requests is not None:
+                with issued_lock:
+                    if issued[0] >= max_requests:
+                        return
+                    issued[0] += 1
+            try:
+                fn(rng, stats)
+            except StopIteration:
+                return
+            except Exception as exc:  # erro fora da chamada medida (ex.: login do setup)
+                stats.fail(exc)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return _summary(stats, time.perf_counter() - started)
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or not base.get("p95_ms"):
+            continue
+        ratio = cur["p95_ms"] / base["p95_ms"]
+        if ratio > 1.0 + max_regression:
+            problems.append(f"{name}: p95 {cur['p95_ms']}ms vs baseline {base['p95_ms']}ms (+{(ratio - 1) * 100:.0f}%)")
+        if cur["errors"] and not base.get("errors"):
+            problems.append(f"{name}: {cur['errors']} errors (baseline had none)")
+    return problems
+
+
+def _print_table(results: dict) -> None:
+    cols = ("requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+    print(f"{'scenario':<18}" + "".join(f"{c:>10}" for c in cols))
+    for name, r in results.items():
+        print(f"{name:<18}" + "".join(f"{r[c]:>10}" for c in cols))
+        if r["error_kinds"]:
+            print(f"{'':<18}errors: {r['error_kinds']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", default="http://localhost:8000/api/v1")
+    parser.add_argument("--manifest", default="bench_manifest.json")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="lista separada por vírgula")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0, help="segundos por cenário")
+    parser.add_argument("--requests", type=int, default=None, help="limite de iterações por cenário")
+    parser.add_argument("--billing-runs", type=int, default=3, help="billing_run roda serial, N vezes")
+    parser.add_argument("--internal-key", default="troque_isto")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json-out", default=None)
+    parser.add_argument("--baseline", default=None, help="JSON de uma execução anterior (--json-out)")
+    parser.add_argument("--max-regression", type=float, default=0.20, help="tolerância de piora no p95 (0.20 = 20%%)")
+    args = parser.parse_args()
+
+    with open(args.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+    bench = Bench(args, manifest)
+
+    results: dict[str, dict] = {}
+    for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+        if name == "billing_run":
+            # varre todas as orgs; concorrência aqui só mede contenção de lock
+            r = run_scenario(bench, name, concurrency=1, duration=math.inf, max_requests=args.billing_runs, seed=args.seed)
+        else:
+            r = run_scenario(
+                bench, name, concurrency=args.concurrency, duration=args.duration, max_requests=args.requests, seed=args.seed
+            )
+        results[name] = r
+        print(f"  {name}: {r['requests']} req, p95 {r['p95_ms']}ms", file=sys.stderr)
+
+    _print_table(results)
+
+    report = {
+        "api": args.api,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "scenarios": results,
+    }
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(results, json.load(f), args.max_regression)
+        if problems:
+            print("\nREGRESSION:")
+            for p in problems:
+                print(f"  - {p}")
+            return 1
+        print("\nOK - within baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())